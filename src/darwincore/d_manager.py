@@ -1,7 +1,6 @@
 import yaml
 import json
 import zipfile
-import requests
 import pycountry
 import pandas as pd
 from tqdm import tqdm
@@ -10,6 +9,7 @@ from datetime import datetime
 import xml.etree.ElementTree as ET
 
 from ..utils.constants import TMP_PATH
+from ..zenodo_api.za_http_client import HTTPClient
 
 from ..models.ml_annotation_model import MultilabelAnnotationSessionDAO, MultilabelAnnotationDAO, MultilabelAnnotationSessionDTO, MultilabelLabelDAO
 
@@ -232,7 +232,7 @@ class DarwinCoreManager:
                 gbif_map_by_label[label.name] = cache[label.id_gbif]
                 continue
 
-            r = requests.get(f"https://api.gbif.org/v1/species/{label.id_gbif}")
+            r = HTTPClient().get(f"https://api.gbif.org/v1/species/{label.id_gbif}")
     
             if r.status_code == 404:
                 print(f"Cannot access to {label.name}. Error 404")
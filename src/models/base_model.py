@@ -1,7 +1,12 @@
 import abc
 import enum
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Callable, Hashable, Iterable, Iterator
 
 from ..sql_connector.sc_connector import SQLiteConnector
+from ..utils.constants import IDENTITY_MAP_MAX_SIZE, SQL_MAX_VARIABLES_BY_QUERY
 
 # State use for data in database. 
 class DataStatus(enum.Enum):
@@ -9,13 +14,121 @@ class DataStatus(enum.Enum):
     MISSING_VALUE = 2
     ALREADY = 3
 
+
+class IdentityMap:
+    """ Bounded LRU cache of objects by primary key. Maps are shared by all threads, so each operation holds a lock. """
+
+    def __init__(self, max_size: int = IDENTITY_MAP_MAX_SIZE) -> None:
+        self.max_size = max_size
+        self.__items: OrderedDict[Hashable, Any] = OrderedDict()
+        self.__lock = threading.Lock()
+
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self.__items
+
+
+    def __len__(self) -> int:
+        return len(self.__items)
+
+
+    def get(self, key: Hashable) -> Any | None:
+        """ Return the object and mark it as recently used, None if not in cache. """
+        with self.__lock:
+            if key not in self.__items: return None
+            self.__items.move_to_end(key)
+            return self.__items[key]
+
+
+    def put(self, key: Hashable, value: Any) -> None:
+        """ Add or refresh an object, evict the least recently used one if full. """
+        with self.__lock:
+            self.__items[key] = value
+            self.__items.move_to_end(key)
+            if len(self.__items) > self.max_size:
+                self.__items.popitem(last=False)
+
+
+    def clear(self) -> None:
+        with self.__lock:
+            self.__items.clear()
+
+
 # Base DAO (Data Access Object).
 class AbstractBaseDAO(abc.ABC):
 
     # Common sqlite connector.
     sql_connector = SQLiteConnector()
 
+    # Identity maps shared by all DAO instances, one by table.
+    identity_maps: dict[str, IdentityMap] = {}
+    identity_maps_lock = threading.Lock()
+
     # Mandatory table name.
     @property
     @abc.abstractmethod
-    def table_name(self): pass
\ No newline at end of file
+    def table_name(self): pass
+
+
+    @property
+    def identity_map(self) -> IdentityMap:
+        with AbstractBaseDAO.identity_maps_lock:
+            if self.table_name not in AbstractBaseDAO.identity_maps:
+                AbstractBaseDAO.identity_maps[self.table_name] = IdentityMap()
+            return AbstractBaseDAO.identity_maps[self.table_name]
+
+
+    def _prefetch(self, keys: Iterable[Hashable], key_column: str, select_columns: str, 
+                  parse_rows: Callable[[list[tuple]], dict[Hashable, Any]]) -> dict[Hashable, Any]:
+        """ 
+            Return a dict key: object for all keys.
+            Keys not in the identity map are retrieve with WHERE key_column IN (...) queries, 
+            rows are converted by parse_rows which return a dict key: object.
+        """
+        objects, missing_keys = {}, []
+        for key in dict.fromkeys(keys):
+            if key is None: continue
+            obj = self.identity_map.get(key)
+            if obj is None:
+                missing_keys.append(key)
+            else:
+                objects[key] = obj
+        
+        for i in range(0, len(missing_keys), SQL_MAX_VARIABLES_BY_QUERY):
+            chunk_keys = missing_keys[i:i+SQL_MAX_VARIABLES_BY_QUERY]
+            query = f""" SELECT {select_columns}
+                         FROM {self.table_name}
+                         WHERE {key_column} IN ({', '.join(['?' for _ in chunk_keys])})
+                     """
+            results = self.sql_connector.execute_query(query, tuple(chunk_keys))
+
+            for key, obj in parse_rows(results).items():
+                self.identity_map.put(key, obj)
+                objects[key] = obj
+
+        return objects
+
+
+    @classmethod
+    def clear_identity_maps(cls) -> None:
+        """ Drop all cached objects, use it when the database change under our feet. """
+        with AbstractBaseDAO.identity_maps_lock:
+            identity_maps = list(AbstractBaseDAO.identity_maps.values())
+        for identity_map in identity_maps:
+            identity_map.clear()
+
+
+    @classmethod
+    @contextmanager
+    def transaction(cls) -> Iterator[None]:
+        """ Join or open a transaction on the common connector, cached objects are dropped if it is rolled back. """
+        try:
+            with cls.sql_connector.transaction():
+                yield
+        except BaseException:
+            cls.clear_identity_maps()
+            raise
+
+
+# Cached objects belong to the database file, drop them when the connector connect to a new file or close.
+SQLiteConnector.add_database_changed_callback(AbstractBaseDAO.clear_identity_maps)
@@ -50,7 +50,11 @@ class DepositDAO(AbstractBaseDAO):
 
     table_name = "deposit"
     __deposits: list[DepositDTO] = field(default_factory=list)
-    __deposits_by_key: dict[str, DepositDTO] = field(default_factory=dict)
+
+    __deposit_header = [
+        "doi", "session_name", "ST_AsText(footprint)", "have_processed_data", "have_raw_data",
+        "platform_type", "session_date", "alpha3_country_code", "location"
+    ]
 
 
     @property
@@ -77,52 +81,16 @@ class DepositDAO(AbstractBaseDAO):
         self.sql_connector.execute_query(query, params)
 
 
-    def get_deposit_by_doi(self, deposit_doi: str) -> DepositDTO:
-        """ Retrieve deposit filter by the deposit_doi parameter. """
-        if deposit_doi in self.__deposits_by_key:
-            return self.__deposits_by_key.get(deposit_doi)
-        
-        query = f""" SELECT doi, session_name, ST_AsText(footprint), have_processed_data, have_raw_data,
-                     platform_type, session_date, alpha3_country_code, location 
-                     FROM {self.table_name} WHERE doi = ?;
-                """
-        params = (deposit_doi, )
-        result = self.sql_connector.execute_query(query, params)
-        
-        if result == None: 
-            raise NameError("Deposit DOI not found. Foreigh key failed.")
-        
-        doi, session_name, footprint_wkt, hpd, hrd,\
-            platform, date, country_code, location = result[0]
-        
-        # Convert bytes to object.
-        footprint = wkt.loads(footprint_wkt)
-            
-        deposit = DepositDTO(
-            doi=doi,session_name=session_name,session_date=date,
-            have_processed_data=hpd, have_raw_data=hrd,
-            platform=platform,alpha3_country_code=country_code,
-            location=location, footprint=footprint
-        )
-        self.__deposits_by_key[deposit.doi] = deposit
-
-        return deposit
-    
-
-    def __get_all(self) -> None:
-        """ Retrieve all deposit. """
-        query = f""" SELECT doi, session_name, ST_AsText(footprint),
-                     have_processed_data, have_raw_data, platform_type, session_date,
-                     alpha3_country_code, location 
-                     FROM {self.table_name};
-                """
-        results = self.sql_connector.execute_query(query)
+    def __parse_deposit_results(self, results) -> dict[str, DepositDTO]:
+        """ Method to centralize parse method. """
+        deposits = {}
         for doi, session_name, footprint_wkt, hpd, hrd,\
             platform, date, country_code, location in results:
             
-            footprint = wkt.loads(footprint_wkt)
+            # Convert bytes to object.
+            footprint = wkt.loads(footprint_wkt) if footprint_wkt != None else None
 
-            self.__deposits.append(DepositDTO(
+            deposits[doi] = DepositDTO(
                 doi=doi,
                 session_name=session_name,
                 session_date=date,
@@ -132,7 +100,34 @@ class DepositDAO(AbstractBaseDAO):
                 alpha3_country_code=country_code,
                 location=location,
                 footprint=footprint
-            ))
+            )
+        return deposits
+
+
+    def prefetch(self, deposit_dois: list[str]) -> dict[str, DepositDTO]:
+        """ Retrieve all deposits not already in cache in one query. """
+        return self._prefetch(deposit_dois, "doi", ", ".join(self.__deposit_header), self.__parse_deposit_results)
+
+
+    def get_deposit_by_doi(self, deposit_doi: str) -> DepositDTO:
+        """ Retrieve deposit filter by the deposit_doi parameter. """
+        deposit = self.prefetch([deposit_doi]).get(deposit_doi)
+        
+        if deposit == None: 
+            raise NameError("Deposit DOI not found. Foreigh key failed.")
+
+        return deposit
+    
+
+    def __get_all(self) -> None:
+        """ Retrieve all deposit. """
+        query = f""" SELECT {", ".join(self.__deposit_header)}
+                     FROM {self.table_name};
+                """
+        results = self.sql_connector.execute_query(query)
+        for doi, deposit in self.__parse_deposit_results(results).items():
+            self.identity_map.put(doi, deposit)
+            self.__deposits.append(deposit)
 
 @dataclass
 class DepositLinestringDAO(AbstractBaseDAO):
@@ -140,7 +135,6 @@ class DepositLinestringDAO(AbstractBaseDAO):
     __depositDAO = DepositDAO()
 
     __deposits_linestrings: list[DepositLinestringDTO] = field(default_factory=list)
-    __deposits_linestrings_by_key: dict[int, DepositLinestringDTO] = field(default_factory=dict)
 
 
     @property
@@ -163,32 +157,36 @@ class DepositLinestringDAO(AbstractBaseDAO):
         )
         self.sql_connector.execute_query(query, params)
 
-    # !FIXME All get by ID need to be retrieve in one time to avoid n select in the database
-    # !FIXME If too much occurences, get all id to retrieve and do only one select with IN statement
+
+    def __parse_deposit_linestring_results(self, results) -> dict[int, DepositLinestringDTO]:
+        """ Method to centralize parse method. """
+        deposits = self.__depositDAO.prefetch([deposit_doi for _, deposit_doi, _ in results])
+
+        deposits_linestrings = {}
+        for id, deposit_doi, footprint_linestring_wkt in results:
+            
+            # Convert bytes to object.
+            footprint_linestring = wkt.loads(footprint_linestring_wkt) if footprint_linestring_wkt != None else None
+
+            deposits_linestrings[id] = DepositLinestringDTO(
+                id=id,
+                deposit=deposits[deposit_doi],
+                footprint_linestring=footprint_linestring
+            )
+        return deposits_linestrings
+
+
+    def prefetch(self, deposit_linestring_ids: list[int]) -> dict[int, DepositLinestringDTO]:
+        """ Retrieve all deposit_linestring not already in cache in one query. """
+        return self._prefetch(deposit_linestring_ids, "id", "id, deposit_doi, ST_AsText(footprint_linestring)", self.__parse_deposit_linestring_results)
+
+
     def get_deposit_linestring_by_id(self, deposit_linestring_id: int) -> DepositLinestringDTO:
         """ Retrieve deposit_linestring filter by the deposit_doi parameter. """
-        if deposit_linestring_id in self.__deposits_linestrings_by_key:
-            return self.__deposits_linestrings_by_key.get(deposit_linestring_id)
+        deposit_linestring = self.prefetch([deposit_linestring_id]).get(deposit_linestring_id)
         
-        query = f""" SELECT id, deposit_doi, ST_AsText(footprint_linestring)
-                     FROM {self.table_name} WHERE id = ?;
-                """
-        params = (deposit_linestring_id, )
-        result = self.sql_connector.execute_query(query, params)
-        
-        if result == None: 
+        if deposit_linestring == None: 
             raise NameError("Deposit linestring ID not found. Foreigh key failed.")
-        
-        id, deposit_doi, footprint_linestring_wkt = result[0]
-        
-        # Convert bytes to object.
-        footprint = wkt.loads(footprint_linestring_wkt)
-        deposit = self.__depositDAO.get_deposit_by_doi(deposit_doi)
-
-        deposit_linestring = DepositLinestringDTO(
-            id=id, deposit=deposit, footprint_linestring=footprint
-        )
-        self.__deposits_linestrings_by_key[deposit_linestring.id] = deposit_linestring
 
         return deposit_linestring
 
@@ -200,16 +198,9 @@ class DepositLinestringDAO(AbstractBaseDAO):
                 """
         results = self.sql_connector.execute_query(query)
         
-        for id, deposit_doi, footprint_linestring_wkt in results:
-            
-            footprint_linestring = wkt.loads(footprint_linestring_wkt)
-            deposit = self.__depositDAO.get_deposit_by_doi(deposit_doi)
-
-            self.__deposits_linestrings.append(DepositLinestringDTO(
-                id=id,
-                deposit=deposit,
-                footprint_linestring=footprint_linestring
-            ))
+        for id, deposit_linestring in self.__parse_deposit_linestring_results(results).items():
+            self.identity_map.put(id, deposit_linestring)
+            self.__deposits_linestrings.append(deposit_linestring)
 
 
 @dataclass
@@ -219,7 +210,6 @@ class VersionDAO(AbstractBaseDAO):
     __depositDAO = DepositDAO()
 
     __versions: list[VersionDTO] = field(default_factory=list)
-    __versions_by_doi: dict[str, VersionDTO] = field(default_factory=dict)
 
 
     @property
@@ -239,32 +229,32 @@ class VersionDAO(AbstractBaseDAO):
         self.sql_connector.execute_query(query, params)
 
 
+    def __parse_version_results(self, results) -> dict[str, VersionDTO]:
+        """ Method to centralize parse method. """
+        deposits = self.__depositDAO.prefetch([deposit_doi for _, deposit_doi in results])
+        return {doi: VersionDTO(doi=doi, deposit=deposits[deposit_doi]) for doi, deposit_doi in results}
+
+
+    def prefetch(self, version_dois: list[str]) -> dict[str, VersionDTO]:
+        """ Retrieve all versions not already in cache in one query. """
+        return self._prefetch(version_dois, "doi", "doi, deposit_doi", self.__parse_version_results)
+
+
     def get_version_by_doi(self, version_doi: str) -> VersionDTO:
         """ Get version filter by doi. """        
-        if version_doi in self.__versions_by_doi:
-            return self.__versions_by_doi.get(version_doi)
-        
-        query = f""" SELECT doi, deposit_doi FROM {self.table_name} WHERE doi = ?; """
-        params = (version_doi, )
-        result = self.sql_connector.execute_query(query, params)
+        version = self.prefetch([version_doi]).get(version_doi)
 
-        if len(result) == 0:
+        if version == None:
             raise NameError("[WARNING] No version found for this doi.")
         
-        doi, deposit_doi = result[0]
-        deposit = self.__depositDAO.get_deposit_by_doi(deposit_doi)
-        
-        version = VersionDTO(doi=doi, deposit=deposit)
-        self.__versions_by_doi[doi] = version
         return version
 
 
     def __get_all(self) -> None:
         """ Retrieve all versions. """
         query = f""" SELECT doi, deposit_doi FROM {self.table_name} """
-        for doi, deposit_doi in self.sql_connector.execute_query(query):
-            deposit = self.__depositDAO.get_deposit_by_doi(deposit_doi)
-            
-            self.__versions.append(VersionDTO(
-                doi=doi, deposit=deposit
-            ))
\ No newline at end of file
+        results = self.sql_connector.execute_query(query)
+
+        for doi, version in self.__parse_version_results(results).items():
+            self.identity_map.put(doi, version)
+            self.__versions.append(version)
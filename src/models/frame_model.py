@@ -1,8 +1,8 @@
 import polars as pl
+from typing import Iterator
 from datetime import datetime
 from dataclasses import dataclass, field
 
-from shapely import wkt
 from shapely.geometry import Point, Polygon
 
 from .base_model import AbstractBaseDAO
@@ -41,21 +41,27 @@ class FrameDTO():
 class FrameDAO(AbstractBaseDAO):
     table_name = "frame"
 
-    __frames: list[FrameDTO] = field(default_factory=list)
-    __frames_by_id: dict[int, FrameDTO] = field(default_factory=dict)
-
     __versionDAO = VersionDAO()
     __frame_header = [
         "id","version_doi","OriginalFileName","filename","relative_file_path",
-        "ST_AsText(GPSPosition)","GPSAltitude","GPSPitch","GPSRoll","GPSTrack","GPSDatetime",
+        "ST_Y(GPSPosition)","ST_X(GPSPosition)","GPSAltitude","GPSPitch","GPSRoll","GPSTrack","GPSDatetime",
         "GPSFix"
     ]
-
-    @property
-    def frames(self) -> list[FrameDTO]:
-        if len(self.__frames) == 0:
-            self.__get_all()
-        return self.__frames
+    __frame_table_schema = {
+        "id": pl.Int64,
+        "version_doi": pl.String,
+        "OriginalFileName": pl.String,
+        "FileName": pl.String,
+        "relative_file_path": pl.String,
+        "GPSLatitude": pl.Float64,
+        "GPSLongitude": pl.Float64,
+        "GPSAltitude": pl.Float64,
+        "GPSPitch": pl.Float64,
+        "GPSRoll": pl.Float64,
+        "GPSTrack": pl.Float64,
+        "GPSDatetime": pl.String,
+        "GPSFix": pl.UInt8
+    }
 
     @property
     def typed_frames_header(self) -> dict:
@@ -95,24 +101,17 @@ class FrameDAO(AbstractBaseDAO):
         return None
 
 
-    def __parse_frame_results(self, results) -> list[FrameDTO] | FrameDTO:
-        """ Method to centralize parse method. """
+    def __build_frames(self, results) -> list[FrameDTO]:
+        """ Convert rows into frames, versions are retrieve in one query. """
+        versions = self.__versionDAO.prefetch([version_doi for _, version_doi, *_ in results])
+
         frames = []
-        for id, version_doi, original_filename, filename, relative_path, GPSPosition,\
+        for id, version_doi, original_filename, filename, relative_path, lat, lon,\
             GPSAltitude, GPSPitch,GPSRoll, GPSTrack, GPSDatetime, GPSFix in results:
             
-            # Get lat, lon from GPSPosition.
-            lat, lon = None, None
-            if GPSPosition != None:
-                position = wkt.loads(GPSPosition)
-                lat = position.y
-                lon = position.x
-            
-            version = self.__versionDAO.get_version_by_doi(version_doi)
-            
             frames.append(FrameDTO(
                 id=id,
-                version=version,
+                version=versions[version_doi],
                 original_filename=original_filename,
                 filename=filename,
                 relative_path=relative_path,
@@ -125,6 +124,12 @@ class FrameDAO(AbstractBaseDAO):
                 gps_datetime=GPSDatetime,
                 gps_fix=GPSFix
             ))
+        return frames
+
+
+    def __parse_frame_results(self, results) -> list[FrameDTO] | FrameDTO:
+        """ Method to centralize parse method. """
+        frames = self.__build_frames(results)
         if len(frames) == 1: return frames[0]
         return frames
 
@@ -140,26 +145,52 @@ class FrameDAO(AbstractBaseDAO):
         return self.__parse_frame_results(results)
     
 
-    def get_frame_by_id(self, frame_id: int) -> FrameDTO:
-        """ Get frames filter by id"""
-        if frame_id in self.__frames_by_id:
-            return self.__frames_by_id.get(frame_id)
-        
+    def get_frames_table(self, version: VersionDTO | None = None) -> pl.DataFrame:
+        """ 
+            Get frames as a columnar table without building DTOs, one column by field of __frame_table_schema. 
+            Filter by version if provided.
+        """
+        return self.__concat_frames_tables(self.iter_frames_tables(version))
+
+
+    def iter_frames_tables(self, version: VersionDTO | None = None) -> Iterator[pl.DataFrame]:
+        """ Same as get_frames_table but yield one table by batch, for exports that never hold all frames in memory. """
         query = f""" SELECT {", ".join(self.__frame_header)}
                      FROM {self.table_name}
-                     WHERE id = ?
+                     {"WHERE version_doi = ?" if version != None else ""}
+                     ORDER BY id;
                  """
-        params = (frame_id, )
-        result = self.sql_connector.execute_query(query, params)
+        params = (version.doi, ) if version != None else None
+        return self.__iter_frames_tables(query, params)
 
-        if len(result) == 0:
-            raise NameError("[ERROR] No frame found for this id.")
+
+    def __iter_frames_tables(self, query: str, params) -> Iterator[pl.DataFrame]:
+        """ Fetch rows of a query selecting __frame_header by batch, each batch is a columnar table. """
+        for rows in self.sql_connector.execute_query_by_batch(query, params):
+            yield pl.DataFrame(rows, schema=self.__frame_table_schema, orient="row")
+
+
+    def __concat_frames_tables(self, tables: Iterator[pl.DataFrame]) -> pl.DataFrame:
+        df_frames = pl.DataFrame(schema=self.__frame_table_schema)
+        for df in tables:
+            df_frames.vstack(df, in_place=True)
         
-        frame = self.__parse_frame_results(result)
-        if isinstance(frame, list): 
-            raise NameError("[ERROR] Something goes wrong when retrieving only one frame.")
+        return df_frames.rechunk()
+
+
+    def prefetch(self, frame_ids: list[int]) -> dict[int, FrameDTO]:
+        """ Retrieve all frames not already in cache in one query. """
+        return self._prefetch(frame_ids, "id", ", ".join(self.__frame_header), 
+                              lambda results: {frame.id: frame for frame in self.__build_frames(results)})
+
+
+    def get_frame_by_id(self, frame_id: int) -> FrameDTO:
+        """ Get frames filter by id"""
+        frame = self.prefetch([frame_id]).get(frame_id)
+
+        if frame == None:
+            raise NameError("[ERROR] No frame found for this id.")
 
-        self.__frames_by_id[frame.id] = frame
         return frame
 
 
@@ -180,7 +211,19 @@ class FrameDAO(AbstractBaseDAO):
             raise NameError("[ERROR] Frame is not unique for this version and this filename.")
 
         return frame
-    
+
+
+    def get_frame_ids_by_version(self, frame_version: VersionDTO) -> dict[str, int]:
+        """ Get a map filename: frame id for all frames of a version in one query. """
+        query = f""" SELECT filename, id
+                     FROM {self.table_name}
+                     WHERE version_doi = ?;
+                 """
+        params = (frame_version.doi, )
+        results = self.sql_connector.execute_query(query, params)
+
+        return {filename: frame_id for filename, frame_id in results}
+
 
     def get_frame_by_filename(self, filename: str) -> FrameDTO:
         """Get frame filter by name. """
@@ -201,14 +244,6 @@ class FrameDAO(AbstractBaseDAO):
         return frame
 
     
-    def __get_all(self) -> None:
-        """ Get all frames. """
-        query = f""" SELECT {", ".join(self.__frame_header)}
-                     FROM {self.table_name}
-                 """
-        results = self.sql_connector.execute_query(query)
-        self.__frames = self.__parse_frame_results(results)
-    
 
     def insert(self, frames: FrameDTO | list[FrameDTO]) -> None:
         """ Insert one or more frames in database. """
@@ -220,11 +255,6 @@ class FrameDAO(AbstractBaseDAO):
             print("[WARNING] Cannot insert frames in database, we don't have frames.")
             return
         
-        query = f""" INSERT INTO {self.table_name}
-                     (version_doi, filename, OriginalFileName, relative_file_path, GPSPosition,
-                      GPSAltitude, GPSPitch, GPSRoll, GPSTrack, GPSDatetime, GPSFix) 
-                     VALUES (?,?,?,?,ST_GeomFromText(?),?,?,?,?,?,?)
-                 """
         values = []
         for f in frames:
             values.append((f.version.doi, 
@@ -239,22 +269,43 @@ class FrameDAO(AbstractBaseDAO):
                            f.gps_datetime,
                            f.gps_fix,
                         ))
+        self.bulk_insert(values)
+
+
+    def bulk_insert(self, values: list[tuple]) -> None:
+        """ 
+            Insert raw rows without building DTOs. Each row is 
+            (version_doi, filename, OriginalFileName, relative_file_path, WKT position,
+             GPSAltitude, GPSPitch, GPSRoll, GPSTrack, GPSDatetime, GPSFix)
+        """
+        if len(values) == 0:
+            print("[WARNING] Cannot insert frames in database, we don't have frames.")
+            return
+
+        query = f""" INSERT INTO {self.table_name}
+                     (version_doi, filename, OriginalFileName, relative_file_path, GPSPosition,
+                      GPSAltitude, GPSPitch, GPSRoll, GPSTrack, GPSDatetime, GPSFix) 
+                     VALUES (?,?,?,?,ST_GeomFromText(?),?,?,?,?,?,?)
+                 """
         self.sql_connector.execute_query(query, values)
     
-    def get_frame_by_date_type_position(self, list_poly: list[Polygon], date_range, platform_type) -> list[FrameDTO]:
-        """ Get frames with three filter: Position polygon, Date range and platform type. """
+    def build_date_type_position_query(self, select: str, list_poly: list[Polygon], date_range, platform_type) -> tuple[str, tuple]:
+        """ 
+            Build a query selecting `select` on frames f with three filter: Position polygon, Date range and platform type. 
+            Candidates frames are first selected with the rtree index and the bounding box of each polygon, only them are tested with ST_Contains.
+        """
 
-        # Base date filtering.
+        # Base date filtering, dates are compared as text to use index on session_date.
         q_with = f""
-        q_select = f"""SELECT {", ".join(self.__frame_header)}"""
+        q_select = f"""SELECT {select}"""
         q_from = f" FROM {self.table_name} f "
         q_join = f"""
                 JOIN version v ON f.version_doi = v.doi
                 JOIN deposit d ON v.deposit_doi = d.doi
             """
-        q_where = f" WHERE strftime('%Y-%m-%d', d.session_date) >= ? AND strftime('%Y-%m-%d', d.session_date) <= ?"
+        q_where = f" WHERE d.session_date >= ? AND d.session_date <= ?"
 
-        params = (date_range[0], date_range[1])
+        with_params, params = (), (date_range[0], date_range[1])
 
         # Platform type filtering
         if platform_type:
@@ -264,28 +315,54 @@ class FrameDAO(AbstractBaseDAO):
         # Geoposition
         if len(list_poly) != 0:
             q_with += "WITH polygons AS ("
+            q_rtree = []
             for i, polygon in enumerate(list_poly):
                 q_with += f"""
                     SELECT ST_GeomFromText(?, 4326) AS geom
                 """
-                params = (polygon.wkt, ) + params        # Parameters will not be add in the same order but it's not useful.
+                with_params = with_params + (polygon.wkt, )
                 
                 if i < len(list_poly) -1: 
                     q_with += """
                     UNION ALL
                 """
+
+                # Bounding box of the polygon in the rtree.
+                min_x, min_y, max_x, max_y = polygon.bounds
+                q_rtree.append(f"SELECT id FROM rtree_{self.table_name}_GPSPosition WHERE minx <= ? AND maxx >= ? AND miny <= ? AND maxy >= ?")
+                params = params + (max_x, min_x, max_y, min_y)
+
             q_with += f"""),
                         combined_polygon AS (
                             SELECT ST_Union(geom) AS geom FROM polygons
                         )
                         """
+            q_where += f" AND f.id IN ({' UNION '.join(q_rtree)})"
             q_where += " AND f.GPSPosition NOT NULL AND ST_Contains((SELECT geom FROM combined_polygon), f.GPSPosition) "
         
-        query = q_with + q_select + q_from + q_join + q_where
+        return q_with + q_select + q_from + q_join + q_where, with_params + params
+
+
+    def get_frame_by_date_type_position(self, list_poly: list[Polygon], date_range, platform_type) -> list[FrameDTO]:
+        """ Get frames with three filter: Position polygon, Date range and platform type. """
+        query, params = self.build_date_type_position_query(", ".join(self.__frame_header), list_poly, date_range, platform_type)
         results = self.sql_connector.execute_query(query, params)
         parsed_result = self.__parse_frame_results(results) 
         return parsed_result
     
+
+    def get_frames_table_by_date_type_position(self, list_poly: list[Polygon], date_range, platform_type) -> pl.DataFrame:
+        """ Same filter as get_frame_by_date_type_position but return a columnar table without building DTOs. """
+        query, params = self.build_date_type_position_query(", ".join(self.__frame_header), list_poly, date_range, platform_type)
+        return self.__concat_frames_tables(self.__iter_frames_tables(query + " ORDER BY f.id", params))
+    
+
+    def get_number_of_frames(self) -> int:
+        """ Return the number of frames in database. """
+        query = f""" SELECT COUNT(id) FROM {self.table_name}; """
+        return self.sql_connector.execute_query(query)[0][0]
+
+
     def get_number_images_by_platform(self) -> dict[str, int]:
         query = f"""
             SELECT COUNT(f.filename) AS "frame_count", d.platform_type
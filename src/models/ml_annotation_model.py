@@ -1,4 +1,5 @@
 from datetime import datetime
+from typing import Iterator
 from dataclasses import dataclass, field
 
 from .base_model import AbstractBaseDAO, DataStatus
@@ -32,7 +33,6 @@ class MultilabelAnnotationSessionDAO(AbstractBaseDAO):
     table_name = "multilabel_annotation_session"
 
     __ml_annotation_session: list[MultilabelAnnotationSessionDTO] = field(default_factory=list)
-    __ml_anno_ses_by_id: dict[int, MultilabelAnnotationSessionDTO] = field(default_factory=dict)
 
 
     @property
@@ -42,29 +42,31 @@ class MultilabelAnnotationSessionDAO(AbstractBaseDAO):
         return self.__ml_annotation_session
     
 
-    def get_ml_anno_ses_by_id(self, ml_anno_ses_id: int) -> MultilabelAnnotationSessionDTO:
-        """ Get multilabel annotation session by id. """
-        if ml_anno_ses_id in self.__ml_anno_ses_by_id:
-            return self.__ml_anno_ses_by_id.get(ml_anno_ses_id)
-        
-        query = f""" SELECT id, annotation_date, author_name, dataset_name 
-                     FROM {self.table_name}
-                     WHERE id = ?
-                 """
-
-        param = (ml_anno_ses_id, )
-        result = self.sql_connector.execute_query(query, param)
-        if len(result) == 0:
-            raise NameError("[ERROR] No multilabel annotation session for id.")
-        
-        id, annotation_date, author_name, dataset_name = result[0]
-        ml_anno_ses = MultilabelAnnotationSessionDTO(
+    def __parse_anno_ses_results(self, results) -> dict[int, MultilabelAnnotationSessionDTO]:
+        """ Method to centralize parse method. """
+        ml_anno_ses = {}
+        for id, annotation_date, author_name, dataset_name in results:
+            ml_anno_ses[id] = MultilabelAnnotationSessionDTO(
                 id=id,
                 annotation_date = annotation_date,
                 author_name=author_name,
                 dataset_name=dataset_name
             )
-        self.__ml_anno_ses_by_id[id] = ml_anno_ses
+        return ml_anno_ses
+
+
+    def prefetch(self, ml_anno_ses_ids: list[int]) -> dict[int, MultilabelAnnotationSessionDTO]:
+        """ Retrieve all multilabel annotation sessions not already in cache in one query. """
+        return self._prefetch(ml_anno_ses_ids, "id", "id, annotation_date, author_name, dataset_name", self.__parse_anno_ses_results)
+
+
+    def get_ml_anno_ses_by_id(self, ml_anno_ses_id: int) -> MultilabelAnnotationSessionDTO:
+        """ Get multilabel annotation session by id. """
+        ml_anno_ses = self.prefetch([ml_anno_ses_id]).get(ml_anno_ses_id)
+
+        if ml_anno_ses == None:
+            raise NameError("[ERROR] No multilabel annotation session for id.")
+        
         return ml_anno_ses
     
 
@@ -75,13 +77,9 @@ class MultilabelAnnotationSessionDAO(AbstractBaseDAO):
                  """
         results = self.sql_connector.execute_query(query)
 
-        for id, annotation_date, author_name, dataset_name in results:
-            self.__ml_annotation_session.append(MultilabelAnnotationSessionDTO(
-                id=id,
-                annotation_date = annotation_date,
-                author_name=author_name,
-                dataset_name=dataset_name
-            ))
+        for id, ml_anno_ses in self.__parse_anno_ses_results(results).items():
+            self.identity_map.put(id, ml_anno_ses)
+            self.__ml_annotation_session.append(ml_anno_ses)
     
 
     def get_specific_annotation_session(self, anno_ses: MultilabelAnnotationSessionDTO) -> DataStatus | MultilabelAnnotationSessionDTO:
@@ -153,19 +151,28 @@ class MultilabelAnnotationDAO(AbstractBaseDAO):
                      FROM {self.table_name}
                  """
         results = self.sql_connector.execute_query(query)
+        self.__annotations = self.__parse_annotation_results(results)
 
-        for id, value, frame_id, ml_label_id, ml_annotation_session_id in results:
-            label = self.__ml_labelDAO.get_label_by_id(ml_label_id)
-            frame = self.__frameDAO.get_frame_by_id(frame_id)
-            ml_anno_ses = self.__ml_anno_sesDAO.get_ml_anno_ses_by_id(ml_annotation_session_id)
 
-            self.__annotations.append(MultilabelAnnotationDTO(
+    def __parse_annotation_results(self, results) -> list[MultilabelAnnotationDTO]:
+        """ 
+            Method to centralize parse method, labels, frames and annotation sessions are retrieve in one query each.
+            Rows are (id, value, frame_id, ml_label_id, ml_annotation_session_id).
+        """
+        labels = self.__ml_labelDAO.prefetch([ml_label_id for _, _, _, ml_label_id, _ in results])
+        frames = self.__frameDAO.prefetch([frame_id for _, _, frame_id, _, _ in results])
+        ml_anno_ses = self.__ml_anno_sesDAO.prefetch([ml_annotation_session_id for *_, ml_annotation_session_id in results])
+
+        annotations = []
+        for id, value, frame_id, ml_label_id, ml_annotation_session_id in results:
+            annotations.append(MultilabelAnnotationDTO(
                 id=id,
                 value=value,
-                frame_id=frame,
-                ml_label=label,
-                ml_annotation_session=ml_anno_ses
-            )) 
+                frame=frames[frame_id],
+                ml_label=labels[ml_label_id],
+                ml_annotation_session=ml_anno_ses[ml_annotation_session_id]
+            ))
+        return annotations
     
 
     def insert(self, annotations: MultilabelAnnotationDTO | list[MultilabelAnnotationDTO]) -> None:
@@ -196,19 +203,8 @@ class MultilabelAnnotationDAO(AbstractBaseDAO):
         params = (anno_ses.id, )
         results = self.sql_connector.execute_query(query, params)
 
-        annotations = []
-        for id, value, frame_id, ml_label_id in results:
-            label = self.__ml_labelDAO.get_label_by_id(ml_label_id)
-            frame = self.__frameDAO.get_frame_by_id(frame_id)
-
-            annotations.append(MultilabelAnnotationDTO(
-                id=id,
-                value=value,
-                frame=frame,
-                ml_label=label,
-                ml_annotation_session=anno_ses
-            )) 
-        return annotations
+        self.__ml_anno_sesDAO.identity_map.put(anno_ses.id, anno_ses)
+        return self.__parse_annotation_results([(id, value, frame_id, ml_label_id, anno_ses.id) for id, value, frame_id, ml_label_id in results])
     
 
     def get_latest_annotations(self) -> list[MultilabelAnnotationDTO]:
@@ -220,18 +216,23 @@ class MultilabelAnnotationDAO(AbstractBaseDAO):
                  """
 
         results = self.sql_connector.execute_query(query)
-
-        annotations = []
-        for id, value, frame_id, ml_label_id, ml_annotation_session_id, date in results:
-            label = self.__ml_labelDAO.get_label_by_id(ml_label_id)
-            frame = self.__frameDAO.get_frame_by_id(frame_id)
-            ml_anno_ses = self.__ml_anno_sesDAO.get_ml_anno_ses_by_id(ml_annotation_session_id)
-
-            annotations.append(MultilabelAnnotationDTO(
-                id=id,
-                value=value,
-                frame=frame,
-                ml_label=label,
-                ml_annotation_session=ml_anno_ses
-            )) 
-        return annotations
\ No newline at end of file
+        return self.__parse_annotation_results([row[:5] for row in results])
+
+
+    def iter_latest_annotations_by_frame(self) -> Iterator[list[tuple]]:
+        """ 
+            Get latest annotations with the frame metadata by batch without building DTOs. 
+            Rows are ordered by frame filename and are (FileName, frame_doi, relative_file_path, annotation_date, label_name, value)
+        """
+        query = """ SELECT f.filename, f.version_doi, f.relative_file_path, latest.annotation_date, ml.name, latest.value
+                    FROM (
+                        SELECT ma.value, ma.frame_id, ma.ml_label_id, MAX(mas.annotation_date) AS annotation_date
+                        FROM multilabel_annotation ma
+                        JOIN multilabel_annotation_session mas ON mas.id = ma.ml_annotation_session_id
+                        GROUP BY ma.frame_id, ma.ml_label_id
+                    ) latest
+                    JOIN frame f ON f.id = latest.frame_id
+                    JOIN multilabel_label ml ON ml.id = latest.ml_label_id
+                    ORDER BY f.filename, f.id, latest.ml_label_id;
+                 """
+        return self.sql_connector.execute_query_by_batch(query)
\ No newline at end of file
@@ -22,8 +22,7 @@ class MultilabelLabelDAO(AbstractBaseDAO):
     table_name = "multilabel_label"
 
     __labels: list[MultilabelLabelDTO] = field(default_factory=list)
-    __labels_by_id: dict[int, MultilabelLabelDTO] = field(default_factory=dict)
-    __labels_by_name: dict[str, int] = field(default_factory=dict)
+    __labels_by_name: dict[str, MultilabelLabelDTO] = field(default_factory=dict)
 
 
     @property
@@ -33,22 +32,11 @@ class MultilabelLabelDAO(AbstractBaseDAO):
         return self.__labels
     
 
-    def get_label_by_id(self, label_id: int) -> MultilabelLabelDTO:
-        """ Get label with specific id. """
-        if label_id in self.__labels_by_id:
-            return self.__labels_by_id.get(label_id)
-
-        query = f""" SELECT id, name, creation_date, description, id_gbif, code_gcrmn
-                     FROM {self.table_name}
-                     WHERE id = ?
-                 """
-        params = (label_id, )
-        result = self.sql_connector.execute_query(query, params)
-        if len(result) == 0:
-            raise NameError("[ERROR] No multilabel label for this id.")
-        
-        id, name, creation_date, description, id_gbif, code_gcrmn = result[0]
-        label = MultilabelLabelDTO(
+    def __parse_label_results(self, results) -> dict[int, MultilabelLabelDTO]:
+        """ Method to centralize parse method. """
+        labels = {}
+        for id, name, creation_date, description, id_gbif, code_gcrmn in results:
+            labels[id] = MultilabelLabelDTO(
                 id=id,
                 name=name,
                 creation_date=creation_date,
@@ -56,7 +44,21 @@ class MultilabelLabelDAO(AbstractBaseDAO):
                 id_gbif=id_gbif,
                 code_gcrmn=code_gcrmn
             )
-        self.__labels_by_id[id] = label
+        return labels
+
+
+    def prefetch(self, label_ids: list[int]) -> dict[int, MultilabelLabelDTO]:
+        """ Retrieve all labels not already in cache in one query. """
+        return self._prefetch(label_ids, "id", "id, name, creation_date, description, id_gbif, code_gcrmn", self.__parse_label_results)
+
+
+    def get_label_by_id(self, label_id: int) -> MultilabelLabelDTO:
+        """ Get label with specific id. """
+        label = self.prefetch([label_id]).get(label_id)
+
+        if label == None:
+            raise NameError("[ERROR] No multilabel label for this id.")
+        
         return label
     
 
@@ -78,16 +80,9 @@ class MultilabelLabelDAO(AbstractBaseDAO):
         if len(result) > 1:
             raise NameError("[ERROR] Too much multilabel label name for this name.")
         
-        id, name, creation_date, description, id_gbif, code_gcrmn = result[0]
-        label = MultilabelLabelDTO(
-                id=id,
-                name=name,
-                creation_date=creation_date,
-                description=description,
-                id_gbif=id_gbif,
-                code_gcrmn=code_gcrmn
-            )
-        self.__labels_by_name[name] = label
+        label = list(self.__parse_label_results(result).values())[0]
+        self.identity_map.put(label.id, label)
+        self.__labels_by_name[label.name] = label
         return label
 
 
@@ -98,13 +93,6 @@ class MultilabelLabelDAO(AbstractBaseDAO):
                  """
         results = self.sql_connector.execute_query(query)
 
-        for id, name, creation_date, description, id_gbif, code_gcrmn in results:
-            self.__labels.append(MultilabelLabelDTO(
-                id=id,
-                name=name,
-                creation_date=creation_date,
-                description=description,
-                id_gbif=id_gbif,
-                code_gcrmn=code_gcrmn
-            ))
-    
\ No newline at end of file
+        for id, label in self.__parse_label_results(results).items():
+            self.identity_map.put(id, label)
+            self.__labels.append(label)
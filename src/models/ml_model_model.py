@@ -32,7 +32,6 @@ class MultilabelModelDAO(AbstractBaseDAO):
     table_name = "multilabel_model"
 
     __models: list[MultilabelModelDTO] = field(default_factory=list)
-    __models_by_id: dict[int, MultilabelModelDTO] = field(default_factory=dict)
     __last_model: MultilabelModelDTO = field(default=None)
 
 
@@ -51,30 +50,32 @@ class MultilabelModelDAO(AbstractBaseDAO):
         return self.__last_model
     
 
-    def get_model_by_id(self, model_id: int) -> MultilabelModelDTO:
-        """ Get model with specific id. """
-        if model_id in self.__models_by_id:
-            return self.__models_by_id.get(model_id)
-
-        query = f""" SELECT id, name, link, doi, creation_date 
-                     FROM {self.table_name}
-                     WHERE id = ?
-                 """
-        params = (model_id, )
-        result = self.sql_connector.execute_query(query, params)
-
-        if len(result) == 0:
-            raise NameError("[WARNING] No multilabel model found for this id.")
-        
-        id, name, link, doi, creation_date = result[0]
-        model = MultilabelModelDTO(
+    def __parse_model_results(self, results) -> dict[int, MultilabelModelDTO]:
+        """ Method to centralize parse method. """
+        models = {}
+        for id, name, link, doi, creation_date in results:
+            models[id] = MultilabelModelDTO(
                 id=id,
                 name=name,
                 creation_date=creation_date,
                 doi=doi,
                 link=link
-        )
-        self.__models_by_id[id] = model
+            )
+        return models
+
+
+    def prefetch(self, model_ids: list[int]) -> dict[int, MultilabelModelDTO]:
+        """ Retrieve all models not already in cache in one query. """
+        return self._prefetch(model_ids, "id", "id, name, link, doi, creation_date", self.__parse_model_results)
+
+
+    def get_model_by_id(self, model_id: int) -> MultilabelModelDTO:
+        """ Get model with specific id. """
+        model = self.prefetch([model_id]).get(model_id)
+
+        if model == None:
+            raise NameError("[WARNING] No multilabel model found for this id.")
+        
         return model
     
 
@@ -108,21 +109,15 @@ class MultilabelModelDAO(AbstractBaseDAO):
                  """
         results = self.sql_connector.execute_query(query)
 
-        for id, name, link, doi, creation_date in results:
-            self.__models.append(MultilabelModelDTO(
-                id=id,
-                name=name,
-                creation_date=creation_date,
-                doi=doi,
-                link=link
-            ))
+        for id, model in self.__parse_model_results(results).items():
+            self.identity_map.put(id, model)
+            self.__models.append(model)
 
 @dataclass
 class MultilabelClassDAO(AbstractBaseDAO):
     table_name = "multilabel_class"
 
     __classes: list[MultilabelClassDTO] = field(default_factory=list)
-    __classes_by_id: dict[int, MultilabelClassDTO] = field(default_factory=dict)
     __classes_by_name_and_model: dict[str, MultilabelClassDTO] = field(default_factory=dict)
 
     __ml_modelDAO = MultilabelModelDAO()
@@ -136,35 +131,35 @@ class MultilabelClassDAO(AbstractBaseDAO):
         return self.__classes
     
 
+    def __parse_class_results(self, results) -> dict[int, MultilabelClassDTO]:
+        """ Method to centralize parse method, models and labels are retrieve in one query. """
+        ml_models = self.__ml_modelDAO.prefetch([ml_model_id for *_, ml_model_id in results])
+        ml_labels = self.__ml_labelDAO.prefetch([ml_label_id for _, _, _, ml_label_id, _ in results])
+
+        ml_classes = {}
+        for id, name, threshold, ml_label_id, ml_model_id in results:
+            ml_classes[id] = MultilabelClassDTO(
+                id=id,
+                name=name,
+                ml_label=ml_labels[ml_label_id],
+                ml_model=ml_models[ml_model_id],
+                threshold=threshold
+            )
+        return ml_classes
+
+
+    def prefetch(self, class_ids: list[int]) -> dict[int, MultilabelClassDTO]:
+        """ Retrieve all classes not already in cache in one query. """
+        return self._prefetch(class_ids, "id", "id, name, threshold, ml_label_id, ml_model_id", self.__parse_class_results)
+
+
     def get_class_by_id(self, class_id: int) -> MultilabelClassDTO:
         """ Get class by id. """
-        if class_id in self.__classes_by_id:
-            return self.__classes_by_id.get(class_id)
-        
-        query = f""" SELECT id, name, threshold, ml_label_id, ml_model_id 
-                     FROM {self.table_name}
-                     WHERE id = ?
-                 """
-        params = (class_id, )
-        result = self.sql_connector.execute_query(query, params)
+        ml_class = self.prefetch([class_id]).get(class_id)
 
-        if len(result) == 0:
+        if ml_class == None:
             raise NameError("[ERROR] No multilabel class found for this id.")
         
-        id, name, threshold, ml_label_id, ml_model_id = result[0]
-
-        ml_model = self.__ml_modelDAO.get_model_by_id(ml_model_id)
-        ml_label = self.__ml_labelDAO.get_label_by_id(ml_label_id) 
-
-        ml_class = MultilabelClassDTO(
-            id=id,
-            name=name,
-            ml_label=ml_label,
-            ml_model=ml_model,
-            threshold=threshold
-        )
-
-        self.__classes_by_id[id] = ml_class
         return ml_class
     
 
@@ -207,15 +202,14 @@ class MultilabelClassDAO(AbstractBaseDAO):
                  """
         params = (ml_model.id, )
         results = self.sql_connector.execute_query(query, params)
+        ml_labels = self.__ml_labelDAO.prefetch([ml_label_id for *_, ml_label_id in results])
+
         ml_class = []
         for id, name, threshold, ml_label_id in results:
-
-            ml_label = self.__ml_labelDAO.get_label_by_id(ml_label_id) 
-
             ml_class.append(MultilabelClassDTO(
                 id=id,
                 name=name,
-                ml_label=ml_label,
+                ml_label=ml_labels[ml_label_id],
                 ml_model=ml_model,
                 threshold=threshold
             ))
@@ -229,18 +223,9 @@ class MultilabelClassDAO(AbstractBaseDAO):
                  """
         results = self.sql_connector.execute_query(query)
 
-        for id, name, threshold, ml_label_id, ml_model_id in results:
-            
-            ml_model = self.__ml_modelDAO.get_model_by_id(ml_model_id)
-            ml_label = self.__ml_labelDAO.get_label_by_id(ml_label_id) 
-
-            self.__classes.append(MultilabelClassDTO(
-                id=id,
-                name=name,
-                ml_label=ml_label,
-                ml_model=ml_model,
-                threshold=threshold
-            ))
+        for id, ml_class in self.__parse_class_results(results).items():
+            self.identity_map.put(id, ml_class)
+            self.__classes.append(ml_class)
     
     def get_first_n_class_deposit(self, model: MultilabelModelDTO, deposit: DepositDTO, n_class: int) -> list[tuple]:
         """ Return the n class with the most occurence in a session """
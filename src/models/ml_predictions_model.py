@@ -1,3 +1,5 @@
+import polars as pl
+from typing import Iterator
 from dataclasses import dataclass, field
 
 from .base_model import AbstractBaseDAO
@@ -38,19 +40,31 @@ class MultilabelPredictionDAO(AbstractBaseDAO):
                      FROM {self.table_name}
                  """
         results = self.sql_connector.execute_query(query)
+        self.__predictions = self.__parse_prediction_results(results)
 
-        for id, score, version_doi, frame_id, ml_class_id in results:
-            version = self.__versionDAO.get_version_by_doi(version_doi)
-            frame = self.__frameDAO.get_frame_by_id(frame_id)
-            ml_class = self.__ml_classDAO.get_class_by_id(ml_class_id)
 
-            self.__predictions.append(MultilabelPredictionDTO(
+    def __parse_prediction_results(self, results, frame: FrameDTO | None = None) -> list[MultilabelPredictionDTO]:
+        """ 
+            Method to centralize parse method, versions, frames and classes are retrieve in one query each.
+            Rows are (id, score, version_doi, frame_id, ml_class_id) or (id, score, version_doi, ml_class_id) if frame is provided.
+        """
+        if frame != None:
+            results = [(id, score, version_doi, frame.id, ml_class_id) for id, score, version_doi, ml_class_id in results]
+
+        versions = self.__versionDAO.prefetch([version_doi for _, _, version_doi, _, _ in results])
+        frames = {frame.id: frame} if frame != None else self.__frameDAO.prefetch([frame_id for _, _, _, frame_id, _ in results])
+        ml_classes = self.__ml_classDAO.prefetch([ml_class_id for *_, ml_class_id in results])
+
+        predictions = []
+        for id, score, version_doi, frame_id, ml_class_id in results:
+            predictions.append(MultilabelPredictionDTO(
                 id=id,
                 score=score,
-                version=version,
-                frame=frame,
-                ml_class=ml_class
+                version=versions[version_doi],
+                frame=frames[frame_id],
+                ml_class=ml_classes[ml_class_id]
             ))
+        return predictions
     
 
     def get_pred_by_frame_version(self, p_ver: VersionDTO, frame: FrameDTO) -> list[MultilabelPredictionDTO]:
@@ -61,22 +75,34 @@ class MultilabelPredictionDAO(AbstractBaseDAO):
                  """
         params = (p_ver.doi, frame.id, )
         results = self.sql_connector.execute_query(query, params)
+        return self.__parse_prediction_results(results)
 
-        predictions = []
-        for id, score, version_doi, frame_id, ml_class_id in results:
-            version = self.__versionDAO.get_version_by_doi(version_doi)
-            frame = self.__frameDAO.get_frame_by_id(frame_id)
-            ml_class = self.__ml_classDAO.get_class_by_id(ml_class_id)
 
-            predictions.append(MultilabelPredictionDTO(
-                id=id,
-                score=score,
-                version=version,
-                frame=frame,
-                ml_class=ml_class
-            ))
-        return predictions
-    
+    def get_nb_predictions_by_frame_for_version(self, p_ver: VersionDTO) -> dict[int, int]:
+        """ Get a map frame_id: number of predictions already in database for a prediction version. """
+        query = f""" SELECT frame_id, COUNT(id)
+                     FROM {self.table_name}
+                     WHERE version_doi = ?
+                     GROUP BY frame_id;
+                 """
+        params = (p_ver.doi, )
+        results = self.sql_connector.execute_query(query, params)
+
+        return {frame_id: nb_preds for frame_id, nb_preds in results}
+
+
+    def bulk_insert(self, values: list[tuple[float, str, int, int]]) -> None:
+        """ Insert raw (score, version_doi, frame_id, ml_class_id) rows without building DTOs. """
+        if len(values) == 0:
+            print("[WARNING] Cannot insert preds in database, we don't have preds.")
+            return
+
+        query = f""" INSERT INTO {self.table_name}
+                     (score, version_doi, frame_id, ml_class_id)
+                     VALUES (?,?,?,?)
+                 """
+        self.sql_connector.execute_query(query, values)
+
 
     def insert(self, preds: MultilabelPredictionDTO | list[MultilabelPredictionDTO]) -> None:
         """ Insert one or more predictions."""
@@ -109,22 +135,27 @@ class MultilabelPredictionDAO(AbstractBaseDAO):
                  """
         params = (frame.id, ml_model.id, )
         results = self.sql_connector.execute_query(query, params)
+        return self.__parse_prediction_results(results, frame)
+    
 
-        predictions = []
+    def iter_thresholded_predictions_by_model(self, ml_model: MultilabelModelDTO) -> Iterator[list[tuple]]:
+        """ 
+            Get all predictions of a model with the frame metadata by batch, threshold is apply in SQL.
+            Rows are ordered by frame and are (frame_id, FileName, frame_doi, GPSLatitude, GPSLongitude, GPSAltitude, 
+            GPSRoll, GPSPitch, GPSTrack, GPSFix, prediction_doi, class_name, score >= threshold)
+        """
+        query = f""" SELECT f.id, f.filename, f.version_doi, ST_Y(f.GPSPosition), ST_X(f.GPSPosition),
+                            f.GPSAltitude, f.GPSRoll, f.GPSPitch, f.GPSTrack, f.GPSFix,
+                            mlp.version_doi, mlc.name, mlp.score >= mlc.threshold
+                     FROM {self.table_name} mlp
+                     JOIN multilabel_class mlc ON mlc.id = mlp.ml_class_id
+                     JOIN frame f ON f.id = mlp.frame_id
+                     WHERE mlc.ml_model_id = ?
+                     ORDER BY f.id;
+                 """
+        params = (ml_model.id, )
+        return self.sql_connector.execute_query_by_batch(query, params)
 
-        for id, score, version_doi, ml_class_id in results:
-            version = self.__versionDAO.get_version_by_doi(version_doi)
-            ml_class = self.__ml_classDAO.get_class_by_id(ml_class_id)
-            
-            predictions.append(MultilabelPredictionDTO(
-                id=id,
-                score=score,
-                version=version,
-                frame=frame,
-                ml_class=ml_class
-            ))
-        return predictions
-    
 
     def get_predictions_frame_and_class(self, frame: FrameDTO, class_ids: list[int]) -> list[MultilabelPredictionDTO]:
         """ Get predictions by frames and list of class_id """
@@ -134,18 +165,24 @@ class MultilabelPredictionDAO(AbstractBaseDAO):
                  """
         params = (frame.id, ) + tuple(class_ids)
         results = self.sql_connector.execute_query(query, params)
+        return self.__parse_prediction_results(results, frame)
 
-        predictions = []
 
-        for id, score, version_doi, ml_class_id in results:
-            version = self.__versionDAO.get_version_by_doi(version_doi)
-            ml_class = self.__ml_classDAO.get_class_by_id(ml_class_id)
-            
-            predictions.append(MultilabelPredictionDTO(
-                id=id,
-                score=score,
-                version=version,
-                frame=frame,
-                ml_class=ml_class
-            ))
-        return predictions
+    def get_predictions_table_for_frames(self, frame_ids_query: str, frame_ids_params: tuple, class_ids: list[int]) -> pl.DataFrame:
+        """ 
+            Get predictions of some classes for all frames selected by frame_ids_query (a query returning frame ids) in one query.
+            Return a long table with frame_id, prediction_doi, ml_class_id, score, threshold columns.
+        """
+        schema = {"frame_id": pl.Int64, "prediction_doi": pl.String, "ml_class_id": pl.Int64, "score": pl.Float64, "threshold": pl.Float64}
+        if len(class_ids) == 0: return pl.DataFrame(schema=schema)
+
+        query = f""" SELECT mlp.frame_id, mlp.version_doi, mlp.ml_class_id, mlp.score, mlc.threshold
+                     FROM {self.table_name} mlp
+                     JOIN multilabel_class mlc ON mlc.id = mlp.ml_class_id
+                     WHERE mlp.ml_class_id IN ({', '.join(['?' for _ in class_ids])})
+                     AND mlp.frame_id IN ({frame_ids_query})
+                     ORDER BY mlp.id;
+                 """
+        params = tuple(class_ids) + frame_ids_params
+        results = self.sql_connector.execute_query(query, params)
+        return pl.DataFrame(results, schema=schema, orient="row")
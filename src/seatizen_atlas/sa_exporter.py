@@ -13,6 +13,8 @@ from ..models.ml_predictions_model import MultilabelPredictionDAO
 from ..models.ml_model_model import MultilabelModelDAO, MultilabelClassDAO
 from ..models.ml_annotation_model import MultilabelAnnotationDAO, MultilabelAnnotationSessionDAO
 
+from .sa_stream_writer import CsvParquetStreamWriter
+
 class AtlasExport:
 
     def __init__(self, seatizen_atlas_gpkg: Path, seatizen_folder_path: Path) -> None:
@@ -38,9 +40,6 @@ class AtlasExport:
 
     def session_doi_csv(self) -> None:
         """ Generate a csv file to map doi and session_name. """
-        session_doi_file = Path(self.seatizen_folder_path, "session_doi.csv")
-        print(f"\n-- Generate {session_doi_file}")
-       
         list_deposit_data = []
         deposit_header = {
             "session_name": pl.String, "session_doi": pl.String, "place": pl.String, 
@@ -56,22 +55,13 @@ class AtlasExport:
                 d.have_raw_data, 
                 d.have_processed_data
             ])
-                
-        df_deposits = pl.DataFrame(list_deposit_data, schema=deposit_header, orient="row")
-        df_deposits.write_csv(session_doi_file)
-
-        session_doi_file_parquet = Path(self.seatizen_folder_path, "session_doi.parquet")
-        print(f"\n-- Generate {session_doi_file_parquet}")
-        df_deposits.write_parquet(session_doi_file_parquet)
-
+        
+        with self.__build_writer("session_doi", deposit_header) as writer:
+            writer.write(pl.DataFrame(list_deposit_data, schema=deposit_header, orient="row"))
 
 
     def metadata_images_csv(self) -> None:
         """ Generate a csv file with all information about frames. """
-        metadata_images_file = Path(self.seatizen_folder_path, "metadata_images.csv")
-        print(f"\n-- Generate {metadata_images_file}")
-
-        data = []
         df_header = {
             "OriginalFileName": pl.String,
             "FileName": pl.String,
@@ -87,43 +77,25 @@ class AtlasExport:
             "GPSFix": pl.Float64
         }
 
-        for frame in tqdm(self.frames_manager.frames):
-            data.append([
-                frame.original_filename,
-                frame.filename,
-                frame.relative_path,
-                f"https://doi.org/10.5281/zenodo.{frame.version.doi}",
-                frame.gps_latitude,
-                frame.gps_longitude,
-                frame.gps_altitude,
-                frame.gps_roll,
-                frame.gps_pitch,
-                frame.gps_track,
-                frame.gps_datetime,
-                frame.gps_fix
-            ])
+        with self.__build_writer("metadata_images", df_header) as writer:
+            for df_frames in tqdm(self.frames_manager.iter_frames_tables()):
+                writer.write(df_frames.with_columns(
+                    pl.format("https://doi.org/10.5281/zenodo.{}", "version_doi").alias("frames_doi")
+                ).select(list(df_header)).cast(df_header))
         
-        if len(data) == 0:
+        if writer.nb_rows == 0:
             print("[WARNING] No data to export.")
-            return
-        
-        df_data = pl.DataFrame(data, schema=df_header, orient="row")
-        df_data.write_csv(metadata_images_file)
-
-        metadata_images_file_parquet = Path(self.seatizen_folder_path, "metadata_images.parquet")
-        print(f"\n-- Generate {metadata_images_file_parquet}")
-        df_data.write_parquet(metadata_images_file_parquet)
 
 
     def metadata_multilabel_predictions_csv(self) -> None:
-        ml_predictions_file = Path(self.seatizen_folder_path, "metadata_multilabel_predictions.csv")
-        print(f"\n-- Generate {ml_predictions_file} with last model add in database.")
+        print(f"\n-- Generate metadata_multilabel_predictions with last model add in database.")
         
         last_model = self.ml_model_manager.last_model
         model_class = self.ml_class_manager.get_all_class_for_ml_model(last_model)
 
         class_name = {a.name: pl.Float64 for a in model_class}
-        df_header = {
+        frame_header = {
+            "frame_id": pl.Int64,
             "FileName": pl.String,
             "frames_doi": pl.String,
             "GPSLatitude": pl.Float64,
@@ -134,84 +106,84 @@ class AtlasExport:
             "GPSTrack": pl.Float64,
             "GPSFix": pl.UInt8,
             "prediction_doi": pl.String
-        } | class_name
-        
-        data = []
-        cpt_predictions_not_found = 0
-        for frame in tqdm(self.frames_manager.frames): # Can be very long but normally when we have export metadata_images.csv we already retrieve all frames.
-            
-            predictions = self.ml_prediciton_manager.get_predictions_for_specific_model_and_frame_name(frame, last_model)
-            if predictions == None or len(predictions) == 0:
-                cpt_predictions_not_found += 1
-                continue
-
-            pred_doi = predictions[0].version.doi
+        }
+        long_header = frame_header | {"class_name": pl.String, "value": pl.Float64}
+
+        # Rows are ordered by frame, so we keep the rows of the last frame of a batch with the next batch.
+        df_remaining = pl.DataFrame(schema=long_header)
+        output_header = {c: t for c, t in frame_header.items() if c != "frame_id"} | class_name
+        with self.__build_writer("metadata_multilabel_predictions", output_header) as writer:
+            for rows in tqdm(self.ml_prediciton_manager.iter_thresholded_predictions_by_model(last_model)):
+                df_long = pl.concat([df_remaining, pl.DataFrame(rows, schema=long_header, orient="row")])
+                
+                last_frame_id = df_long["frame_id"][-1]
+                df_remaining = df_long.filter(pl.col("frame_id") == last_frame_id)
+                writer.write(self.__pivot_predictions(df_long.filter(pl.col("frame_id") != last_frame_id), frame_header, class_name))
             
-            # Get predictions for each class in good order.
-            predictions_to_add = {cls_name: None for cls_name in class_name}
-            for pred in predictions:
-                if pred.ml_class.name in predictions_to_add:
-                    predictions_to_add[pred.ml_class.name] = bool(pred.score >= pred.ml_class.threshold)
-
-
-            data.append([
-                frame.filename,
-                f"https://doi.org/10.5281/zenodo.{frame.version.doi}",
-                frame.gps_latitude,
-                frame.gps_longitude,
-                frame.gps_altitude,
-                frame.gps_roll,
-                frame.gps_pitch,
-                frame.gps_track,
-                frame.gps_fix,
-                f"https://doi.org/10.5281/zenodo.{pred_doi}"
-            ]+[s for s in predictions_to_add.values()])
+            writer.write(self.__pivot_predictions(df_remaining, frame_header, class_name))
         
-        if len(data) == 0:
+        if writer.nb_rows == 0:
             print("[WARNING] No data to export.")
             return
-        
-        print(f"On {len(self.frames_manager.frames)} images, we don't found predictions for {cpt_predictions_not_found} images.")
 
-        df_data = pl.DataFrame(data, schema=df_header, orient="row")
-        df_data.write_csv(ml_predictions_file)
+        nb_frames = self.frames_manager.get_number_of_frames()
+        print(f"On {nb_frames} images, we don't found predictions for {nb_frames - writer.nb_rows} images.")
+
 
-        ml_predictions_file_parquet = Path(self.seatizen_folder_path, "metadata_multilabel_predictions.parquet")
-        print(f"\n-- Generate {ml_predictions_file_parquet} with last model add in database.")
-        df_data.write_parquet(ml_predictions_file_parquet)
+    def __pivot_predictions(self, df_long: pl.DataFrame, frame_header: dict, class_name: dict) -> pl.DataFrame:
+        """ Pivot to get one column by class and keep the first prediction doi found for each frame. """
+        if len(df_long) == 0: return pl.DataFrame()
+
+        df_frames = df_long.select(list(frame_header)).unique(subset="frame_id", keep="first", maintain_order=True)
+        df_classes = df_long.pivot(on="class_name", index="frame_id", values="value", aggregate_function="first")
+
+        return df_frames.join(df_classes, on="frame_id", how="left").with_columns(
+            pl.format("https://doi.org/10.5281/zenodo.{}", "frames_doi").alias("frames_doi"),
+            pl.format("https://doi.org/10.5281/zenodo.{}", "prediction_doi").alias("prediction_doi"),
+        ).select(
+            [pl.col(c) for c in frame_header if c != "frame_id"] + 
+            [pl.col(c).cast(pl.Float64) if c in df_classes.columns else pl.lit(None, dtype=pl.Float64).alias(c) for c in class_name]
+        )
 
 
     def metadata_multilabel_annotation_csv(self) -> None:
-        metadata_annotation_file = Path(self.seatizen_folder_path, "metadata_multilabel_annotation.csv")
-        print(f"\n-- Generate {metadata_annotation_file}")
-
-        all_labels_schema = {"FileName": pl.String, "frame_doi": pl.String, "relative_file_path": pl.String, "annotation_date": pl.String} | \
-                {l.name: pl.Int8 for l in self.ml_label_manager.labels}
-
-        data = {}
-        for annotation in self.ml_annotation_manager.get_latest_annotations():
-            frame_name = annotation.frame.filename
-            annotation_date = annotation.ml_annotation_session.annotation_date
-
-            if frame_name not in data:
-                data[frame_name] = {
-                    "FileName": frame_name,
-                    "annotation_date": annotation_date,
-                    "frame_doi": annotation.frame.version.doi,
-                    "relative_file_path": annotation.frame.relative_path
-                } | {l.name: -1.0 for l in self.ml_label_manager.labels}
-            
-            data[frame_name][annotation.ml_label.name] = int(annotation.value)
+        frame_header = {"FileName": pl.String, "frame_doi": pl.String, "relative_file_path": pl.String, "annotation_date": pl.String}
+        label_name = {l.name: pl.Int8 for l in self.ml_label_manager.labels}
+        long_header = frame_header | {"label_name": pl.String, "value": pl.Int8}
+
+        # Rows are ordered by frame filename, so we keep the rows of the last frame of a batch with the next batch.
+        df_remaining = pl.DataFrame(schema=long_header)
+        with self.__build_writer("metadata_multilabel_annotation", frame_header | label_name) as writer:
+            for rows in tqdm(self.ml_annotation_manager.iter_latest_annotations_by_frame()):
+                df_long = pl.concat([df_remaining, pl.DataFrame(rows, schema=long_header, orient="row")])
+
+                last_frame_name = df_long["FileName"][-1]
+                df_remaining = df_long.filter(pl.col("FileName") == last_frame_name)
+                writer.write(self.__pivot_annotations(df_long.filter(pl.col("FileName") != last_frame_name), frame_header, label_name))
+
+            writer.write(self.__pivot_annotations(df_remaining, frame_header, label_name))
+
+
+    def __pivot_annotations(self, df_long: pl.DataFrame, frame_header: dict, label_name: dict) -> pl.DataFrame:
+        """ Pivot to get one column by label, frame metadata come from the first annotation and missing labels are -1. """
+        if len(df_long) == 0: return pl.DataFrame()
+
+        df_frames = df_long.select(list(frame_header)).unique(subset="FileName", keep="first", maintain_order=True)
+        df_labels = df_long.pivot(on="label_name", index="FileName", values="value", aggregate_function="last")
 
-        # Convert the list of dictionaries to a Polars DataFrame
-        df = pl.DataFrame(list(data.values()), schema=all_labels_schema)
+        return df_frames.join(df_labels, on="FileName", how="left").select(
+            [pl.col(c) for c in frame_header] + 
+            [(pl.col(c) if c in df_labels.columns else pl.lit(None)).fill_null(-1).cast(pl.Int8).alias(c) for c in label_name]
+        )
 
-        # Write the DataFrame to a CSV file
-        df.write_csv(metadata_annotation_file)
 
-        metadata_annotation_file_parquet = Path(self.seatizen_folder_path, "metadata_multilabel_annotation.parquet")
-        print(f"\n-- Generate {metadata_annotation_file_parquet}")
-        df.write_parquet(metadata_annotation_file_parquet)
+    def __build_writer(self, filename: str, schema: dict | None = None) -> CsvParquetStreamWriter:
+        """ Return a writer to produce filename.csv and filename.parquet in seatizen folder. """
+        return CsvParquetStreamWriter(
+            Path(self.seatizen_folder_path, f"{filename}.csv"), 
+            Path(self.seatizen_folder_path, f"{filename}.parquet"),
+            schema
+        )
 
 
     def darwincore_annotation_csv(self) -> None:
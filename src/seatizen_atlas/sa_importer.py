@@ -1,15 +1,16 @@
+import shapely
+import numpy as np
 import pandas as pd
 from tqdm import tqdm
-from dateutil import tz
 from pathlib import Path
-from datetime import datetime, timedelta
+from datetime import datetime
 
-from ..models.base_model import DataStatus
-from ..models.frame_model import FrameDAO, FrameDTO
+from ..models.base_model import AbstractBaseDAO, DataStatus
+from ..models.frame_model import FrameDAO
 from ..models.ml_label_model import MultilabelLabelDAO
 from ..models.ml_model_model import MultilabelModelDAO, MultilabelClassDAO
 from ..models.deposit_model import DepositDAO, VersionDAO, DepositDTO, VersionDTO, DepositLinestringDAO, DepositLinestringDTO
-from ..models.ml_predictions_model import MultilabelPredictionDAO, MultilabelPredictionDTO
+from ..models.ml_predictions_model import MultilabelPredictionDAO
 from ..models.ml_annotation_model import MultilabelAnnotationDAO, MultilabelAnnotationSessionDAO, MultilabelAnnotationSessionDTO, MultilabelAnnotationDTO
 
 from ..sql_connector.sc_connector import SQLiteConnector
@@ -21,7 +22,7 @@ from ..utils.constants import TMP_PATH, MULTILABEL_MODEL_NAME
 from ..seatizen_session.manager.ssm_base_manager import BaseSessionManager
 from ..seatizen_session.manager.ssm_factory_manager import FactorySessionManager
 
-from .sa_tools import load_and_build_parser_old_new_multilabel_class
+from .sa_tools import load_and_build_parser_old_new_multilabel_class, build_frames_datetime
 
 class AtlasImport:
 
@@ -55,12 +56,10 @@ class AtlasImport:
         if len(versions) == 0:
             raise NameError("No associated version on zenodo.")
 
-        # Get zip size for frames and predictions.
+        # Get zip size for frames and predictions without writing archives in temp folder.
         folders_to_compare = ["PROCESSED_DATA/IA", "METADATA"]
         session = FactorySessionManager.get_session_manager(session_path, TMP_PATH)
-        session.prepare_processed_data(folders_to_compare, needFrames=False, with_file_at_root_folder=False)
-        filename_with_zipsize = session.get_bit_size_zip_folder()
-        session.cleanup()
+        filename_with_zipsize = session.get_zip_size_folder(folders_to_compare)
 
         # Found doi for frames and predictions.
         filename_with_doi = {}
@@ -78,58 +77,58 @@ class AtlasImport:
                    abs(filename_with_zipsize[file["key"]] - file["size"]) < 1000):
                     filename_with_doi[file["key"]] = version["id"]
         
-        # Create or update deposit
+        # Session is written in one transaction, nothing stay in database if the import fail.
         footprint_polygon, footprint_linestring = session.get_footprint()
-        deposit = DepositDTO(doi=versions[0]["conceptrecid"], 
-                          session_name=session_path.name, 
-                          footprint=footprint_polygon,
-                          have_raw_data=have_raw_data, 
-                          have_processed_data=have_processed_data
-                        )
+        with AbstractBaseDAO.transaction():
+
+            # Create or update deposit
+            deposit = DepositDTO(doi=versions[0]["conceptrecid"], 
+                              session_name=session_path.name, 
+                              footprint=footprint_polygon,
+                              have_raw_data=have_raw_data, 
+                              have_processed_data=have_processed_data
+                            )
         
-        self.deposit_manager.insert(deposit)
+            self.deposit_manager.insert(deposit)
 
-        deposit_linestring = DepositLinestringDTO(deposit=deposit, footprint_linestring=footprint_linestring)
-        self.deposit_linestring_manager.insert(deposit_linestring)
+            deposit_linestring = DepositLinestringDTO(deposit=deposit, footprint_linestring=footprint_linestring)
+            self.deposit_linestring_manager.insert(deposit_linestring)
 
-        # Insert versions
-        for v in versions:
-            # Do not insert version different from processed_data and raw_data
-            if v["metadata"]["version"].upper().replace(" ", "_") not in ["PROCESSED_DATA", "RAW_DATA"]: continue
-            self.version_manager.insert(VersionDTO(doi=v["id"], deposit=deposit))
+            # Insert versions
+            for v in versions:
+                # Do not insert version different from processed_data and raw_data
+                if v["metadata"]["version"].upper().replace(" ", "_") not in ["PROCESSED_DATA", "RAW_DATA"]: continue
+                self.version_manager.insert(VersionDTO(doi=v["id"], deposit=deposit))
 
         
-        # Check another time if we have all our filename with doi and if not raise an error.
-        if len(filename_with_doi) != len(filename_with_zipsize):
-            print("\n[WARNING] Not enough doi to peuplate database")
-            return
+            # Check another time if we have all our filename with doi and if not raise an error.
+            if len(filename_with_doi) != len(filename_with_zipsize):
+                print("\n[WARNING] Not enough doi to peuplate database")
+                return
         
-        # Iterate over frames.
-        frame_version = VersionDTO(doi=filename_with_doi["METADATA.zip"], deposit=deposit)
-        self.frames_importer(session, frame_version, force_frames_insertion)
+            # Iterate over frames.
+            frame_version = VersionDTO(doi=filename_with_doi["METADATA.zip"], deposit=deposit)
+            self.frames_importer(session, frame_version, force_frames_insertion)
 
 
-        if "PROCESSED_DATA_IA.zip" not in filename_with_doi:
-            print("[WARNING] No IA folder found, cannot add predictions.")
-            return
+            if "PROCESSED_DATA_IA.zip" not in filename_with_doi:
+                print("[WARNING] No IA folder found, cannot add predictions.")
+                return
         
-        # Iterate and add predictions
-        prediction_version = VersionDTO(
-            doi=filename_with_doi["PROCESSED_DATA_IA.zip"],
-            deposit=deposit
-        )
-        self.multilabel_prediction_importer(session, prediction_version, frame_version)
+            # Iterate and add predictions
+            prediction_version = VersionDTO(
+                doi=filename_with_doi["PROCESSED_DATA_IA.zip"],
+                deposit=deposit
+            )
+            self.multilabel_prediction_importer(session, prediction_version, frame_version)
 
 
     def frames_importer(self, session: BaseSessionManager, frame_version: VersionDTO, force_frames_insertion: bool) -> None:
         print("\nfunc: Importing frames")
         metadata_csv = session.get_metadata_csv(indexingByFilename=True)
 
-        # Get all frames already in database for a specific version to avoid duplicata.
-        frame_in_db_for_specific_version = self.frame_manager.get_frames_by_version(frame_version)
-
-        # Get frame name
-        frame_name_in_db = [f.filename for f in frame_in_db_for_specific_version]
+        # Get all frame names already in database for a specific version to avoid duplicata.
+        frame_name_in_db = list(self.frame_manager.get_frame_ids_by_version(frame_version))
         
         useful_frame = []
         if force_frames_insertion:
@@ -145,56 +144,42 @@ class AtlasImport:
             print("[WARNING] We already have all the frame for this specific version in database.")
             return
         
-        frame_obj_to_add = []
-        for frame_name in tqdm(frame_name_to_add_in_database):
-    
-            row = metadata_csv.loc[frame_name]
-            
-            original_filename = frame_name if "OriginalFileName" not in row else row["OriginalFileName"]
-            # Check if session_name in frame_name, else add it.
-            if session.session_name not in frame_name:
-                frame_name = f"{session.session_name}_{frame_name}"
-
-            # Datetime formatting
-            creation_date = ""
-            if "SubSecDateTimeOriginal" in row and "1970" not in row["SubSecDateTimeOriginal"].split(".")[0]: # Plancha with correct datetime
-                if "+" in row["SubSecDateTimeOriginal"]:
-                    creation_date = datetime.strptime(row["SubSecDateTimeOriginal"], "%Y:%m:%d %H:%M:%S%z").astimezone(tz.UTC).strftime("%Y-%m-%d %H:%M:%S")
-                else:
-                    date, time = row["SubSecDateTimeOriginal"].split(".")[0].split(" ")
-                    date = date.replace(":", "-")
-                    creation_date = date + " " + time
-            elif "DateTimeOriginal" in row: # UAV 
-                date, time = row["DateTimeOriginal"].split(" ")
-                date = date.replace(":", "-")
-                creation_date = date + " " + time
-            elif "GPSDateTime" in row: # 2015 Scuba diving
-                date, time = row["GPSDateTime"].replace("Z", "").split(".")[0].split(" ")
-                date = date.replace(":", "-")
-                creation_date = date + " " + time
-            elif "SubSecDateTimeOriginal" in row and "1970" in row["SubSecDateTimeOriginal"].split(".")[0]: # Plancha with 1970 as year replace with session date and add 12.
-                _, time = row["SubSecDateTimeOriginal"].split(".")[0].split(" ")
-                time = (datetime.strptime(time, "%H:%M:%S") + timedelta(hours=12)).strftime("%H:%M:%S")
-                creation_date = session.date + " " + time
-            else:
-                creation_date = None
-
-            frame = FrameDTO(
-                version = frame_version,
-                filename = frame_name,
-                original_filename = original_filename,
-                gps_latitude = None if "GPSLatitude" not in row else row["GPSLatitude"],
-                gps_longitude = None if "GPSLongitude" not in row else row["GPSLongitude"],
-                gps_altitude = None if "GPSAltitude" not in row else row["GPSAltitude"],
-                gps_pitch = None if "GPSPitch" not in row else row["GPSPitch"],
-                gps_roll = None if "GPSRoll" not in row else row["GPSRoll"],
-                gps_track = None if "GPSTrack" not in row else row["GPSTrack"],
-                gps_fix = None if "GPSfix" not in row else row["GPSfix"],
-                gps_datetime =  creation_date,
-                relative_path = None if "relative_file_path" not in row else row["relative_file_path"]
-            )
-            frame_obj_to_add.append(frame)
-        self.frame_manager.insert(frame_obj_to_add)
+        df_frames = metadata_csv.loc[frame_name_to_add_in_database]
+        frame_names = pd.Series(df_frames.index, index=df_frames.index, dtype=str)
+
+        def column_or_none(column_name: str) -> list:
+            return df_frames[column_name].tolist() if column_name in df_frames else [None] * len(df_frames)
+
+        original_filenames = df_frames["OriginalFileName"].tolist() if "OriginalFileName" in df_frames else frame_names.tolist()
+        
+        # Check if session_name in frame_name, else add it.
+        filenames = frame_names.where(frame_names.str.contains(session.session_name, regex=False), session.session_name + "_" + frame_names).tolist()
+
+        # Datetime formatting.
+        creation_dates = build_frames_datetime(df_frames, session.date).tolist()
+
+        # Build all positions in one pass, frame without coordinates have no position.
+        positions = [None] * len(df_frames)
+        if "GPSLatitude" in df_frames and "GPSLongitude" in df_frames:
+            lat = pd.to_numeric(df_frames["GPSLatitude"], errors="coerce").to_numpy()
+            lon = pd.to_numeric(df_frames["GPSLongitude"], errors="coerce").to_numpy()
+            wkt_positions = shapely.to_wkt(shapely.points(lon, lat), rounding_precision=-1)
+            positions = np.where(np.isnan(lat) | np.isnan(lon), None, wkt_positions).tolist()
+
+        frames_to_add = list(zip(
+            [frame_version.doi] * len(df_frames),
+            filenames,
+            original_filenames,
+            column_or_none("relative_file_path"),
+            positions,
+            column_or_none("GPSAltitude"),
+            column_or_none("GPSPitch"),
+            column_or_none("GPSRoll"),
+            column_or_none("GPSTrack"),
+            creation_dates,
+            column_or_none("GPSfix")
+        ))
+        self.frame_manager.bulk_insert(frames_to_add)
 
 
     def multilabel_prediction_importer(self, session: BaseSessionManager, pred_v: VersionDTO, 
@@ -203,42 +188,59 @@ class AtlasImport:
         print("\nfunc: Importing multilabel predictions")
         
         scores_csv = session.get_multilabel_csv(isScore=True, indexingByFilename=True)
+        if len(scores_csv) == 0:
+            print("[WARNING] No multilabel scores found, cannot add predictions.")
+            return
         scores_csv_header = list(scores_csv)
 
         ml_model = self.ml_model_manager.get_model_by_name(MULTILABEL_MODEL_NAME)
 
         matching_old_new_multilabel_label = load_and_build_parser_old_new_multilabel_class()
 
-        predictions_obj_to_add = []
-        for frame_name in tqdm(session.get_useful_frames_name()):
-            frame = self.frame_manager.get_frame_by_filename_and_version(frame_name, f_ver)
+        # Resolve each csv column to a class id with only one query for the model.
+        class_id_by_db_name = {c.name: c.id for c in self.ml_classes_manager.get_all_class_for_ml_model(ml_model)}
+        class_id_by_csv_name = {}
+        for csv_cls_name in scores_csv_header:
+            db_cls_name = matching_old_new_multilabel_label.get(csv_cls_name, csv_cls_name)
+            if db_cls_name not in class_id_by_db_name:
+                raise NameError(f"[ERROR] No multilabel class found for this name: {db_cls_name}.")
+            class_id_by_csv_name[csv_cls_name] = class_id_by_db_name[db_cls_name]
+
+        # Load frame ids for the version and number of predictions already imported for each frame.
+        frame_id_by_name = self.frame_manager.get_frame_ids_by_version(f_ver)
+        nb_preds_by_frame_id = self.prediction_manager.get_nb_predictions_by_frame_for_version(pred_v)
+
+        frame_name_to_add = []
+        for frame_name in session.get_useful_frames_name():
+            if frame_name not in frame_id_by_name:
+                raise NameError(f"[ERROR] Frame {frame_name} not found.")
 
             # Manual check to avoid add duplicate data.
-            preds = self.prediction_manager.get_pred_by_frame_version(pred_v, frame)
-            if len(preds) == len(scores_csv_header): continue
-            elif len(preds) > 0 and len(preds) < len(scores_csv_header):
+            nb_preds = nb_preds_by_frame_id.get(frame_id_by_name[frame_name], 0)
+            if nb_preds == len(scores_csv_header): continue
+            elif nb_preds > 0:
                 print(f"""[WARNING] Frame {frame_name} doesn't have the correct number of predictions in database. 
                         It's an error please fix.""")
                 continue
+            frame_name_to_add.append(frame_name)
 
-            row = scores_csv.loc[frame_name]
-            
-            for csv_cls_name in scores_csv_header:
-
-                db_cls_name = csv_cls_name
-                if csv_cls_name in matching_old_new_multilabel_label:
-                    db_cls_name = matching_old_new_multilabel_label[csv_cls_name]
+        if len(frame_name_to_add) == 0:
+            print("[WARNING] We already have all the predictions for this specific version in database.")
+            return
 
-                ml_class = self.ml_classes_manager.get_class_by_name_and_model(db_cls_name, ml_model)
+        # Melt the scores in long format: one row by (frame, class).
+        df_scores = scores_csv.loc[frame_name_to_add, scores_csv_header].rename(columns=class_id_by_csv_name)
+        df_scores.index = df_scores.index.map(frame_id_by_name)
+        df_long = df_scores.rename_axis("frame_id").reset_index().melt(id_vars="frame_id", var_name="ml_class_id", value_name="score")
 
-                predictions_obj_to_add.append(MultilabelPredictionDTO(
-                    score=row[csv_cls_name],
-                    frame=frame,
-                    ml_class=ml_class,
-                    version=pred_v
-                ))
+        predictions_to_add = list(zip(
+            df_long["score"].tolist(),
+            [pred_v.doi] * len(df_long),
+            df_long["frame_id"].tolist(),
+            df_long["ml_class_id"].tolist()
+        ))
 
-        self.prediction_manager.insert(predictions_obj_to_add)
+        self.prediction_manager.bulk_insert(predictions_to_add)
     
 
     def multilabel_annotation_importer(self, annotation_file: Path) -> None:
@@ -272,46 +274,48 @@ class AtlasImport:
             id=None
         )
         
-        annotation_session = self.ml_anno_ses_manager.insert_and_get_id(ml_annotation_session)
-        if isinstance(annotation_session, DataStatus) and annotation_session == DataStatus.ALREADY:
-            print("This annotation session is already in database.")
-            return
-        elif isinstance(annotation_session, DataStatus) and annotation_session == DataStatus.NO_DATA:
-            print("[ERROR] Cannot insert annotation_session.")
+        # Annotation session and annotations are written together.
+        with AbstractBaseDAO.transaction():
+            annotation_session = self.ml_anno_ses_manager.insert_and_get_id(ml_annotation_session)
+            if isinstance(annotation_session, DataStatus) and annotation_session == DataStatus.ALREADY:
+                print("This annotation session is already in database.")
+                return
+            elif isinstance(annotation_session, DataStatus) and annotation_session == DataStatus.NO_DATA:
+                print("[ERROR] Cannot insert annotation_session.")
 
-        cpt_error, annotations_obj_to_add, label_not_found = 0, [], []
-        # Iter on all annotation and insert in database.
-        for _, row in tqdm(df_annotation.iterrows(), total=len(df_annotation)):
-            
-            # Check if we have frame in database.
-            try:
-                frame = self.frame_manager.get_frame_by_filename(row["FileName"])
-            except NameError:
-                cpt_error += 1
-                continue
+            cpt_error, annotations_obj_to_add, label_not_found = 0, [], []
+            # Iter on all annotation and insert in database.
+            for _, row in tqdm(df_annotation.iterrows(), total=len(df_annotation)):
             
-            for label_name in list(df_annotation):
-                
-                # Check if label exist.
+                # Check if we have frame in database.
                 try:
-                    label = self.ml_label_manager.get_label_by_name(label_name)
+                    frame = self.frame_manager.get_frame_by_filename(row["FileName"])
                 except NameError:
-                    if label_name not in label_not_found:
-                        label_not_found.append(label_name)
+                    cpt_error += 1
                     continue
-
-                annotations_obj_to_add.append(MultilabelAnnotationDTO(
-                    value=row[label_name],
-                    frame=frame,
-                    ml_label=label,
-                    ml_annotation_session=annotation_session
-                ))
-        if len(label_not_found) != 0:
-            print(f"[WARNING] This label weren't in database : {', '.join(label_not_found)}")
-
-        print(f"""{len(df_annotation) - cpt_error}/{len(df_annotation)} images, traduct by {len(annotations_obj_to_add)} annotations load in database.""")
+            
+                for label_name in list(df_annotation):
+                
+                    # Check if label exist.
+                    try:
+                        label = self.ml_label_manager.get_label_by_name(label_name)
+                    except NameError:
+                        if label_name not in label_not_found:
+                            label_not_found.append(label_name)
+                        continue
+
+                    annotations_obj_to_add.append(MultilabelAnnotationDTO(
+                        value=row[label_name],
+                        frame=frame,
+                        ml_label=label,
+                        ml_annotation_session=annotation_session
+                    ))
+            if len(label_not_found) != 0:
+                print(f"[WARNING] This label weren't in database : {', '.join(label_not_found)}")
+
+            print(f"""{len(df_annotation) - cpt_error}/{len(df_annotation)} images, traduct by {len(annotations_obj_to_add)} annotations load in database.""")
         
-        if len(annotations_obj_to_add) == 0:
-            self.ml_anno_ses_manager.drop_annotation_session(annotation_session)
-        else:
-            self.ml_anno_manager.insert(annotations_obj_to_add)
+            if len(annotations_obj_to_add) == 0:
+                self.ml_anno_ses_manager.drop_annotation_session(annotation_session)
+            else:
+                self.ml_anno_manager.insert(annotations_obj_to_add)
@@ -6,7 +6,7 @@ from .sa_exporter import AtlasExport
 from .sa_metadata import build_metadata
 from .sa_tools import get_annotation_type_from_opt, AnnotationType
 
-from ..utils.constants import SEATIZEN_ATLAS_GPKG, SEATIZEN_ATLAS_URN
+from ..utils.constants import SEATIZEN_ATLAS_GPKG, SEATIZEN_ATLAS_URN, SQLITE_DEFAULT_PROFILE
 
 from ..zenodo_api.za_token import ZenodoAPI
 from ..zenodo_api.za_tokenless import download_manager_without_token, get_version_from_session_name
@@ -16,10 +16,11 @@ from ..sql_connector.sc_connector import SQLiteConnector
 from ..models.etl_runs_model import ETLRunsDAO
 
 class AtlasManager:
-    def __init__(self, config: dict, seatizen_folder_path: str, from_local: bool, force_regenerate: bool) -> None:
+    def __init__(self, config: dict, seatizen_folder_path: str, from_local: bool, force_regenerate: bool, connection_profile: str = SQLITE_DEFAULT_PROFILE) -> None:
         
         # Config.
         self.config = config
+        self.connection_profile = connection_profile
 
         # Bool.
         self.from_local = from_local
@@ -70,10 +71,10 @@ class AtlasManager:
         # Try to figure out if we have a gpkg file.
         if not Path.exists(self.seatizen_atlas_gpkg) or not self.seatizen_atlas_gpkg.is_file():
             print("Generating base gpkg file.")
-            self.sql_connector.generate(self.seatizen_atlas_gpkg)
+            self.sql_connector.generate(self.seatizen_atlas_gpkg, self.connection_profile)
         else:
             # If we have a file, connect with it
-            self.sql_connector.connect(self.seatizen_atlas_gpkg)
+            self.sql_connector.connect(self.seatizen_atlas_gpkg, self.connection_profile)
 
     def import_session(self, session: Path, force_frames_insertion: bool = False) -> None:
         self.importer.import_seatizen_session(session, force_frames_insertion)
@@ -136,6 +137,9 @@ class AtlasManager:
 
         zenodoAPI = ZenodoAPI("seatizen-atlas", self.config)
 
+        # Wal content need to be in the gpkg file before upload.
+        self.sql_connector.checkpoint()
+
         # Previous files to not propagate.
         previous_files = [file_dict["filename"] for file_dict in zenodoAPI.list_files()]
 
@@ -0,0 +1,66 @@
+import polars as pl
+import pyarrow.parquet as pq
+from pathlib import Path
+
+class CsvParquetStreamWriter:
+    """ 
+        Append dataframe batches at the same time in a csv file and in a parquet file (one row group by batch).
+        Without data, files are written with only the header of schema, or removed if schema is None to never keep a previous export.
+    """
+
+    def __init__(self, csv_path: Path, parquet_path: Path, schema: dict | None = None) -> None:
+        self.csv_path = csv_path
+        self.parquet_path = parquet_path
+        self.schema = schema
+
+        self.csv_file, self.parquet_writer = None, None
+        self.nb_rows = 0
+
+
+    def __enter__(self) -> "CsvParquetStreamWriter":
+        return self
+
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+
+    def write(self, df: pl.DataFrame) -> None:
+        """ Append a batch. Files are created with the first batch. """
+        if len(df) == 0: return
+
+        table = df.to_arrow()
+        if self.parquet_writer == None:
+            print(f"\n-- Generate {self.csv_path}")
+            print(f"\n-- Generate {self.parquet_path}")
+            self.csv_file = open(self.csv_path, "wb")
+            self.parquet_writer = pq.ParquetWriter(self.parquet_path, table.schema)
+
+        df.write_csv(self.csv_file, include_header=self.nb_rows == 0)
+        self.parquet_writer.write_table(table)
+        self.nb_rows += len(df)
+
+
+    def close(self) -> None:
+        if self.nb_rows == 0:
+            self.__write_empty_files()
+
+        if self.csv_file != None:
+            self.csv_file.close()
+            self.csv_file = None
+
+        if self.parquet_writer != None:
+            self.parquet_writer.close()
+            self.parquet_writer = None
+
+
+    def __write_empty_files(self) -> None:
+        """ No batch was written, replace files of a previous export. """
+        if self.schema == None:
+            self.csv_path.unlink(missing_ok=True)
+            self.parquet_path.unlink(missing_ok=True)
+            return
+        
+        df = pl.DataFrame(schema=self.schema)
+        df.write_csv(self.csv_path)
+        df.write_parquet(self.parquet_path)
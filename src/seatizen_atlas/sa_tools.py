@@ -32,4 +32,48 @@ def load_and_build_parser_old_new_multilabel_class() -> dict:
     for i, row in df_data.iterrows():
         new_label_map_by_old_label[row["old_label"]] = row["label"]
     
-    return new_label_map_by_old_label
\ No newline at end of file
+    return new_label_map_by_old_label
+
+def build_frames_datetime(metadata_csv: pd.DataFrame, session_date: str) -> pd.Series:
+    """ 
+        Return frames datetime as "%Y-%m-%d %H:%M:%S" string (None if unknown) for all rows of metadata_csv.
+        Timestamp variant is resolved column by column:
+            - SubSecDateTimeOriginal with tz (Plancha with correct datetime), converted in UTC.
+            - SubSecDateTimeOriginal without tz (Plancha with correct datetime).
+            - DateTimeOriginal (UAV).
+            - GPSDateTime (2015 Scuba diving).
+            - SubSecDateTimeOriginal with 1970 as year (Plancha), replaced by session date and add 12h.
+    """
+    exif_format = "%Y:%m:%d %H:%M:%S"
+    output_format = "%Y-%m-%d %H:%M:%S"
+
+    creation_date = pd.Series(None, index=metadata_csv.index, dtype=object)
+    need_fallback = pd.Series(True, index=metadata_csv.index)
+
+    subsec_without_ms = None
+    if "SubSecDateTimeOriginal" in metadata_csv:
+        subsec = metadata_csv["SubSecDateTimeOriginal"].astype(str)
+        subsec_without_ms = subsec.str.split(".").str[0]
+        need_fallback = subsec_without_ms.str.contains("1970", regex=False)
+
+        with_tz = ~need_fallback & subsec.str.contains("+", regex=False)
+        creation_date[with_tz] = pd.to_datetime(subsec[with_tz], format=f"{exif_format}%z", utc=True, errors="coerce").dt.strftime(output_format)
+
+        without_tz = ~need_fallback & ~with_tz
+        creation_date[without_tz] = pd.to_datetime(subsec_without_ms[without_tz], format=exif_format, errors="coerce").dt.strftime(output_format)
+
+    if not need_fallback.any():
+        return creation_date.where(creation_date.notna(), None)
+    
+    if "DateTimeOriginal" in metadata_csv:
+        dt = metadata_csv.loc[need_fallback, "DateTimeOriginal"].astype(str)
+        creation_date[need_fallback] = pd.to_datetime(dt, format=exif_format, errors="coerce").dt.strftime(output_format)
+    elif "GPSDateTime" in metadata_csv:
+        dt = metadata_csv.loc[need_fallback, "GPSDateTime"].astype(str).str.replace("Z", "", regex=False).str.split(".").str[0]
+        creation_date[need_fallback] = pd.to_datetime(dt, format=exif_format, errors="coerce").dt.strftime(output_format)
+    elif subsec_without_ms is not None:
+        time = subsec_without_ms[need_fallback].str.split(" ").str[1]
+        time = (pd.to_datetime(time, format="%H:%M:%S", errors="coerce") + pd.Timedelta(hours=12)).dt.strftime("%H:%M:%S")
+        creation_date[need_fallback] = session_date + " " + time
+
+    return creation_date.where(creation_date.notna(), None)
@@ -19,7 +19,7 @@ from shapely.geometry import LineString, Polygon
 from pygeometa.core import read_mcf, validate_mcf
 from pygeometa.schemas.iso19139_2 import ISO19139_2OutputSchema 
 
-from ..ss_zipper import SessionZipper
+from ..ss_zipper import SessionZipper, compute_zip_folder_size
 from ...utils.lib_tools import compute_duration_iso8601
 from ...utils.constants import MAXIMAL_DEPOSIT_FILE_SIZE, IMG_EXTENSION, BYTE_TO_GIGA_BYTE, MULTILABEL_MODEL_NAME, JACQUES_MODEL_NAME
 
@@ -579,6 +579,29 @@ class BaseSessionManager(ABC):
         return filename_with_size
 
 
+    def get_zip_size_folder(self, folders_to_zip: list[str]) -> dict:
+        """ Return a dict of zip filename: size as produced by _zip_folder, without writing any archive. """
+        print("func: Compute size of zip file without zipping")
+        filename_with_size = {}
+        for folder_to_zip in folders_to_zip:
+            raw_folder = Path(self.session_path, folder_to_zip)
+
+            if not Path.exists(raw_folder) or not raw_folder.is_dir() or not len(list(raw_folder.iterdir())) > 0:
+                print(f"[WARNING] {folder_to_zip} folder not found or empty for {self.session_name}\n")
+                continue
+
+            # Same cleaning as _zip_folder to get the same archive.
+            for file in raw_folder.iterdir():
+                if file.is_file() and ".tif.aux.xml" in file.name:
+                    file.unlink()
+
+            zip_name = f"{folder_to_zip.replace('/', '_')}.zip"
+            filename_with_size[zip_name] = compute_zip_folder_size(raw_folder)
+            print(f"{zip_name} : {filename_with_size[zip_name]} bits")
+
+        return filename_with_size
+
+
     def get_footprint(self) -> tuple[Polygon | None, LineString | None]:
         """Return the footprint of the session"""
 
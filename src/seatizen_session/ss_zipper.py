@@ -1,6 +1,7 @@
+import io
 import os
 from pathlib import Path
-from zipfile import ZipFile
+from zipfile import ZipFile, ZIP_DEFLATED
 
 from ..utils.constants import MAXIMAL_ZIP_SIZE, BYTE_TO_GIGA_BYTE
 
@@ -28,4 +29,53 @@ class SessionZipper:
 
 
     def close(self) -> None:
-        self.zip.close()
\ No newline at end of file
+        self.zip.close()
+
+class ZipSizeCounter(io.RawIOBase):
+    """ Seekable sink which discard all bytes and only keep track of the archive size. """
+    def __init__(self) -> None:
+        self.position, self.size = 0, 0
+
+
+    def writable(self) -> bool:
+        return True
+
+
+    def seekable(self) -> bool:
+        return True
+
+
+    def write(self, b) -> int:
+        nb_bytes = memoryview(b).nbytes
+        self.position += nb_bytes
+        self.size = max(self.size, self.position)
+        return nb_bytes
+
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_SET:
+            self.position = offset
+        elif whence == io.SEEK_CUR:
+            self.position += offset
+        else:
+            self.position = self.size + offset
+        return self.position
+
+
+    def tell(self) -> int:
+        return self.position
+
+
+def compute_zip_folder_size(folder: Path) -> int:
+    """ Return the exact size of the archive produced by shutil.make_archive(..., "zip", folder) without writing it. """
+    counter = ZipSizeCounter()
+    with ZipFile(counter, "w", compression=ZIP_DEFLATED) as zip_object:
+        for dirpath, dirnames, filenames in os.walk(folder):
+            arcdirpath = os.path.normpath(os.path.relpath(dirpath, folder))
+            for name in sorted(dirnames):
+                zip_object.write(os.path.join(dirpath, name), os.path.join(arcdirpath, name))
+            for name in filenames:
+                path = os.path.normpath(os.path.join(dirpath, name))
+                if os.path.isfile(path):
+                    zip_object.write(path, os.path.join(arcdirpath, name))
+    return counter.size
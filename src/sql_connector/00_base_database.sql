@@ -215,6 +215,8 @@ CREATE TABLE IF NOT EXISTS multilabel_annotation (
 -- Create all index
 CREATE INDEX IF NOT EXISTS idx_frame_id ON frame (id);
 CREATE INDEX IF NOT EXISTS idx_filename_version_doi ON frame (filename, version_doi);
+CREATE INDEX IF NOT EXISTS idx_frame_version_doi ON frame (version_doi);
+CREATE INDEX IF NOT EXISTS idx_deposit_session_date ON deposit (session_date);
 
 CREATE INDEX IF NOT EXISTS idx_multilabel_prediction_frame_id_version ON multilabel_prediction (frame_id, version_doi);
 
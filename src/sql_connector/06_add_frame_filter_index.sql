@@ -0,0 +1,3 @@
+-- Index used by exports to filter frames by session date and platform.
+CREATE INDEX IF NOT EXISTS idx_deposit_session_date ON deposit (session_date);
+CREATE INDEX IF NOT EXISTS idx_frame_version_doi ON frame (version_doi);
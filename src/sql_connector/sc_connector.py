@@ -1,38 +1,128 @@
+import os
 import sqlite3
+import threading
 import traceback
 from pathlib import Path
-from ..utils.constants import SQL_FILE
+from typing import Callable
+from contextlib import contextmanager
+from ..utils.constants import SQL_FILE, EXPORT_BATCH_SIZE, SQLITE_CONNECTION_PROFILES, SQLITE_DEFAULT_PROFILE
 
 class SQLiteConnector:
 
     _instance = None
 
+    # Called when the connector switch to another database file or close, kept when close() drops the instance.
+    _on_database_changed: list[Callable[[], None]] = []
+
     def __new__(cls, *args, **kwargs):
         if cls._instance is None:
             cls._instance = super().__new__(cls, *args, **kwargs)
             cls._instance._connection = None
+            cls._instance._profile = SQLITE_DEFAULT_PROFILE
+            cls._instance._transaction_depth = 0
+
+            # Writer connection is used by the thread which connect and inside transactions, other threads read with their own connection.
+            cls._instance._sqlite_filepath = None
+            cls._instance._writer_thread, cls._instance._transaction_thread = None, None
+            cls._instance._write_lock = threading.RLock()
+            cls._instance._read_local = threading.local()
+            cls._instance._read_connections = []
+            cls._instance._read_connections_lock = threading.Lock()
         return cls._instance
 
 
-    def connect(self, sqlite_filepath):
-        """ Establishes connection with database """
+    def _forget_connections_after_fork(self):
+        """ Sqlite connections cannot be shared with a forked process (background jobs), child process reads with new connections. """
+        self._writer_thread, self._transaction_thread = None, None
+        self._read_local = threading.local()
+        self._read_connections = []
+        self._read_connections_lock = threading.Lock()
+
+
+    @classmethod
+    def add_database_changed_callback(cls, callback: Callable[[], None]) -> None:
+        """ Register a callback to drop data cached from the database, the gpkg file can be replaced before each connect. """
+        if callback not in cls._on_database_changed:
+            cls._on_database_changed.append(callback)
+
+
+    def _notify_database_changed(self):
+        for callback in SQLiteConnector._on_database_changed:
+            callback()
+
+
+    def connect(self, sqlite_filepath, profile: str = SQLITE_DEFAULT_PROFILE):
+        """ Establishes connection with database and apply the pragmas of the connection profile. """
+        if profile not in SQLITE_CONNECTION_PROFILES:
+            raise NameError(f"Connection profile {profile} not found, choose between {list(SQLITE_CONNECTION_PROFILES)}")
+        
+        self._notify_database_changed()
         try:
-            self._connection = sqlite3.connect(sqlite_filepath, check_same_thread=False)
-            self._connection.enable_load_extension(True)
-            self._connection.execute('SELECT load_extension("mod_spatialite")')
-            self._connection.execute('PRAGMA threading_mode = "MULTI-THREAD"')
+            self._connection = self._open_connection(sqlite_filepath, profile)
+            self._profile = profile
+            self._sqlite_filepath = sqlite_filepath
+            self._writer_thread = threading.get_ident()
 
         except sqlite3.Error:
             print(traceback.format_exc())
             print(f"Cannot connect to {sqlite_filepath}")
 
 
+    def _open_connection(self, sqlite_filepath, profile: str, read_only: bool = False) -> sqlite3.Connection:
+        """ Open a connection with spatialite loaded and the pragmas of the connection profile. """
+        if read_only:
+            connection = sqlite3.connect(f"{Path(sqlite_filepath).resolve().as_uri()}?mode=ro", uri=True, check_same_thread=False)
+        else:
+            connection = sqlite3.connect(sqlite_filepath, check_same_thread=False)
+        
+        connection.enable_load_extension(True)
+        connection.execute('SELECT load_extension("mod_spatialite")')
+        self._apply_profile(profile, connection, read_only)
+        return connection
+
+
+    def _apply_profile(self, profile: str, connection: sqlite3.Connection | None = None, read_only: bool = False):
+        """ Set pragmas of a connection profile on a connection, default on the writer connection. """
+        if connection is None:
+            connection = self._connection
+            self._profile = profile
+
+        for pragma, value in SQLITE_CONNECTION_PROFILES[profile].items():
+            if read_only and pragma == "journal_mode": continue # Journal mode is store in the database file, only the writer can set it.
+            connection.execute(f"PRAGMA {pragma} = {value}")
+
+
+    def _get_read_connection(self) -> sqlite3.Connection:
+        """ Return the connection to use for select queries in the current thread. """
+        if self._sqlite_filepath is None or threading.get_ident() in (self._writer_thread, self._transaction_thread):
+            return self._connection
+
+        connection = getattr(self._read_local, "connection", None)
+        if connection is None:
+            connection = self._open_connection(self._sqlite_filepath, self._profile, read_only=True)
+            self._read_local.connection = connection
+            with self._read_connections_lock:
+                self._read_connections.append(connection)
+        return connection
+
+
+    def checkpoint(self):
+        """ Move wal content into the database file and go back to a rollback journal, so the gpkg file is self-contained. """
+        if self._connection is None: return
+
+        try:
+            self._connection.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            self._connection.execute("PRAGMA journal_mode = DELETE")
+        except sqlite3.Error:
+            print(f"[WARNING] Cannot checkpoint database, wal file is kept: {traceback.format_exc()}")
+
+
     def _query(self, query, params):
         if self._connection is None:
             print("Error: database connection not established")
             return None
         
-        cursor = self._connection.cursor()
+        cursor = self._get_read_connection().cursor()
         cursor.execute(query, params)
         results = cursor.fetchall()
         cursor.close()
@@ -45,10 +135,12 @@ class SQLiteConnector:
             print("Error: database connection not established")
             return None
         
-        cursor = self._connection.cursor()
-        cursor.execute(query, params)
-        self._connection.commit()
-        cursor.close()
+        with self._write_lock:
+            cursor = self._connection.cursor()
+            cursor.execute(query, params)
+            if self._transaction_depth == 0:
+                self._connection.commit()
+            cursor.close()
     
 
     def _executemany(self, query, params):
@@ -56,12 +148,68 @@ class SQLiteConnector:
             print("Error: database connection not established")
             return None
         
-        cursor = self._connection.cursor()
-        cursor.executemany(query, params)
-        self._connection.commit()
-        cursor.close()
+        with self._write_lock:
+            cursor = self._connection.cursor()
+            cursor.executemany(query, params)
+            if self._transaction_depth == 0:
+                self._connection.commit()
+            cursor.close()
     
 
+    @contextmanager
+    def transaction(self):
+        """ 
+            Group all queries of the block in one transaction, committed at the end of the outermost block.
+            Nested blocks use a savepoint: an exception only rollback the nested block before being propagated.
+        """
+        if self._connection is None:
+            raise NameError("Database connection not established")
+        
+        with self._write_lock: # Other threads wait the end of the transaction to write.
+            if self._transaction_depth == 0:
+                self._connection.execute("BEGIN IMMEDIATE")
+                self._transaction_thread = threading.get_ident()
+                commit, rollback = "COMMIT", "ROLLBACK"
+            else:
+                savepoint = f"sp_{self._transaction_depth}"
+                self._connection.execute(f"SAVEPOINT {savepoint}")
+                commit, rollback = f"RELEASE {savepoint}", f"ROLLBACK TO {savepoint}"
+            
+            self._transaction_depth += 1
+            try:
+                yield self
+            except BaseException:
+                self._transaction_depth -= 1
+                self._connection.execute(rollback)
+                if self._transaction_depth != 0:
+                    self._connection.execute(commit) # Rollback to a savepoint keep it on the stack.
+                raise
+            else:
+                self._transaction_depth -= 1
+                self._connection.execute(commit)
+            finally:
+                if self._transaction_depth == 0:
+                    self._transaction_thread = None
+
+
+    def execute_query_by_batch(self, query: str, params=None, batch_size: int = EXPORT_BATCH_SIZE):
+        """ Perform custom select query and yield results by batch of batch_size rows. """
+        if self._connection is None:
+            print("Error: database connection not established")
+            return
+        
+        if params is None:
+            params = []
+
+        cursor = self._get_read_connection().cursor()
+        try:
+            cursor.execute(query, params)
+            while rows := cursor.fetchmany(batch_size):
+                yield rows
+        finally:
+            cursor.close()
+
+
     def execute_query(self, query: str, params=None):
         """ Perform custom query. """
         
@@ -77,10 +225,10 @@ class SQLiteConnector:
             return None
     
 
-    def generate(self, sqlite_filepath: Path):
+    def generate(self, sqlite_filepath: Path, profile: str = SQLITE_DEFAULT_PROFILE):
         """ Regenerate gpkg file. """
 
-        self.connect(sqlite_filepath)
+        self.connect(sqlite_filepath, profile)
         
         if not Path.exists(Path(SQL_FILE)):
             raise NameError(f"File {SQL_FILE} not found")
@@ -96,7 +244,15 @@ class SQLiteConnector:
     
 
     def close(self):
+        self._notify_database_changed()
+        with self._read_connections_lock:
+            for connection in self._read_connections:
+                connection.close()
+            self._read_connections.clear()
+
         if self._connection is not None:
+            if SQLITE_CONNECTION_PROFILES[self._profile].get("journal_mode", "").upper() == "WAL":
+                self.checkpoint()
             self._connection.close()
             SQLiteConnector._instance = None
     
@@ -112,4 +268,13 @@ class SQLiteConnector:
         with open(script_path, 'r') as file:
             sql_script = file.read()
         
-        self._connection.executescript(sql_script)
\ No newline at end of file
+        self._connection.executescript(sql_script)
+
+
+def _forget_connections_after_fork():
+    """ Registered once for the module, close() drops the instance so the hook resets the current one. """
+    if SQLiteConnector._instance is not None:
+        SQLiteConnector._instance._forget_connections_after_fork()
+
+
+os.register_at_fork(after_in_child=_forget_connections_after_fork)
@@ -12,12 +12,27 @@ SQL_FILE = "./src/sql_connector/00_base_database.sql"
 MAXIMAL_DEPOSIT_FILE_SIZE = 50 # GB
 MAXIMAL_ZIP_SIZE = 15 # GB
 MAX_RETRY_TO_UPLOAD_DOWNLOAD_FILE = 50
+DOWNLOAD_NB_WORKERS = 4 # Files of a version downloaded at the same time.
+DOWNLOAD_CHUNK_SIZE = 1048576 # 1 MiB
+DOWNLOAD_TIMEOUT = 60 # sec without data before retry.
+DOWNLOAD_BACKOFF_BASE, DOWNLOAD_BACKOFF_MAX = 0.5, 60 # sec, wait between retries double until max.
+MAX_CHECKSUM_RETRY = 3 # Full downloads or uploads of a file before giving up on checksum errors.
+REMOTE_ZIP_BUFFER_SIZE = 8388608 # 8 MiB, bytes fetched by range request when zip members are read remotely.
+UPLOAD_NB_WORKERS = 3 # Files of a version uploaded at the same time.
+UPLOAD_JOURNAL_FOLDER = "./upload_journal" # State of running uploads, a crashed upload restart from it.
 NB_VERSION_TO_FETCH = 100 # Keep low because zenodo tiemout after 30 sec.
 
 # Zenodo for download without token
 ZENODO_LINK_WITHOUT_TOKEN = "https://zenodo.org/api/records"
 ZENODO_LINK_WITHOUT_TOKEN_COMMUNITIES = "https://zenodo.org/api/communities"
 
+# Shared http client for zenodo and gbif calls.
+HTTP_TIMEOUT = (10, 60) # sec, (connect, read).
+HTTP_POOL_SIZE = 16 # Keep-alive connections by host, more than download and upload workers.
+HTTP_MAX_RETRY = 5 # Retries on connection errors and HTTP_RETRY_STATUS.
+HTTP_RETRY_STATUS = [429, 500, 502, 503, 504]
+HTTP_RATE_LIMITS = {"zenodo.org": (100 / 60, 20), "sandbox.zenodo.org": (100 / 60, 20)} # host: (requests by sec, burst), zenodo allow 100 requests by minute.
+
 
 # IA model. The values are the name of the predictions files in PROCESSED_DATA/IA without the session_name
 JACQUES_MODEL_NAME = "jacques-v0.1.0_model-20240513_v20.0"
@@ -27,3 +42,51 @@ MULTILABEL_MODEL_NAME = "DinoVdeau-large-2024_04_03-with_data_aug_batch-size32_e
 
 # Zenodo monitoring Max csv file size to download.
 MAX_CSV_FILE_TO_DOWNLOAD = 700 # MB
+
+# Zenodo monitoring footprints are simplified to the pixel size of these zoom levels, above the last one full geometries are sent.
+FOOTPRINT_ZOOM_BANDS = [4, 8, 12, 16]
+
+# Database cache. Maximum number of objects kept in memory by entity type and maximum number of ? in one query.
+IDENTITY_MAP_MAX_SIZE = 500000
+SQL_MAX_VARIABLES_BY_QUERY = 900
+
+# Number of rows retrieve from database and written at once when exporting data.
+EXPORT_BATCH_SIZE = 100000
+
+# Sqlite connection profiles, pragmas apply on each connection. Negative cache_size is in KiB.
+SQLITE_DEFAULT_PROFILE = "default"
+SQLITE_CONNECTION_PROFILES = {
+    SQLITE_DEFAULT_PROFILE: {},
+    "bulk_load": { # Importer runs: one writer, large cache, fsync only at checkpoint.
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "cache_size": -524288, # 512 MiB
+        "mmap_size": 2147483648, # 2 GiB
+        "temp_store": "MEMORY",
+        "busy_timeout": 60000, # ms
+    },
+    "read_heavy": { # Monitoring app: readers don't wait behind a writer.
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "cache_size": -131072, # 128 MiB
+        "mmap_size": 1073741824, # 1 GiB
+        "temp_store": "MEMORY",
+        "busy_timeout": 5000, # ms
+    },
+}
+
+# Zenodo monitoring background jobs. Identical export requests running at the same time wait for the first one.
+MONITORING_JOBS_CACHE_PATH = "./monitoring_jobs_cache"
+EXPORT_JOB_LOCK_TTL = 600 # sec, renewed while the export is built.
+
+# Zenodo monitoring export results cache.
+EXPORT_CACHE_PATH = "./monitoring_export_cache"
+EXPORT_CACHE_MAX_SIZE = 5 # GB
+
+# Zenodo monitoring tile proxy. Tiles are revalidated with upstream after TILE_CACHE_REVALIDATE_AFTER, browsers keep them TILE_BROWSER_MAX_AGE.
+TILE_UPSTREAM_URL = "https://tmsserver.ifremer.re"
+TILE_CACHE_PATH = "./monitoring_tile_cache"
+TILE_CACHE_MAX_SIZE = 10 # GB
+TILE_CACHE_REVALIDATE_AFTER = 86400 # sec
+TILE_BROWSER_MAX_AGE = 3600 # sec
+TILE_UPSTREAM_TIMEOUT = 10 # sec
@@ -1,13 +1,30 @@
 import shutil
+import zipfile
+import requests
 import traceback
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
 
 from src.seatizen_session.manager.ssm_factory_manager import FactorySessionManager
 
 from ..zenodo_api.za_token import ZenodoAPI
 from ..zenodo_api.za_tokenless import get_version_from_doi, download_manager_without_token, get_version_from_session_name
+from ..zenodo_api.za_remote_zip import extract_remote_zip
+from ..zenodo_api.za_base_function import BandwidthLimiter
 
 from .lib_tools import get_session_name_doi_from_opt, get_doi_from_custom_frames_csv
+from .constants import DOWNLOAD_NB_WORKERS, ZENODO_LINK_WITHOUT_TOKEN
+
+def get_download_speed_options(opt) -> tuple[int, float | None]:
+    """ Return number of download workers and max bandwidth in MB/s from opt. """
+    nb_workers = int(opt.nb_workers) if opt.nb_workers.isnumeric() and int(opt.nb_workers) > 0 else DOWNLOAD_NB_WORKERS
+    try:
+        max_bandwidth = float(opt.max_bandwidth) if float(opt.max_bandwidth) > 0 else None
+    except ValueError:
+        print(f"[WARNING] Cannot parse max bandwidth {opt.max_bandwidth}, download without limit.")
+        max_bandwidth = None
+    return nb_workers, max_bandwidth
+
 
 def download_with_token(opt, config_json: dict) -> None:
     print("Using downloader with token")
@@ -121,7 +138,7 @@ def download_without_token(opt) -> None:
                 print("[WARNING] Cannot find session_name.")
                 session_name = ""
 
-            download_manager_without_token(list_files, path_output, session_name, doi)
+            download_manager_without_token(list_files, path_output, session_name, doi, *get_download_speed_options(opt))
 
         except Exception:
             print(traceback.format_exc(), end="\n\n")
@@ -150,67 +167,113 @@ def download_specific_frames(opt) -> None:
     sessions_fail = []
     list_frames_by_doi = get_doi_from_custom_frames_csv(opt)
 
-    # for doi, frames in list_frames_by_doi.items():
-    for doi, frames in list_frames_by_doi.items():
-        try:
-            if doi == None: continue
-
-            version_json = get_version_from_doi(doi)
-            if version_json == {} or "files" not in version_json:
-                continue
-            list_files = version_json["files"]
-
-            # Continue if no files to download due to access_right not open.
-            if len(list_files) == 0 and version_json["metadata"]["access_right"] != "open":
-                print("[WARNING] No files to download, version is not open.")
-                continue
-            
-            # In case we get a conceptrecid from the user, get doi
-            doi = version_json["id"]
+    # Versions are processed in parallel, they share the bandwidth limit.
+    nb_workers, max_bandwidth = get_download_speed_options(opt)
+    bandwidth_limiter = BandwidthLimiter(max_bandwidth * 1000000) if max_bandwidth else None
+    with ThreadPoolExecutor(max_workers=nb_workers) as executor:
+        futures = {
+            doi: executor.submit(download_specific_frames_for_version, doi, frames, path_output, path_frame_folder_output, bandwidth_limiter)
+            for doi, frames in list_frames_by_doi.items() if doi != None
+        }
 
-            # Get session_name.
-            session_name = ""
+        for doi, future in futures.items():
             try:
-                for identifier_obj in version_json["metadata"]["alternate_identifiers"]:
-                    if "urn:" in identifier_obj["identifier"]:
-                        session_name = identifier_obj["identifier"].replace("urn:", "")
-                        break
+                future.result()
             except Exception:
-                pass
-
-            if session_name == "":
-                print("[WARNING] Cannot find session_name.")
-            
-            # Get the path between the session_name and the frame name.
-            session_manager = FactorySessionManager.get_session_manager(session_name, path_output)
-            frames_folder = session_manager.get_frame_parent_folder(frames)
-            frames_zipped_folder = f'{frames_folder.replace("/", "_")}.zip'
-            frames_name = [Path(frame).name for frame in frames]
-
-            # Get which folder to download.
-            file_to_download = []
-            for file in list_files:
-                if file["key"] == frames_zipped_folder:
-                    file_to_download.append(file)
-
-            # Download it.
-            download_manager_without_token(file_to_download, path_output, session_name, doi)
-
-            # Move frame.
-            for file in Path(path_output, session_name, frames_folder).iterdir():
-                if file.name not in frames_name: continue # Move only frame in csv file.
-                shutil.move(file, Path(path_frame_folder_output, file.name))
+                print(traceback.format_exc(), end="\n\n")
 
-            # Remove folder.
-            shutil.rmtree(Path(path_output, session_name))
-
-        except Exception:
-            print(traceback.format_exc(), end="\n\n")
-
-            sessions_fail.append(doi)
+                sessions_fail.append(doi)
     
     # Stat
     print("\nEnd of process. On {} sessions, {} fails. ".format(len(list_frames_by_doi), len(sessions_fail)))
     if (len(sessions_fail)):
         [print(f"\t* {doi} failed") for  doi in sessions_fail]
-    return
\ No newline at end of file
+    return
+
+
+def download_specific_frames_for_version(doi: str, frames: list[str], path_output: Path, path_frame_folder_output: Path, 
+                                         bandwidth_limiter: BandwidthLimiter | None) -> None:
+    """ 
+        Extract frames of a version from the remote frames zip, only the zip central directory and the frames are downloaded.
+        Versions run in parallel, so each version works in its own temporary folder.
+    """
+    version_json = get_version_from_doi(doi)
+    if version_json == {} or "files" not in version_json:
+        return
+    list_files = version_json["files"]
+
+    # Continue if no files to download due to access_right not open.
+    if len(list_files) == 0 and version_json["metadata"]["access_right"] != "open":
+        print("[WARNING] No files to download, version is not open.")
+        return
+    
+    # In case we get a conceptrecid from the user, get doi
+    doi = version_json["id"]
+
+    # Get session_name.
+    session_name = ""
+    try:
+        for identifier_obj in version_json["metadata"]["alternate_identifiers"]:
+            if "urn:" in identifier_obj["identifier"]:
+                session_name = identifier_obj["identifier"].replace("urn:", "")
+                break
+    except Exception:
+        pass
+
+    if session_name == "":
+        print("[WARNING] Cannot find session_name.")
+    
+    path_version_tmp = Path(path_output, f"tmp_{doi}")
+    try:
+        extract_frames_for_version(doi, session_name, frames, list_files, path_version_tmp, path_frame_folder_output, bandwidth_limiter)
+    finally:
+        shutil.rmtree(path_version_tmp, ignore_errors=True)
+
+
+def extract_frames_for_version(doi: str, session_name: str, frames: list[str], list_files: list, path_version_tmp: Path, 
+                               path_frame_folder_output: Path, bandwidth_limiter: BandwidthLimiter | None) -> None:
+    """ Extract frames from the remote zip, or download the zip in path_version_tmp and move frames. """
+
+    # Get the path between the session_name and the frame name.
+    session_manager = FactorySessionManager.get_session_manager(session_name, path_version_tmp)
+    frames_folder = session_manager.get_frame_parent_folder(frames)
+    frames_zipped_folder = f'{frames_folder.replace("/", "_")}.zip'
+    frames_name = [Path(frame).name for frame in frames]
+
+    # Get which folder to download.
+    file_to_download = []
+    for file in list_files:
+        if file["key"] == frames_zipped_folder:
+            file_to_download.append(file)
+    
+    if len(file_to_download) == 0:
+        raise NameError(f"Archive {frames_zipped_folder} not found in version {doi}, {len(frames_name)} frames not downloaded.")
+
+    # Frames are stored at the root of the zip.
+    try:
+        extracted = []
+        for file in file_to_download:
+            url = f"{ZENODO_LINK_WITHOUT_TOKEN}/{doi}/files/{file['key']}/content"
+            extracted += extract_remote_zip(url, path_frame_folder_output, frames_name, bandwidth_limiter=bandwidth_limiter)
+        print_missing_frames(doi, frames_name, extracted)
+        return
+    except (NameError, zipfile.BadZipFile, requests.RequestException):
+        print(f"[WARNING] Cannot read frames from remote zip for {doi}, we download the archive.")
+
+    # Download it.
+    download_manager_without_token(file_to_download, path_version_tmp, session_name, doi, bandwidth_limiter=bandwidth_limiter)
+
+    # Move frame.
+    moved = []
+    for file in Path(path_version_tmp, session_name, frames_folder).iterdir():
+        if file.name not in frames_name: continue # Move only frame in csv file.
+        shutil.move(file, Path(path_frame_folder_output, file.name))
+        moved.append(file.name)
+    print_missing_frames(doi, frames_name, moved)
+
+
+def print_missing_frames(doi: str, frames_name: list[str], extracted: list[str]) -> None:
+    """ Warn about requested frames which are not in the archive. """
+    missing = sorted(set(frames_name) - set(extracted))
+    if len(missing) == 0: return
+    print(f"[WARNING] {len(missing)} frames on {len(frames_name)} not found in version {doi}: {', '.join(missing)}")
@@ -1,48 +1,104 @@
 import os
 import time
-import requests
+import hashlib
+import threading
 import traceback
 from pathlib import Path
 
 from tqdm import tqdm
 from tqdm.utils import CallbackIOWrapper
 
-from ..utils.constants import MAX_RETRY_TO_UPLOAD_DOWNLOAD_FILE
+from .za_http_client import HTTPClient, TokenBucket
+from ..utils.constants import MAX_RETRY_TO_UPLOAD_DOWNLOAD_FILE, DOWNLOAD_CHUNK_SIZE, DOWNLOAD_TIMEOUT, DOWNLOAD_BACKOFF_BASE, DOWNLOAD_BACKOFF_MAX
+
+
+class BandwidthLimiter(TokenBucket):
+    """ Token bucket shared between download threads to keep the global rate under max_bytes_per_second. """
+
+    def __init__(self, max_bytes_per_second: float) -> None:
+        super().__init__(max_bytes_per_second)
+
+
+def file_downloader(url: str, output_file: Path, params: dict = {}, bandwidth_limiter: BandwidthLimiter | None = None, 
+                    stop_event: threading.Event | None = None) -> str:
+    """ 
+        Download file at output_file path. Return md5 checksum of the file, computed during download.
+        Data go in a .part file with the number of bytes written in a .part.offset file, a failed download resume with a range request.
+        The download is stopped between two chunks when stop_event is set, the .part file is kept to resume later.
+    """
+    part_file, offset_file = Path(f"{output_file}.part"), Path(f"{output_file}.part.offset")
+
+    # Resume a download stopped in a previous run, bytes already written are hashed again.
+    offset, hash_md5 = 0, hashlib.md5()
+    if part_file.exists() and offset_file.exists() and offset_file.read_text().isnumeric():
+        offset = min(int(offset_file.read_text()), part_file.stat().st_size)
+        with open(part_file, "rb") as file:
+            while offset > file.tell() and (data := file.read(min(DOWNLOAD_CHUNK_SIZE, offset - file.tell()))):
+                hash_md5.update(data)
+        print(f"Resume download of {output_file.name} at byte {offset}.")
 
-def file_downloader(url: str, output_file: Path, params: dict = {}) -> None:
-    """ Download file at output_file path. """
     isDownload, max_try = False, 0
     while not isDownload:
         try:
-            r = requests.get(f"{url}", stream=True, params=params)
-            total = int(r.headers.get('content-length', 0))
+            headers = {"Range": f"bytes={offset}-"} if offset else {}
+            with HTTPClient().get(f"{url}", stream=True, params=params, headers=headers, timeout=DOWNLOAD_TIMEOUT) as r:
+                if r.status_code == 416: # Nothing after offset, file is complete.
+                    break
+                if r.status_code in [401, 403, 404, 410]:
+                    raise NameError(f"Cannot download {url}, we get error {r.status_code}")
+                r.raise_for_status()
+
+                # Server doesn't support range, start from the beginning.
+                if offset and r.status_code != 206:
+                    offset, hash_md5 = 0, hashlib.md5()
+
+                total = offset + int(r.headers.get('content-length', 0))
+                with open(part_file, 'r+b' if offset else 'wb') as file, tqdm(total=total, initial=offset, unit='B', unit_scale=True, desc=output_file.name) as bar:
+                    file.seek(offset)
+                    file.truncate()
+                    for data in r.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                        if stop_event != None and stop_event.is_set():
+                            raise NameError(f"Stop download of {output_file.name}")
+                        size = file.write(data)
+                        hash_md5.update(data)
+                        offset += size
+
+                        file.flush()
+                        offset_file.write_text(str(offset))
 
-            with open(output_file, 'wb') as file, tqdm(total=total, unit='B', unit_scale=True) as bar:
-                for data in r.iter_content(chunk_size=1000):
-                    size = file.write(data)
-                    bar.update(size)
+                        bar.update(size)
+                        if bandwidth_limiter != None:
+                            bandwidth_limiter.consume(size)
             
             isDownload = True
         except KeyboardInterrupt:
             raise NameError("Stop iteration")
+        except NameError:
+            raise
         except:
             print(traceback.format_exc(), end="\n\n")
             max_try += 1
             if max_try >= MAX_RETRY_TO_UPLOAD_DOWNLOAD_FILE: raise NameError("Abort due to max try")
-            time.sleep(0.5)
+            time.sleep(min(DOWNLOAD_BACKOFF_MAX, DOWNLOAD_BACKOFF_BASE * 2 ** (max_try - 1)))
+    
+    os.replace(part_file, output_file)
+    offset_file.unlink(missing_ok=True)
+    return hash_md5.hexdigest()
 
 
-def file_uploader(url: str, file: Path, params: dict) -> None:
-    """ Upload file to url"""
+def file_uploader(url: str, file: Path, params: dict) -> str | None:
+    """ Upload file to url. Return the md5 checksum computed by the server if provided. """
     isSend, max_try = False, 0
     while not isSend:
         try:
             print(f"Try number {max_try} on {MAX_RETRY_TO_UPLOAD_DOWNLOAD_FILE}")
             file_size = os.stat(file).st_size
             with open(file, "rb") as f:
-                with tqdm(total=file_size, unit="B", unit_scale=True) as t:
+                with tqdm(total=file_size, unit="B", unit_scale=True, desc=file.name) as t:
                     wrapped_file = CallbackIOWrapper(t.update, f, "read")
-                    requests.put(f"{url}/{file.name}", data=wrapped_file, params=params)
+                    r = HTTPClient().put(f"{url}/{file.name}", data=wrapped_file, params=params, timeout=(DOWNLOAD_TIMEOUT, None), max_retry=0)
+            if r.status_code >= 400:
+                raise NameError(f"Upload of {file.name} failed with status {r.status_code}")
             isSend = True
         except KeyboardInterrupt:
             raise NameError("Stop upload")
@@ -50,4 +106,9 @@ def file_uploader(url: str, file: Path, params: dict) -> None:
             print(traceback.format_exc(), end="\n\n")
             max_try += 1
             if max_try >= MAX_RETRY_TO_UPLOAD_DOWNLOAD_FILE: raise NameError("Abort due to max try")
-            time.sleep(0.5)
\ No newline at end of file
+            time.sleep(min(DOWNLOAD_BACKOFF_MAX, DOWNLOAD_BACKOFF_BASE * 2 ** (max_try - 1)))
+    
+    try:
+        return r.json().get("checksum", "").replace("md5:", "") or None
+    except ValueError:
+        return None
@@ -0,0 +1,205 @@
+import os
+import re
+import time
+import requests
+import threading
+from urllib.parse import urlparse
+from email.utils import parsedate_to_datetime
+from requests.adapters import HTTPAdapter
+
+from ..utils.constants import HTTP_TIMEOUT, HTTP_POOL_SIZE, HTTP_MAX_RETRY, HTTP_RETRY_STATUS, HTTP_RATE_LIMITS, DOWNLOAD_BACKOFF_BASE, DOWNLOAD_BACKOFF_MAX
+
+IDEMPOTENT_METHODS = ["GET", "HEAD", "PUT", "DELETE", "OPTIONS"]
+
+
+class TokenBucket:
+    """ Token bucket shared between threads, refilled with rate tokens by sec up to capacity. """
+
+    def __init__(self, rate: float, capacity: float | None = None) -> None:
+        self.rate = rate
+        self.capacity = rate if capacity == None else capacity
+        self.available = self.capacity
+        self.last_time = time.monotonic()
+        self.lock = threading.Lock()
+
+
+    def consume(self, nb_tokens: float = 1) -> None:
+        """ Take nb_tokens from the bucket, wait if the bucket is empty. """
+        with self.lock:
+            now = time.monotonic()
+            self.available = min(self.capacity, self.available + (now - self.last_time) * self.rate) - nb_tokens
+            self.last_time = now
+            wait = -self.available / self.rate if self.available < 0 else 0
+
+        if wait > 0:
+            time.sleep(wait)
+
+
+class HTTPClient:
+    """
+        Shared http client: keep-alive connections pool, default timeout, rate limit by host,
+        retry with exponential backoff respecting Retry-After, and metrics by endpoint.
+    """
+    _instance = None
+    _instance_lock = threading.Lock() # First calls can come from download workers.
+
+    def __new__(cls, *args, **kwargs):
+        with cls._instance_lock:
+            if cls._instance is None:
+                instance = super().__new__(cls, *args, **kwargs)
+                instance._session = instance._new_session()
+                instance._rate_limiters = {host: TokenBucket(rate, burst) for host, (rate, burst) in HTTP_RATE_LIMITS.items()}
+                instance._paused_until = {}
+                instance._metrics = {}
+                instance._lock = threading.Lock()
+                cls._instance = instance
+        return cls._instance
+
+
+    def _new_session(self) -> requests.Session:
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        return session
+
+
+    def _forget_session_after_fork(self):
+        """ Pooled sockets cannot be shared with a forked process, child process opens new connections. """
+        self._session = self._new_session()
+        self._lock = threading.Lock()
+
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request("GET", url, **kwargs)
+
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request("POST", url, **kwargs)
+
+
+    def put(self, url: str, **kwargs) -> requests.Response:
+        return self.request("PUT", url, **kwargs)
+
+
+    def delete(self, url: str, **kwargs) -> requests.Response:
+        return self.request("DELETE", url, **kwargs)
+
+
+    def request(self, method: str, url: str, max_retry: int = HTTP_MAX_RETRY, **kwargs) -> requests.Response:
+        """
+            Same as requests.request. Status in HTTP_RETRY_STATUS are retried, connection errors only for idempotent methods.
+            Use max_retry=0 when data is a stream which cannot be sent twice.
+        """
+        kwargs.setdefault("timeout", HTTP_TIMEOUT)
+        host, endpoint = urlparse(url).hostname, self.get_endpoint(method, url)
+
+        nb_try = 0
+        while True:
+            self.__wait_rate_limit(host)
+
+            start = time.monotonic()
+            try:
+                r = self._session.request(method, url, **kwargs)
+            except requests.RequestException:
+                self.__add_metric(endpoint, time.monotonic() - start, isError=True, isRetry=nb_try > 0)
+                if nb_try >= max_retry or method not in IDEMPOTENT_METHODS: raise
+                nb_try += 1
+                time.sleep(self.get_backoff(nb_try))
+                continue
+
+            self.__add_metric(endpoint, time.monotonic() - start, isError=r.status_code >= 400, isRetry=nb_try > 0)
+            self.__update_pause(host, r)
+
+            # 429 is never processed by the server so all methods can be retried.
+            canRetry = r.status_code == 429 or r.status_code in HTTP_RETRY_STATUS and method in IDEMPOTENT_METHODS
+            if not canRetry or nb_try >= max_retry:
+                return r
+
+            nb_try += 1
+            wait = self.get_retry_after(r)
+            wait = self.get_backoff(nb_try) if wait == None else wait
+            print(f"[WARNING] {endpoint} answered {r.status_code}, retry {nb_try}/{max_retry} in {wait:.1f} sec.")
+            r.close()
+            time.sleep(wait)
+
+
+    def get_metrics(self) -> dict:
+        """ Return a copy of metrics by endpoint: nb_requests, nb_errors, nb_retries, total_time, max_time. """
+        with self._lock:
+            return {endpoint: dict(metric) for endpoint, metric in self._metrics.items()}
+
+
+    def print_metrics(self) -> None:
+        """ Print a summary of requests by endpoint. """
+        metrics = self.get_metrics()
+        if len(metrics) == 0: return
+
+        print("\n-- Http requests by endpoint:")
+        for endpoint, m in sorted(metrics.items(), key=lambda item: -item[1]["nb_requests"]):
+            print(f"{endpoint}: {m['nb_requests']} requests, {m['nb_errors']} errors, {m['nb_retries']} retries, " \
+                  f"mean {m['total_time'] / m['nb_requests']:.3f} sec, max {m['max_time']:.3f} sec")
+
+
+    @staticmethod
+    def get_endpoint(method: str, url: str) -> str:
+        """ Endpoint of an url, path segments with ids or file names are replaced by *. """
+        parsed_url = urlparse(url)
+        path = "/".join(re.sub(r".*[\d.].*", "*", segment) for segment in parsed_url.path.split("/"))
+        return f"{method} {parsed_url.hostname}{path}"
+
+
+    @staticmethod
+    def get_backoff(nb_try: int) -> float:
+        return min(DOWNLOAD_BACKOFF_MAX, DOWNLOAD_BACKOFF_BASE * 2 ** (nb_try - 1))
+
+
+    @staticmethod
+    def get_retry_after(r: requests.Response) -> float | None:
+        """ Retry-After header in sec, it can be a number of sec or a date. """
+        retry_after = r.headers.get("Retry-After")
+        if retry_after == None: return None
+
+        if retry_after.strip().isnumeric():
+            return min(DOWNLOAD_BACKOFF_MAX, float(retry_after))
+        try:
+            return min(DOWNLOAD_BACKOFF_MAX, max(0, parsedate_to_datetime(retry_after).timestamp() - time.time()))
+        except (TypeError, ValueError):
+            return None
+
+
+    def __wait_rate_limit(self, host: str | None) -> None:
+        """ Wait the end of a pause asked by the server, then take a token in the host bucket. """
+        wait = self._paused_until.get(host, 0) - time.time()
+        if wait > 0:
+            time.sleep(min(DOWNLOAD_BACKOFF_MAX, wait))
+
+        if host in self._rate_limiters:
+            self._rate_limiters[host].consume()
+
+
+    def __update_pause(self, host: str | None, r: requests.Response) -> None:
+        """ Zenodo send the number of remaining requests in the window and the window reset time. """
+        remaining, reset = r.headers.get("X-RateLimit-Remaining"), r.headers.get("X-RateLimit-Reset")
+        if remaining == "0" and reset != None and reset.isnumeric():
+            self._paused_until[host] = int(reset)
+
+
+    def __add_metric(self, endpoint: str, duration: float, isError: bool, isRetry: bool) -> None:
+        with self._lock:
+            metric = self._metrics.setdefault(endpoint, {"nb_requests": 0, "nb_errors": 0, "nb_retries": 0, "total_time": 0.0, "max_time": 0.0})
+            metric["nb_requests"] += 1
+            metric["nb_errors"] += int(isError)
+            metric["nb_retries"] += int(isRetry)
+            metric["total_time"] += duration
+            metric["max_time"] = max(metric["max_time"], duration)
+
+
+def _forget_session_after_fork():
+    """ Registered once for the module, reset the current instance in the child process. """
+    HTTPClient._instance_lock = threading.Lock()
+    if HTTPClient._instance is not None:
+        HTTPClient._instance._forget_session_after_fork()
+
+
+os.register_at_fork(after_in_child=_forget_session_after_fork)
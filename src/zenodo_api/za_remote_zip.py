@@ -0,0 +1,111 @@
+import io
+import time
+import zipfile
+import traceback
+from pathlib import Path
+
+from .za_http_client import HTTPClient
+from .za_base_function import BandwidthLimiter
+from ..utils.constants import MAX_RETRY_TO_UPLOAD_DOWNLOAD_FILE, DOWNLOAD_TIMEOUT, DOWNLOAD_BACKOFF_BASE, DOWNLOAD_BACKOFF_MAX, REMOTE_ZIP_BUFFER_SIZE
+
+
+class HttpRangeFile(io.RawIOBase):
+    """
+        Read only seekable file over http, each read is a range request.
+        Bytes are read by block of buffer_size so zipfile can read consecutive members with few requests.
+    """
+
+    def __init__(self, url: str, params: dict = {}, buffer_size: int = REMOTE_ZIP_BUFFER_SIZE, bandwidth_limiter: BandwidthLimiter | None = None) -> None:
+        super().__init__()
+        self.params = params
+        self.buffer_size = buffer_size
+        self.bandwidth_limiter = bandwidth_limiter
+        self.position = 0
+        self.buffer, self.buffer_start = b"", 0
+
+        # Ask one byte to get file size and check range support, redirection is followed only once.
+        r = HTTPClient().get(url, params=params, headers={"Range": "bytes=0-0"}, timeout=DOWNLOAD_TIMEOUT)
+        if r.status_code != 206 or "Content-Range" not in r.headers:
+            raise NameError(f"Server doesn't support range requests for {url}, we get status {r.status_code}")
+        self.url = r.url
+        self.size = int(r.headers["Content-Range"].split("/")[-1])
+        self.nb_requests, self.nb_bytes_fetched = 1, 0
+
+
+    def readable(self) -> bool:
+        return True
+
+
+    def seekable(self) -> bool:
+        return True
+
+
+    def tell(self) -> int:
+        return self.position
+
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_SET:
+            self.position = offset
+        elif whence == io.SEEK_CUR:
+            self.position += offset
+        elif whence == io.SEEK_END:
+            self.position = self.size + offset
+        return self.position
+
+
+    def readinto(self, b) -> int:
+        """ Fill b until it's full or end of file, zipfile doesn't retry a short read of a header. """
+        nb_read = 0
+        while nb_read < len(b) and self.position < self.size:
+            # Refill buffer if position is not inside.
+            if not (self.buffer_start <= self.position < self.buffer_start + len(self.buffer)):
+                self.buffer_start = self.position
+                self.buffer = self.__fetch(self.position, min(self.size, self.position + max(len(b) - nb_read, self.buffer_size)) - 1)
+
+            start = self.position - self.buffer_start
+            data = self.buffer[start:start + len(b) - nb_read]
+            b[nb_read:nb_read + len(data)] = data
+            self.position += len(data)
+            nb_read += len(data)
+        return nb_read
+
+
+    def __fetch(self, start: int, end: int) -> bytes:
+        """ Get bytes from start to end included, retry on error. """
+        max_try = 0
+        while True:
+            try:
+                r = HTTPClient().get(self.url, params=self.params, headers={"Range": f"bytes={start}-{end}"}, timeout=DOWNLOAD_TIMEOUT)
+                if r.status_code != 206:
+                    raise NameError(f"Range request on {self.url} failed with status {r.status_code}")
+                self.nb_requests += 1
+                self.nb_bytes_fetched += len(r.content)
+                if self.bandwidth_limiter != None:
+                    self.bandwidth_limiter.consume(len(r.content))
+                return r.content
+            except KeyboardInterrupt:
+                raise NameError("Stop iteration")
+            except:
+                print(traceback.format_exc(), end="\n\n")
+                max_try += 1
+                if max_try >= MAX_RETRY_TO_UPLOAD_DOWNLOAD_FILE: raise NameError("Abort due to max try")
+                time.sleep(min(DOWNLOAD_BACKOFF_MAX, DOWNLOAD_BACKOFF_BASE * 2 ** (max_try - 1)))
+
+
+def extract_remote_zip(url: str, output_folder: Path, members: list[str] | None = None, params: dict = {}, bandwidth_limiter: BandwidthLimiter | None = None) -> list[str]:
+    """
+        Extract members of a remote zip without downloading the archive, only the central directory and the members are fetched.
+        All members are extracted if members is None. Return the list of extracted members.
+    """
+    remote_file = HttpRangeFile(url, params, bandwidth_limiter=bandwidth_limiter)
+    with zipfile.ZipFile(remote_file) as zip_ref:
+        members = None if members == None else set(members)
+        infos = [info for info in zip_ref.infolist() if members == None or info.filename in members]
+
+        # Archive order, consecutive members are in the same buffer.
+        for info in sorted(infos, key=lambda info: info.header_offset):
+            zip_ref.extract(info, output_folder)
+
+    print(f"Extract {len(infos)} members from {url} with {remote_file.nb_requests} requests and {remote_file.nb_bytes_fetched} bytes.")
+    return [info.filename for info in infos]
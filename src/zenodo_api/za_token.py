@@ -1,14 +1,15 @@
 import json
 import shutil
 import zipfile
-import requests
 from pathlib import Path
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
 
 from .za_error import ZenodoErrorHandler, ParsingReturnType
+from .za_http_client import HTTPClient
+from .za_upload_journal import UploadJournal
 from .za_base_function import file_downloader, file_uploader
-from ..utils.lib_tools import md5
-from ..utils.constants import NB_VERSION_TO_FETCH
+from ..utils.constants import NB_VERSION_TO_FETCH, MAX_CHECKSUM_RETRY, UPLOAD_NB_WORKERS
 
 class ZenodoAPI:
     
@@ -34,51 +35,65 @@ class ZenodoAPI:
             session_tmp_folder: Upload all file in tmp folder
         """
         print("-- Upload raw data... ")
+        journal, kind, version = UploadJournal(session_tmp_folder), "new_deposit", metadata.get("metadata", {}).get("version")
  
-        # Try to add record (file) to this deposit.
-        bucket_url = self.__zenodo_new_deposit()
+        # Continue in the draft of a crashed upload, or add record (file) to a new deposit.
+        bucket_url = self.__resume_draft(journal, kind, version)
+        if bucket_url == None:
+            bucket_url = self.__zenodo_new_deposit()
+            journal.set_draft(self.deposit_id, bucket_url, kind, version)
 
         # Upload files.
-        self.__zenodo_upload_files(session_tmp_folder, bucket_url)
+        self.__zenodo_upload_files(session_tmp_folder, bucket_url, journal)
 
         # Add metadata.
         self.__zenodo_send_metadata(metadata)
 
         # Publish version.
         self.__zenodo_actions_publish()
+        journal.delete()
 
 
     def add_new_version_to_deposit(self, temp_folder: Path, metadata: dict, 
                                    restricted_files: list = [], dontUploadWhenLastVersionIsProcessedData: bool = False) -> None:
         """ Create a new version of a deposit"""
         print("-- Upload new data for existing version... ")
-        # Get actual state of the deposit.
-        deposit = self.__get_single_deposit()
+        journal, kind, version = UploadJournal(temp_folder), "new_version", metadata.get("metadata", {}).get("version")
 
-        # If a version is currently edited, we discard change to create a new one.
-        if deposit["state"] == "unsubmitted" and deposit["submitted"] == False or deposit["state"] == "inprogress" and deposit["submitted"] == True:
-            self.__zenodo_actions_discard()
-            self.set_deposit_id()
-        
-        if dontUploadWhenLastVersionIsProcessedData: #!FIXME To delete when finishing to upload all data
+        # Continue in the draft of a crashed upload of this folder with the same version.
+        bucket_url = self.__resume_draft(journal, kind, version)
+        if bucket_url == None:
+            # Get actual state of the deposit.
             deposit = self.__get_single_deposit()
-            if "PROCESSED_DATA" in deposit["metadata"]["version"]:
-                raise NameError(f"We already have a processed data version: https://zenodo.org/records/{self.deposit_id}")
-        
-        # Create a new version.
-        bucket_url = self.__zenodo_actions_newversion()
+
+            # If a version is currently edited, we discard change to create a new one.
+            if deposit["state"] == "unsubmitted" and deposit["submitted"] == False or deposit["state"] == "inprogress" and deposit["submitted"] == True:
+                self.__zenodo_actions_discard()
+                self.set_deposit_id()
+            
+            if dontUploadWhenLastVersionIsProcessedData: #!FIXME To delete when finishing to upload all data
+                deposit = self.__get_single_deposit()
+                if "PROCESSED_DATA" in deposit["metadata"]["version"]:
+                    raise NameError(f"We already have a processed data version: https://zenodo.org/records/{self.deposit_id}")
+            
+            # Create a new version.
+            bucket_url = self.__zenodo_actions_newversion()
+            journal.set_draft(self.deposit_id, bucket_url, kind, version)
         
         # Remove restricted file.
-        self.__remove_restricted_files(restricted_files)
+        if not journal.restricted_files_removed:
+            self.__remove_restricted_files(restricted_files)
+            journal.set_restricted_files_removed()
 
         # Upload new files.
-        self.__zenodo_upload_files(temp_folder, bucket_url)
+        self.__zenodo_upload_files(temp_folder, bucket_url, journal)
 
         # Update metadata.
         self.__zenodo_send_metadata(metadata)
         
         # Publish.
         self.__zenodo_actions_publish()
+        journal.delete()
 
 
     def edit_metadata(self, metadata: dict) -> None:
@@ -109,7 +124,7 @@ class ZenodoAPI:
             try:
                 if deposit["state"] == "unsubmitted" and deposit["submitted"] == False and deposit["title"] == "":
                     print(f"\nDelete draft version {deposit['id']}")
-                    r2 = requests.post(deposit["links"]["discard"], params=self.params, json={}, headers=self.headers)
+                    r2 = HTTPClient().post(deposit["links"]["discard"], params=self.params, json={}, headers=self.headers)
                     ZenodoErrorHandler.parse(r2, ParsingReturnType.ALL)
 
             except:
@@ -126,14 +141,14 @@ class ZenodoAPI:
     # Simple operation on deposit.
     def __get_single_deposit(self) -> dict:
         """ Get data from a deposit. """
-        r = requests.get(f"{self.ZENODO_LINK}/{self.deposit_id}?access_token={self.ACCESS_TOKEN}")
+        r = HTTPClient().get(f"{self.ZENODO_LINK}/{self.deposit_id}?access_token={self.ACCESS_TOKEN}")
         self.deposit_id = r.json()["id"]
         return r.json()
 
 
     def list_files(self) -> dict:
         """ List all files for a session. """
-        return requests.get(f"{self.ZENODO_LINK}/{self.deposit_id}/files?access_token={self.ACCESS_TOKEN}").json()
+        return HTTPClient().get(f"{self.ZENODO_LINK}/{self.deposit_id}/files?access_token={self.ACCESS_TOKEN}").json()
 
 
     def zenodo_download_files(self, output_folder: Path) -> None:
@@ -147,13 +162,18 @@ class ZenodoAPI:
 
             path_tmp_file = Path(path_zip_session, file["filename"])
             print(f"\nWorking with: {path_tmp_file}")
-            file_downloader(file["links"]["download"], path_tmp_file, self.params)
+            checksum = file_downloader(file["links"]["download"], path_tmp_file, self.params)
 
             # Retry while checksum is different.
-            while md5(path_tmp_file) != file["checksum"]:
-                print(f"[WARNING] Checksum error when downloading {path_tmp_file}. We retry.")
+            nb_checksum_error = 0
+            while checksum != file["checksum"]:
+                nb_checksum_error += 1
                 path_tmp_file.unlink()
-                file_downloader(file["links"]["download"], path_tmp_file, self.params)
+                if nb_checksum_error > MAX_CHECKSUM_RETRY:
+                    raise NameError(f"Checksum error when downloading {path_tmp_file}, abort after {MAX_CHECKSUM_RETRY} retries.")
+                
+                print(f"[WARNING] Checksum error when downloading {path_tmp_file}. We retry.")
+                checksum = file_downloader(file["links"]["download"], path_tmp_file, self.params)
 
             # Extract file in directory.
             path_to_unzip_or_move = Path(output_folder, self.session_name)
@@ -206,14 +226,32 @@ class ZenodoAPI:
             file_name = file["filename"].replace(".zip", "").replace("PROCESSED_DATA_", "") # Remove .zip and middle folder name.
             for f in restricted_files: 
                 if f in file_name: # Exemple: DCIM in DCIM_2
-                    requests.delete(f'{self.ZENODO_LINK}/{self.deposit_id}/files/{file["id"]}', params={'access_token': self.ACCESS_TOKEN})
+                    HTTPClient().delete(f'{self.ZENODO_LINK}/{self.deposit_id}/files/{file["id"]}', params={'access_token': self.ACCESS_TOKEN})
                     continue # Get out of for because no need to check extra match if we have already delete file
         
 
+    def __resume_draft(self, journal: UploadJournal, kind: str, version: str | None) -> str | None:
+        """ Return bucket_url of the draft recorded in the journal if it's still editable and for the same upload, else None. """
+        if journal.deposit_id == None: return None
+
+        if not journal.is_same_upload(kind, version):
+            print(f"[WARNING] Draft {journal.deposit_id} was for a {journal.kind} upload of version {journal.version}, not {kind} of version {version}. We start a new one.")
+            return None
+
+        r = HTTPClient().get(f"{self.ZENODO_LINK}/{journal.deposit_id}", params=self.params)
+        if r.status_code != 200 or r.json().get("state") == "done":
+            print(f"[WARNING] Draft {journal.deposit_id} of previous upload is not available anymore, we start a new one.")
+            return None
+        
+        print(f"Resume {kind} upload of version {version} in draft {journal.deposit_id}, files already uploaded: {', '.join(sorted(journal.uploaded)) or 'none'}.")
+        self.deposit_id = journal.deposit_id
+        return r.json()["links"].get("bucket", journal.bucket_url)
+
+
     def __zenodo_new_deposit(self) -> str:
         """ Create a new deposit. """
         print("Create new deposit")
-        r = requests.post(self.ZENODO_LINK, params=self.params, json={}, headers=self.headers)
+        r = HTTPClient().post(self.ZENODO_LINK, params=self.params, json={}, headers=self.headers)
         self.deposit_id = ZenodoErrorHandler.parse(r)
         return r.json()["links"]["bucket"]
 
@@ -221,14 +259,14 @@ class ZenodoAPI:
     def __zenodo_actions_discard(self) -> None:
         """ Discard change of current version. """
         print("Discard change of current version")
-        r = requests.post(f"{self.ZENODO_LINK}/{self.deposit_id}/actions/discard", params=self.params, json={}, headers=self.headers)
+        r = HTTPClient().post(f"{self.ZENODO_LINK}/{self.deposit_id}/actions/discard", params=self.params, json={}, headers=self.headers)
         ZenodoErrorHandler.parse(r)
 
 
     def __zenodo_actions_newversion(self) -> str:
         """ Create new version. Return the bucket_url to upload new files. """
         print("Create new version.")
-        r = requests.post(f"{self.ZENODO_LINK}/{self.deposit_id}/actions/newversion", params=self.params, json={}, headers=self.headers)
+        r = HTTPClient().post(f"{self.ZENODO_LINK}/{self.deposit_id}/actions/newversion", params=self.params, json={}, headers=self.headers)
         self.deposit_id = ZenodoErrorHandler.parse(r)
         return r.json()["links"]["bucket"]
 
@@ -236,20 +274,20 @@ class ZenodoAPI:
     def __zenodo_actions_edit(self) -> None:
         """ Edit current version. """
         print("Edit current version.")
-        r = requests.post(f"{self.ZENODO_LINK}/{self.deposit_id}/actions/edit", params=self.params, json={}, headers=self.headers)
+        r = HTTPClient().post(f"{self.ZENODO_LINK}/{self.deposit_id}/actions/edit", params=self.params, json={}, headers=self.headers)
         ZenodoErrorHandler.parse(r)
     
 
     def __zenodo_actions_publish(self) -> None:
         """ Publish current version. Warning cannot remove file after publish. """
-        r = requests.post(f"{self.ZENODO_LINK}/{self.deposit_id}/actions/publish", params={'access_token': self.ACCESS_TOKEN})
+        r = HTTPClient().post(f"{self.ZENODO_LINK}/{self.deposit_id}/actions/publish", params={'access_token': self.ACCESS_TOKEN})
         self.deposit_id = ZenodoErrorHandler.parse(r)
         print("Version publish.")
 
 
     def __zenodo_send_metadata(self, metadata: dict) -> None:
         """ Upload metadata for a zenodo version. """
-        r = requests.put(f'{self.ZENODO_LINK}/{self.deposit_id}',
+        r = HTTPClient().put(f'{self.ZENODO_LINK}/{self.deposit_id}',
                         params=self.params,
                         data=json.dumps(metadata),
                         headers=self.headers
@@ -257,22 +295,58 @@ class ZenodoAPI:
         ZenodoErrorHandler.parse(r)
 
 
-    def __zenodo_upload_files(self, tmp_folder: Path, bucket_url: str) -> None:
-        """ Upload a folder of file to specific version. Warning, don't check if the total size is < 50 Go (Zenodo limit)"""
+    def __zenodo_upload_files(self, tmp_folder: Path, bucket_url: str, journal: UploadJournal) -> None:
+        """ 
+            Upload a folder of file to specific version. Warning, don't check if the total size is < 50 Go (Zenodo limit)
+            Files already in the draft with the same checksum are skipped, others are sent in parallel.
+        """
         print("Uploading new file")
        
         if not Path.exists(tmp_folder) or not tmp_folder.is_dir():
             print("\t[WARNING] TMP folder not found")
             return
         
-        for file in tmp_folder.iterdir():
-            print(f"Send file {file.name}")
-            file_uploader(bucket_url, file, self.params)
+        remote_files = self.list_files()
+        remote_checksums = {f["filename"]: f["checksum"] for f in remote_files} if isinstance(remote_files, list) else {}
+
+        files_to_send = []
+        for file in sorted(tmp_folder.iterdir()):
+            # Zenodo is the reference, a file of the journal missing in the draft is sent again.
+            if file.name in journal.uploaded and remote_checksums.get(file.name) != journal.uploaded[file.name]:
+                print(f"[WARNING] File {file.name} was uploaded but is not in draft with the same checksum, we send it again.")
+            if remote_checksums.get(file.name) == journal.get_md5(file):
+                print(f"File {file.name} already uploaded, skip.")
+                journal.set_uploaded(file.name, remote_checksums[file.name])
+                continue
+            files_to_send.append(file)
+
+        with ThreadPoolExecutor(max_workers=UPLOAD_NB_WORKERS) as executor:
+            # Consume results to raise the first error.
+            list(executor.map(lambda file: self.__upload_file(bucket_url, file, journal), files_to_send))
+
+
+    def __upload_file(self, bucket_url: str, file: Path, journal: UploadJournal) -> None:
+        """ Send a file and check the checksum returned by zenodo. """
+        print(f"Send file {file.name}")
+        local_checksum = journal.get_md5(file)
+        checksum = file_uploader(bucket_url, file, self.params)
+
+        # Retry while checksum is different, missing checksum is trusted.
+        nb_checksum_error = 0
+        while checksum != None and checksum != local_checksum:
+            nb_checksum_error += 1
+            if nb_checksum_error > MAX_CHECKSUM_RETRY:
+                raise NameError(f"Checksum error when uploading {file.name}, abort after {MAX_CHECKSUM_RETRY} retries.")
+            
+            print(f"[WARNING] Checksum error when uploading {file.name}. We retry.")
+            checksum = file_uploader(bucket_url, file, self.params)
+
+        journal.set_uploaded(file.name, local_checksum)
 
 
     def get_conceptrecid_specific_deposit(self) -> int:
         """ Extract conceptrecid from a deposit"""
-        r = requests.get(f"{self.ZENODO_LINK}/{self.deposit_id}?access_token={self.ACCESS_TOKEN}")
+        r = HTTPClient().get(f"{self.ZENODO_LINK}/{self.deposit_id}?access_token={self.ACCESS_TOKEN}")
         return r.json()["conceptrecid"]
 
 
@@ -281,7 +355,7 @@ class ZenodoAPI:
         """ Find deposit id with identifiers equal to session_name. If more than one deposit have the same session_name return None """
 
         query = f'metadata.identifiers.identifier:"urn:{self.session_name}" metadata.related_identifiers.identifier:"urn:{self.session_name}"'
-        r = requests.get(self.ZENODO_LINK, params={'access_token': self.ACCESS_TOKEN, 'size': NB_VERSION_TO_FETCH, 'q': query})
+        r = HTTPClient().get(self.ZENODO_LINK, params={'access_token': self.ACCESS_TOKEN, 'size': NB_VERSION_TO_FETCH, 'q': query})
 
         if r.status_code == 404:
             raise NameError(f"Cannot access to {self.session_name}.")
@@ -298,7 +372,7 @@ class ZenodoAPI:
 
     def get_all_version_ids_for_deposit(self, conceptrecid: int, otherVersion: bool=False) -> tuple[list, list, list]:
         """ Return a list of ids for raw data version and a list of id for processed data version for a specific session"""
-        r = requests.get(self.ZENODO_LINK, params={'access_token': self.ACCESS_TOKEN, 'size': NB_VERSION_TO_FETCH, "all_versions": True, 'q': f"conceptrecid:{conceptrecid}"})
+        r = HTTPClient().get(self.ZENODO_LINK, params={'access_token': self.ACCESS_TOKEN, 'size': NB_VERSION_TO_FETCH, "all_versions": True, 'q': f"conceptrecid:{conceptrecid}"})
         if len(r.json()) == 0:
             raise NameError("No concept id found")
 
@@ -318,11 +392,11 @@ class ZenodoAPI:
     def get_conceptrecid_from_idOrConceptrecid(self, idOrConceptrecid: int) -> int | None:
         """ Return conceptrecid from doi who can be an id or a conceptrecid """
         # Try to check if it's an id
-        r = requests.get(f"{self.ZENODO_LINK}/{idOrConceptrecid}?access_token={self.ACCESS_TOKEN}")
+        r = HTTPClient().get(f"{self.ZENODO_LINK}/{idOrConceptrecid}?access_token={self.ACCESS_TOKEN}")
         if r.status_code == 200:
             return r.json()["conceptrecid"]
         
-        r = requests.get(self.ZENODO_LINK, params={'access_token': self.ACCESS_TOKEN, "all_versions": True, 'q': f"conceptrecid:{idOrConceptrecid}"})
+        r = HTTPClient().get(self.ZENODO_LINK, params={'access_token': self.ACCESS_TOKEN, "all_versions": True, 'q': f"conceptrecid:{idOrConceptrecid}"})
         if len(r.json()) > 0:
             return idOrConceptrecid
         
@@ -337,7 +411,7 @@ class ZenodoAPI:
         while need_to_fetch_more:
 
             start_t = datetime.now()
-            request = requests.get(self.ZENODO_LINK, params={"access_token": self.ACCESS_TOKEN, 'size': NB_VERSION_TO_FETCH, "all_versions": all_versions, "page": page})
+            request = HTTPClient().get(self.ZENODO_LINK, params={"access_token": self.ACCESS_TOKEN, 'size': NB_VERSION_TO_FETCH, "all_versions": all_versions, "page": page})
             
             print(f"Query time for page {page}: {datetime.now() - start_t} sec")
             if request.status_code == 200:
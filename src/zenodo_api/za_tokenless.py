@@ -1,51 +1,53 @@
 import shutil
 import zipfile
 import requests
+import threading
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
 
-from ..utils.lib_tools import md5
-from ..utils.constants import ZENODO_LINK_WITHOUT_TOKEN, MAX_RETRY_TO_UPLOAD_DOWNLOAD_FILE
+from ..utils.constants import ZENODO_LINK_WITHOUT_TOKEN, MAX_RETRY_TO_UPLOAD_DOWNLOAD_FILE, DOWNLOAD_NB_WORKERS, MAX_CHECKSUM_RETRY
 
-from .za_base_function import file_downloader
+from .za_http_client import HTTPClient
+from .za_base_function import file_downloader, BandwidthLimiter
+from .za_remote_zip import extract_remote_zip
 
 
 
-def download_manager_without_token(files: list, output_folder: Path, session_name: str, doi: str) -> None:
-    """ Manage to download files without token. """
+def download_manager_without_token(files: list, output_folder: Path, session_name: str, doi: str, 
+                                   nb_workers: int = DOWNLOAD_NB_WORKERS, max_bandwidth: float | None = None, stream_zip: bool = False,
+                                   bandwidth_limiter: BandwidthLimiter | None = None) -> None:
+    """ 
+        Manage to download files without token. Files are downloaded by nb_workers threads with a global max_bandwidth in MB/s,
+        each file is extracted while next files are downloading. A bandwidth_limiter shared with other downloads replace max_bandwidth.
+        With stream_zip, zip members are extracted from remote archives with range requests, archives are never written on disk.
+    """
     path_zip_session = Path(output_folder, session_name, "ZIP")
     path_zip_session.mkdir(exist_ok=True, parents=True)
 
-    for file in files:
+    if bandwidth_limiter == None and max_bandwidth:
+        bandwidth_limiter = BandwidthLimiter(max_bandwidth * 1000000)
+    stop_event = threading.Event()
 
-        path_tmp_file = Path(path_zip_session, file["key"])
-        url = f"{ZENODO_LINK_WITHOUT_TOKEN}/{doi}/files/{file['key']}/content"
-        print(f"\nWorking with: {path_tmp_file}")
-        file_downloader(url, path_tmp_file)
-
-        # Retry while checksum is different.
-        while md5(path_tmp_file) != file["checksum"].replace("md5:", ""):
-            print(f"[WARNING] Checksum error when downloading {path_tmp_file}. We retry.")
-            path_tmp_file.unlink()
-            file_downloader(url, path_tmp_file)
-
-        # Extract file in directory.
-        path_to_unzip_or_move = Path(output_folder, session_name)
-        if ".zip" not in file["key"]:
-            print(f"Move {path_tmp_file} to {path_to_unzip_or_move}.")
-            shutil.move(path_tmp_file, Path(path_to_unzip_or_move, file["key"]))
+    executor = ThreadPoolExecutor(max_workers=max(1, nb_workers))
+    futures = []
+    for file in files:
+        if stream_zip and ".zip" in file["key"]:
+            futures.append(executor.submit(stream_file_without_token, file, path_zip_session, Path(output_folder, session_name), doi, bandwidth_limiter, stop_event))
         else:
-            if "DCIM" in file["key"]:
-                path_to_unzip_or_move = Path(output_folder, session_name, "DCIM")
-            elif "PROCESSED_DATA" in file["key"]:
-                folder_name = file["key"].replace(".zip", "").replace("PROCESSED_DATA_", "")
-                path_to_unzip_or_move = Path(output_folder, session_name, "PROCESSED_DATA", folder_name)
-            else:
-                path_to_unzip_or_move = Path(output_folder, session_name, file["key"].replace(".zip", ""))
-            
-            print(f"Unzip {path_tmp_file} to {path_to_unzip_or_move}.")
-            with zipfile.ZipFile(path_tmp_file, 'r') as zip_ref:
-                zip_ref.extractall(path_to_unzip_or_move)
-            
+            futures.append(executor.submit(download_file_without_token, file, path_zip_session, doi, bandwidth_limiter, stop_event))
+
+    # Extract in files order to keep the same result as a sequential download.
+    try:
+        for file, future in zip(files, futures):
+            path_tmp_file = future.result()
+            if path_tmp_file == None: continue # Already extracted from remote archive.
+            extract_downloaded_file(path_tmp_file, file["key"], Path(output_folder, session_name))
+    except BaseException:
+        # Running downloads stop at their next chunk, we don't wait for them.
+        stop_event.set()
+        executor.shutdown(wait=False, cancel_futures=True)
+        raise
+    executor.shutdown()
 
     # Delete zip file and folder
     print(f"\nRemove {path_zip_session} folder.")
@@ -54,9 +56,70 @@ def download_manager_without_token(files: list, output_folder: Path, session_nam
     path_zip_session.rmdir()
 
 
+def download_file_without_token(file: dict, path_zip_session: Path, doi: str, bandwidth_limiter: BandwidthLimiter | None = None, 
+                                stop_event: threading.Event | None = None) -> Path:
+    """ Download a file of a version until checksum is good. """
+    path_tmp_file = Path(path_zip_session, file["key"])
+    url = f"{ZENODO_LINK_WITHOUT_TOKEN}/{doi}/files/{file['key']}/content"
+    print(f"\nWorking with: {path_tmp_file}")
+    checksum = file_downloader(url, path_tmp_file, bandwidth_limiter=bandwidth_limiter, stop_event=stop_event)
+
+    # Retry while checksum is different.
+    nb_checksum_error = 0
+    while checksum != file["checksum"].replace("md5:", ""):
+        nb_checksum_error += 1
+        path_tmp_file.unlink()
+        if nb_checksum_error > MAX_CHECKSUM_RETRY:
+            raise NameError(f"Checksum error when downloading {path_tmp_file}, abort after {MAX_CHECKSUM_RETRY} retries.")
+        
+        print(f"[WARNING] Checksum error when downloading {path_tmp_file}. We retry.")
+        checksum = file_downloader(url, path_tmp_file, bandwidth_limiter=bandwidth_limiter, stop_event=stop_event)
+    
+    return path_tmp_file
+
+
+def stream_file_without_token(file: dict, path_zip_session: Path, path_session: Path, doi: str, bandwidth_limiter: BandwidthLimiter | None = None, 
+                              stop_event: threading.Event | None = None) -> Path | None:
+    """ Extract a zip from the remote archive. Member crc are checked by zipfile. If range requests fail, the archive is downloaded. """
+    url = f"{ZENODO_LINK_WITHOUT_TOKEN}/{doi}/files/{file['key']}/content"
+    print(f"\nStream unzip {file['key']} to {get_extract_folder(file['key'], path_session)}.")
+    try:
+        extract_remote_zip(url, get_extract_folder(file["key"], path_session), bandwidth_limiter=bandwidth_limiter)
+        return None
+    except (NameError, zipfile.BadZipFile, requests.RequestException):
+        print(f"[WARNING] Cannot stream unzip {file['key']}, we download the archive.")
+        return download_file_without_token(file, path_zip_session, doi, bandwidth_limiter, stop_event)
+
+
+def get_extract_folder(file_key: str, path_session: Path) -> Path:
+    """ Folder where a zip of a session is extracted. """
+    if "DCIM" in file_key:
+        return Path(path_session, "DCIM")
+    elif "PROCESSED_DATA" in file_key:
+        folder_name = file_key.replace(".zip", "").replace("PROCESSED_DATA_", "")
+        return Path(path_session, "PROCESSED_DATA", folder_name)
+    return Path(path_session, file_key.replace(".zip", ""))
+
+
+def extract_downloaded_file(path_tmp_file: Path, file_key: str, path_session: Path) -> None:
+    """ Unzip a downloaded file in the session folder, or move it if it's not a zip. """
+    if ".zip" not in file_key:
+        print(f"Move {path_tmp_file} to {path_session}.")
+        shutil.move(path_tmp_file, Path(path_session, file_key))
+        return
+    
+    path_to_unzip_or_move = get_extract_folder(file_key, path_session)
+    print(f"Unzip {path_tmp_file} to {path_to_unzip_or_move}.")
+    with zipfile.ZipFile(path_tmp_file, 'r') as zip_ref:
+        zip_ref.extractall(path_to_unzip_or_move)
+
+    # Free disk space while other files are downloading.
+    path_tmp_file.unlink()
+
+
 def get_version_from_doi(doi: str) -> dict:
     """ Retrieve all information about a session with a doi. """
-    r = requests.get(f"{ZENODO_LINK_WITHOUT_TOKEN}/{doi}")
+    r = HTTPClient().get(f"{ZENODO_LINK_WITHOUT_TOKEN}/{doi}")
 
     version_json = {}
     if r.status_code == 404:
@@ -71,7 +134,7 @@ def get_version_from_session_name(session_name: str) -> dict:
     """ Retrieve last version about a session with a session_name. """
 
     query = f'q=metadata.identifiers.identifier:"urn:{session_name}" metadata.related_identifiers.identifier:"urn:{session_name}"'
-    r = requests.get(f"{ZENODO_LINK_WITHOUT_TOKEN}?{query}")
+    r = HTTPClient().get(f"{ZENODO_LINK_WITHOUT_TOKEN}?{query}")
 
     version_json = {}
     if r.status_code == 404:
@@ -97,7 +160,7 @@ def get_all_versions_from_session_name(session_name: str) -> list:
     """ Retrieve all versions about a session with a session_name. """
 
     query = f'q=metadata.identifiers.identifier:"urn:{session_name}" metadata.related_identifiers.identifier:"urn:{session_name}"&allversions=true'
-    r = requests.get(f"{ZENODO_LINK_WITHOUT_TOKEN}?{query}")
+    r = HTTPClient().get(f"{ZENODO_LINK_WITHOUT_TOKEN}?{query}")
 
     version_json = []
     if r.status_code == 404:
@@ -157,7 +220,7 @@ def get_session_in_communities(url: str, from_date: str | None = None) -> list:
 
         while shouldIAsk:
             print(f"{harassingCounter} / {MAX_RETRY_TO_UPLOAD_DOWNLOAD_FILE}: Parsing {next_url}")
-            r = requests.get(next_url)
+            r = HTTPClient().get(next_url)
 
             if r.ok:
                 shouldIAsk = False
@@ -0,0 +1,112 @@
+import os
+import json
+import hashlib
+import threading
+from pathlib import Path
+
+from ..utils.lib_tools import md5
+from ..utils.constants import UPLOAD_JOURNAL_FOLDER
+
+
+class UploadJournal:
+    """
+        Persistent state of the upload of a folder in a zenodo draft: upload kind, metadata version, draft id, bucket url, and checksums of local and uploaded files.
+        A crashed upload of the same folder, kind and version continue in the same draft and only send missing files.
+    """
+
+    def __init__(self, folder: Path, journal_folder: str = UPLOAD_JOURNAL_FOLDER) -> None:
+        folder = Path(folder).resolve()
+        self.path = Path(journal_folder, f"{folder.name}_{hashlib.md5(str(folder).encode('utf-8')).hexdigest()}.json")
+        self.lock = threading.Lock()
+
+        self.data = {"folder": str(folder), "kind": None, "version": None, "deposit_id": None, "bucket_url": None, "restricted_files_removed": False, "local_md5": {}, "uploaded": {}}
+        if self.path.exists():
+            try:
+                with open(self.path) as f:
+                    self.data.update(json.load(f))
+            except (json.JSONDecodeError, OSError):
+                print(f"[WARNING] Cannot read upload journal {self.path}, we start a new one.")
+
+
+    @property
+    def kind(self) -> str | None:
+        return self.data["kind"]
+
+
+    @property
+    def version(self) -> str | None:
+        return self.data["version"]
+
+
+    @property
+    def uploaded(self) -> dict:
+        return self.data["uploaded"]
+
+
+    @property
+    def deposit_id(self) -> int | None:
+        return self.data["deposit_id"]
+
+
+    @property
+    def bucket_url(self) -> str | None:
+        return self.data["bucket_url"]
+
+
+    @property
+    def restricted_files_removed(self) -> bool:
+        return self.data["restricted_files_removed"]
+
+
+    def is_same_upload(self, kind: str, version: str | None) -> bool:
+        """ A draft can only be resumed by an upload of the same kind and metadata version. """
+        return self.kind == kind and self.version == version
+
+
+    def set_draft(self, deposit_id: int, bucket_url: str, kind: str, version: str | None) -> None:
+        """ Start an upload in a new draft, previous uploaded files are forgotten. """
+        with self.lock:
+            self.data.update({"kind": kind, "version": version, "deposit_id": deposit_id, "bucket_url": bucket_url, "restricted_files_removed": False, "uploaded": {}})
+            self.__save()
+
+
+    def set_restricted_files_removed(self) -> None:
+        with self.lock:
+            self.data["restricted_files_removed"] = True
+            self.__save()
+
+
+    def get_md5(self, file: Path) -> str:
+        """ Md5 of a local file, computed again only if size or modification time change. """
+        stat = file.stat()
+        signature = f"{stat.st_size}_{stat.st_mtime_ns}"
+
+        cached = self.data["local_md5"].get(file.name)
+        if cached != None and cached["signature"] == signature:
+            return cached["md5"]
+
+        checksum = md5(file)
+        with self.lock:
+            self.data["local_md5"][file.name] = {"signature": signature, "md5": checksum}
+            self.__save()
+        return checksum
+
+
+    def set_uploaded(self, filename: str, checksum: str) -> None:
+        with self.lock:
+            self.data["uploaded"][filename] = checksum
+            self.__save()
+
+
+    def delete(self) -> None:
+        """ Upload is finished. """
+        self.path.unlink(missing_ok=True)
+
+
+    def __save(self) -> None:
+        """ Write journal in a temporary file to never keep a partial journal. """
+        self.path.parent.mkdir(exist_ok=True, parents=True)
+        tmp_path = Path(f"{self.path}.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(self.data, f, indent=2)
+        os.replace(tmp_path, self.path)
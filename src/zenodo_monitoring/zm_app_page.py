@@ -1,9 +1,11 @@
 import dash
 import uuid
+import diskcache
 import dash_bootstrap_components as dbc
-from dash import Input, Output, dcc, html, State
+from dash import Input, Output, dcc, html, State, DiskcacheManager
 
 from src.seatizen_atlas.sa_manager import AtlasManager
+from src.utils.constants import MONITORING_JOBS_CACHE_PATH, TILE_CACHE_PATH, TILE_CACHE_MAX_SIZE
 
 from .zm_home_page import ZenodoMonitoringHome
 from .zm_exporter_page import ZenodoMonitoringExporter
@@ -11,16 +13,21 @@ from .zm_explorer_page import ZenodoMonitoringExplorer
 from .zm_settings_page import ZenodoMonitoringSettings
 from .zm_statistic_page import ZenodoMonitoringStatistic
 from .zm_publication_page import ZenodoMonitoringPublication
+from .zm_tile_proxy import TileProxy
 
 class ZenodoMonitoringApp:
     def __init__(self, opt):
 
+        # Long callbacks (exports) run as background jobs, job state is shared between workers on disk.
+        self.jobs_cache = diskcache.Cache(MONITORING_JOBS_CACHE_PATH)
+
         # Init app.
         self.app = dash.Dash(
             __name__,
             external_stylesheets=[dbc.themes.SKETCHY, dbc.icons.FONT_AWESOME], 
             assets_folder="../../assets/", 
             suppress_callback_exceptions=True,
+            background_callback_manager=DiskcacheManager(self.jobs_cache),
             meta_tags = [
                 {"name": "Cache-Control", "content": "no-cache, no-store, must-revalidate"},
                 {"name": "Pragma", "content": "no-cache"},
@@ -31,12 +38,18 @@ class ZenodoMonitoringApp:
         self.app.title = "Seatizen monitoring"
 
         # Init database connection.
-        atlasManager = AtlasManager({}, opt.path_seatizen_atlas_folder, from_local=opt.use_from_local, force_regenerate=False)
+        atlasManager = AtlasManager({}, opt.path_seatizen_atlas_folder, from_local=opt.use_from_local, force_regenerate=False, connection_profile=opt.connection_profile)
         
+        # Explorer tiles can be served by a local caching proxy.
+        self.tile_proxy = None
+        if opt.use_tile_proxy:
+            self.tile_proxy = TileProxy(opt.tile_upstream_url, TILE_CACHE_PATH, TILE_CACHE_MAX_SIZE, opt.path_mbtiles_folder)
+            self.tile_proxy.register_route(self.app.server)
+
         # Other pages.
         self.settings = ZenodoMonitoringSettings(self.app)
-        self.explorer = ZenodoMonitoringExplorer(self.app)
-        self.exporter = ZenodoMonitoringExporter(self.app, self.settings.settings_data)
+        self.explorer = ZenodoMonitoringExplorer(self.app, self.tile_proxy)
+        self.exporter = ZenodoMonitoringExporter(self.app, self.settings.settings_data, self.jobs_cache, atlasManager.seatizen_atlas_gpkg)
         self.statistic = ZenodoMonitoringStatistic(self.app)
         self.publication = ZenodoMonitoringPublication(self.app)
         self.home = ZenodoMonitoringHome(self.app)
@@ -15,19 +15,13 @@ class EDNAData:
         with open(self.data_path) as f:
             self.data = json.load(f)
         
+        self.setup_feature_collections()
 
-    def get_edna_data(self, year: int, empty: bool = False) -> dict:
-        
-        if empty:
-            return {
-                "type": "FeatureCollection",
-                "features": []
-            }
-        features = []
 
+    def setup_feature_collections(self) -> None:
+        """ Build features once and group them by year, feature collections are stored by (year, empty) key. """
+        features_by_year = {}
         for sample in self.data:
-            if sample.get("date")[0:4] != year: continue
-
             tooltip_data = {
                 "type": "Feature",
                 "geometry": shapely.geometry.mapping(shapely.Point(sample.get("GPSLongitude"), sample.get("GPSLatitude"))),
@@ -42,12 +36,15 @@ class EDNAData:
                 "GPSLatitude": sample.get("GPSLatitude"),
                 "GPSLongitude": sample.get("GPSLongitude")
             }
-            features.append(tooltip_data)
+            features_by_year.setdefault(sample.get("date")[0:4], []).append(tooltip_data)
+
+        self.empty_feature_collection = {"type": "FeatureCollection", "features": []}
+        self.feature_collections = {}
+        for year, features in features_by_year.items():
+            self.feature_collections[(year, False)] = {"type": "FeatureCollection", "features": features}
+            self.feature_collections[(year, True)] = self.empty_feature_collection
 
-        geojson_feature_collection = {
-            "type": "FeatureCollection",
-            "features": features
-        }
 
-        return geojson_feature_collection
-    
\ No newline at end of file
+    def get_edna_data(self, year: int | str, empty: bool = False) -> dict:
+        """ Get eDNA samples of a year. """
+        return self.feature_collections.get((str(year), empty), self.empty_feature_collection)
@@ -10,6 +10,7 @@ from dash import html, Input, Output, dcc, Dash, State, no_update
 
 from .zm_edna_data import EDNAData
 from .zm_ortho_asv_footprint import OrthoASVFootprint
+from .zm_tile_proxy import TileProxy
 from .zm_utils import ON_EACH_FEATURE_EXPLORER, ON_EACH_FEATURE_EXPLORER_ASV
 
 BATHY_YEAR = [2022, 2023, 2024, 2025]
@@ -30,8 +31,9 @@ EDNA_VALUE = "edna"
 IMG_SIZE = 512
 
 class ZenodoMonitoringExplorer:
-    def __init__(self, app: Dash):
+    def __init__(self, app: Dash, tile_proxy: TileProxy | None = None):
         self.app = app
+        self.tile_proxy = tile_proxy
         self.edna_data = EDNAData()
         self.ortho_asv_footprint = OrthoASVFootprint()
     
@@ -41,6 +43,7 @@ class ZenodoMonitoringExplorer:
             dcc.Location(id="url-explorer", refresh=False),
             dcc.Store(id="url-parameters-cache", storage_type='memory'),
             dcc.Store(id="cache-clean", storage_type='memory'),
+            dcc.Store(id="ortho-asv-footprint-empty", storage_type='memory', data=False),
             dbc.Row(
                 dbc.Col([
                     # Map. Geography selector.
@@ -61,7 +64,7 @@ class ZenodoMonitoringExplorer:
                                 attribution='&copy; <a href="https://www.openstreetmap.org/copyright">OpenStreetMap</a> contributors &copy; <a href="https://carto.com/attributions">CARTO</a>'
                             ),
                             dl.TileLayer(
-                                url=BASE_URL+"/wmts?request=GetTile&layer=ortho&year=2023&tilematrix={z}&tilerow={x}&tilecol={y}",
+                                url=self.get_tile_url("ortho", DEFAULT_YEAR),
                                 attribution='Tiles © Ifremer DOI',
                                 maxZoom=28,
                                 opacity=100,
@@ -69,14 +72,14 @@ class ZenodoMonitoringExplorer:
                                 id="ortho_map"
                             ),
                             dl.TileLayer(
-                                url=BASE_URL+"/wmts?request=GetTile&layer=bathy&tilematrix={z}&tilerow={x}&tilecol={y}",
+                                url=self.get_tile_url("bathy", None),
                                 attribution='Tiles © Ifremer DOI',
                                 maxZoom=22,
                                 opacity=100,
                                 id="bathy_map",
                             ),
                             dl.TileLayer(
-                                url=BASE_URL+"/wmts?request=GetTile&layer=predictions&year=2023&tilematrix={z}&tilerow={x}&tilecol={y}",
+                                url=self.get_tile_url("predictions", DEFAULT_YEAR),
                                 attribution='Tiles © Ifremer DOI',
                                 maxZoom=22,
                                 opacity=0,
@@ -277,7 +280,7 @@ class ZenodoMonitoringExplorer:
         )
         def load_url_pred(data):
             data = DEFAULT_YEAR if data == None else data
-            return BASE_URL+"/wmts?request=GetTile&layer=predictions&year="+data+"&tilematrix={z}&tilerow={x}&tilecol={y}"
+            return self.get_tile_url("predictions", data)
         
         @self.app.callback(
             Output("bathy_map", "url"),
@@ -285,7 +288,7 @@ class ZenodoMonitoringExplorer:
         )
         def load_url_bathy(data):
             data = DEFAULT_YEAR if data == None else data
-            return BASE_URL+"/wmts?request=GetTile&layer=bathy&year="+data+"&tilematrix={z}&tilerow={x}&tilecol={y}"
+            return self.get_tile_url("bathy", data)
         
         @self.app.callback(
             Output("ortho_map", "url"),
@@ -295,7 +298,7 @@ class ZenodoMonitoringExplorer:
         )
         def load_url_pred(data, zoom):
             data = DEFAULT_YEAR if data == None else data
-            new_ortho_url = BASE_URL+"/wmts?request=GetTile&layer=ortho&year="+data+"&tilematrix={z}&tilerow={x}&tilecol={y}"
+            new_ortho_url = self.get_tile_url("ortho", data)
 
             return new_ortho_url, self.ortho_asv_footprint.get_data(data, zoom >= 21)
         
@@ -420,15 +423,29 @@ class ZenodoMonitoringExplorer:
         
         @self.app.callback(
             Output("ortho_asv_footprint", "data", allow_duplicate=True),
+            Output("ortho-asv-footprint-empty", "data"),
             Input("map-explorer", "zoom"),
             State("orthophoto-year-radio", "value"),
+            State("ortho-asv-footprint-empty", "data"),
             prevent_initial_call=True
         )
-        def update_asv_ortho(zoom, ortho_year):
-            return self.ortho_asv_footprint.get_data(ortho_year, zoom >= 21)
+        def update_asv_ortho(zoom, ortho_year, is_empty):
+            # Footprints are only sent again when the zoom cross the limit.
+            if (zoom >= 21) == is_empty:
+                return no_update, no_update
+            return self.ortho_asv_footprint.get_data(ortho_year, zoom >= 21), zoom >= 21
 
         
     
+    def get_tile_url(self, layer: str, year: str | int | None) -> str:
+        """ Url template of a tile layer, tiles go through the local tile proxy if enabled. """
+        if self.tile_proxy != None:
+            return self.tile_proxy.get_tile_url(layer, year)
+        
+        year_param = "" if year == None else f"&year={year}"
+        return BASE_URL+f"/wmts?request=GetTile&layer={layer}{year_param}"+"&tilematrix={z}&tilerow={x}&tilecol={y}"
+
+
     def format_query_with_parameters(self, center, zoom, checkbox, ortho_radio, bathy_radio, ortho_pred_radio, edna_radio) -> str:
         
         if isinstance(center, list):
@@ -0,0 +1,90 @@
+import os
+import json
+import shutil
+import hashlib
+import polars as pl
+from pathlib import Path
+from shapely import Polygon
+
+from ..utils.constants import BYTE_TO_GIGA_BYTE
+
+class ExportCache:
+    """
+        Content addressed cache of export dataframes stored as parquet files.
+        Files are stored in a folder by gpkg version, so a new atlas invalidate all previous results.
+        When the cache is full, least recently used files are removed.
+    """
+
+    def __init__(self, cache_folder: str, seatizen_atlas_gpkg: Path, max_size_gb: float) -> None:
+        self.cache_folder = Path(cache_folder)
+        self.seatizen_atlas_gpkg = Path(seatizen_atlas_gpkg)
+        self.max_size_bytes = max_size_gb * BYTE_TO_GIGA_BYTE
+
+
+    @property
+    def version_folder(self) -> Path:
+        """ Folder of the current gpkg version, base on gpkg modification time and size. """
+        stat = self.seatizen_atlas_gpkg.stat() if self.seatizen_atlas_gpkg.exists() else None
+        version = f"{stat.st_mtime_ns}_{stat.st_size}" if stat else "no_gpkg"
+        return Path(self.cache_folder, version)
+
+
+    def build_key(self, list_poly: list[Polygon], model_id, class_ids: list[int], group_class_ids: dict[str, list[int]],
+                  date_range: list[str], frame_metadata_header: list[str], platform_type: list[str], type_pred_select: str) -> str:
+        """ Canonical hash of export filters. Polygons are normalized and compare with wkb, order of ids and platforms doesn't matter. """
+        request = {
+            "polygons": sorted(poly.normalize().wkb_hex for poly in list_poly),
+            "model_id": str(model_id),
+            "class_ids": sorted(class_ids),
+            "group_class_ids": [[name, sorted(ids)] for name, ids in group_class_ids.items()], # Group order is the column order.
+            "date_range": list(date_range),
+            "frame_metadata_header": list(frame_metadata_header),
+            "platform_type": sorted(platform_type or []),
+            "type_pred_select": type_pred_select
+        }
+        return hashlib.sha256(json.dumps(request, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+    def get(self, key: str) -> pl.DataFrame | None:
+        """ Return cached dataframe or None. """
+        cache_file = Path(self.version_folder, f"{key}.parquet")
+        try:
+            df_data = pl.read_parquet(cache_file)
+            os.utime(cache_file) # Mark as recently used.
+            return df_data
+        except (FileNotFoundError, OSError):
+            return None
+
+
+    def put(self, key: str, df_data: pl.DataFrame) -> None:
+        """ Add a dataframe in cache, drop previous gpkg versions and least recently used files if cache is full. """
+        version_folder = self.version_folder
+        version_folder.mkdir(exist_ok=True, parents=True)
+
+        # Write in a temporary file to never expose a partial file to other workers.
+        tmp_file = Path(version_folder, f"{key}.{os.getpid()}.tmp")
+        df_data.write_parquet(tmp_file)
+        os.replace(tmp_file, Path(version_folder, f"{key}.parquet"))
+
+        self.evict(version_folder)
+
+
+    def evict(self, version_folder: Path) -> None:
+        """ Remove folders of old gpkg versions and least recently used files above max size. """
+        for folder in self.cache_folder.iterdir():
+            if folder != version_folder and folder.is_dir():
+                shutil.rmtree(folder, ignore_errors=True)
+
+        cache_files = []
+        for file in version_folder.glob("*.parquet"):
+            try:
+                stat = file.stat()
+                cache_files.append((stat.st_mtime, stat.st_size, file))
+            except FileNotFoundError:
+                continue # Removed by another worker.
+
+        total_size = sum(size for _, size, _ in cache_files)
+        for _, size, file in sorted(cache_files, key=lambda f: f[0]):
+            if total_size <= self.max_size_bytes: break
+            file.unlink(missing_ok=True)
+            total_size -= size
@@ -1,5 +1,7 @@
-import math
 import uuid
+import zipfile
+import threading
+import diskcache
 import polars as pl
 from pathlib import Path
 from datetime import datetime
@@ -9,18 +11,21 @@ import dash_bootstrap_components as dbc
 from dash_extensions.javascript import Namespace, arrow_function
 from dash import html, dcc, Input, Output, State, ctx
 
-from .zm_monitoring_data import MonitoringData, EnumPred
+from .zm_monitoring_data import MonitoringData, EnumPred, EnumExportFormat
 from .zm_settings_data import SettingsData
 from .zm_utils import ON_EACH_FEATURE_EXPORTER
+from .zm_export_cache import ExportCache
 
-from ..utils.constants import MAX_CSV_FILE_TO_DOWNLOAD
+from ..utils.constants import MAX_CSV_FILE_TO_DOWNLOAD, EXPORT_JOB_LOCK_TTL, EXPORT_CACHE_PATH, EXPORT_CACHE_MAX_SIZE, EXPORT_BATCH_SIZE
 
 class ZenodoMonitoringExporter:
-    def __init__(self, app, settings_data: SettingsData):
+    def __init__(self, app, settings_data: SettingsData, jobs_cache: diskcache.Cache, seatizen_atlas_gpkg: Path):
         self.app = app        
         self.settings_data = settings_data
+        self.jobs_cache = jobs_cache
+        self.export_cache = ExportCache(EXPORT_CACHE_PATH, seatizen_atlas_gpkg, EXPORT_CACHE_MAX_SIZE)
         self.monitoring_data = MonitoringData(settings_data)
-        self.geolocation_footprint_json = self.monitoring_data.get_footprint_geojson() 
+        self.geolocation_footprint_json = self.monitoring_data.get_footprint_geojson(zoom=14)
 
     
     def create_layout(self):
@@ -34,7 +39,7 @@ class ZenodoMonitoringExporter:
                 dbc.Col([
                     # Map. Geography selector.
                     html.H2(children="Select the zone to export."),
-                    dl.Map(style={'width': '100%', 'height': '50vh'}, center=[-21.085198, 55.222047], zoom=14, maxZoom=26, minZoom=4,children=[
+                    dl.Map(id="exporter_map", style={'width': '100%', 'height': '50vh'}, center=[-21.085198, 55.222047], zoom=14, maxZoom=26, minZoom=4,children=[
                         dl.TileLayer(
                             url="https://server.arcgisonline.com/ArcGIS/rest/services/World_Imagery/MapServer/tile/{z}/{y}/{x}",
                             attribution='Tiles © Esri',
@@ -49,7 +54,7 @@ class ZenodoMonitoringExporter:
                             maxZoom=26
                         ),
                         dl.GeoJSON(
-                            data=self.monitoring_data.get_footprint_geojson() ,
+                            data=self.monitoring_data.get_footprint_geojson(zoom=14),
                             id="session_footprint",
                             style=ns("platformToColorMap"),
                             onEachFeature=ON_EACH_FEATURE_EXPORTER,
@@ -133,7 +138,19 @@ class ZenodoMonitoringExporter:
                         placeholder="If not filled, all metadata are selected.", 
                         id='frame_select'
                     ),
-                ],  xs=12, md=8, className="p-3")
+                ],  xs=12, md=5, className="p-3"),
+                # Export format.
+                dbc.Col([
+                    html.H4(children="Select the file format.",
+                            title=f"CSV files are split to stay under {MAX_CSV_FILE_TO_DOWNLOAD} Mb, Zip bundles them in one download, Parquet is one compressed file."
+                    ),
+                    dbc.RadioItems(
+                        [export_format.value for export_format in EnumExportFormat],
+                        value=EnumExportFormat.CSV.value,
+                        id="export_format_select",
+                        inline=True
+                    ),
+                ], xs=12, md=3, className="p-3")
             ], className="p-3"),
             
             dbc.Row([
@@ -149,6 +166,7 @@ class ZenodoMonitoringExporter:
                 id="btn-dl", 
                 title=f"If the size of the csv file is greater than {MAX_CSV_FILE_TO_DOWNLOAD} Mb, it will be divided into smaller files to stay under the limit of {MAX_CSV_FILE_TO_DOWNLOAD} Mb." ),
             dcc.Download(id="download-dataframe-csv"),
+            dbc.Progress(id="export-progress", value=0, label="", striped=True, animated=True, className="mt-3"),
 
             dbc.Modal([
                 dbc.ModalHeader(dbc.ModalTitle("Summary of your export")),
@@ -183,10 +201,12 @@ class ZenodoMonitoringExporter:
             Output('session_footprint', 'data'), 
             Input('platform_select', 'value'),
             Input('date-picker', 'value'),
+            Input('exporter_map', 'zoom'),
+            Input('exporter_map', 'bounds'),
             prevent_initial_call=True,
         )
-        def update_platform(platform_to_include, date_interval):
-            self.geolocation_footprint_json = self.monitoring_data.get_footprint_geojson(platform_to_include, date_interval)
+        def update_platform(platform_to_include, date_interval, zoom, bounds):
+            self.geolocation_footprint_json = self.monitoring_data.get_footprint_geojson(platform_to_include, date_interval, zoom, bounds)
             return self.geolocation_footprint_json
 
 
@@ -230,18 +250,26 @@ class ZenodoMonitoringExporter:
                 State("platform_select", "value"),
                 State("type_pred_select", "value"),
                 State("local-session-id", "data"),
+                State("export_format_select", "value"),
             ],
+            background=True,
+            running=[(Output("btn-dl", "disabled"), True, False)],
+            progress=[Output("export-progress", "value"), Output("export-progress", "label")],
+            progress_default=[0, ""],
             prevent_initial_call=True,
         )
-        def generate_csv(n_clicks, geo_json, model_id, class_ids, date_range, frame_select, platform_type, type_pred_select, session_id):
-            df_data = self.monitoring_data.build_dataframe_for_csv(session_id, geo_json, model_id, class_ids, date_range, frame_select, platform_type, type_pred_select)
+        def generate_csv(set_progress, n_clicks, geo_json, model_id, class_ids, date_range, frame_select, platform_type, type_pred_select, session_id, export_format):
+            df_data = self.build_dataframe_once(set_progress, session_id, geo_json, model_id, class_ids, date_range, frame_select, platform_type, type_pred_select)
             
             if len(df_data) == 0:
                 # Close spinner and show a Toast.
+                set_progress((0, ""))
                 return True, False, None, False, ""
             
-            list_csv = self.build_list_split_csv(df_data)
+            set_progress((80, "Writing files..."))
+            list_csv = self.build_list_split_csv(df_data, export_format)
             modal_body_text = self.generate_modal_body_text(df_data)
+            set_progress((100, "Done"))
             
             return False, False, {'files': list_csv, 'index': -1}, True, modal_body_text
         
@@ -281,30 +309,94 @@ class ZenodoMonitoringExporter:
         def toggle_modal(_, is_open):
             return not is_open
     
-    def build_list_split_csv(self, df_data: pl.DataFrame) -> list[str]:
+    def build_dataframe_once(self, set_progress, session_id, geo_json, model_id, class_ids, date_range, frame_select, platform_type, type_pred_select) -> pl.DataFrame:
+        """ 
+            Get the dataframe from export cache or compute it. 
+            Identical requests running at the same time share one computation: the first job compute it, others wait its result.
+        """
+        selected = class_ids if isinstance(class_ids, list) else [class_ids]
+        group_ids = self.settings_data.group_name_and_ids.get(session_id, {})
+        request_key = self.export_cache.build_key(
+            self.monitoring_data.extract_polygons(geo_json),
+            model_id,
+            [id for id in selected if isinstance(id, int)],
+            {name: group_ids.get((name, model_id), []) for name in selected if isinstance(name, str)},
+            self.monitoring_data.parse_date_interval(date_range),
+            frame_select or self.monitoring_data.frame_manager.frames_header,
+            platform_type,
+            type_pred_select
+        )
 
-        # Step 2: Split the DataFrame into chunks
-        def split_dataframe(df, rows_per_file):
-            for i in range(0, len(df), rows_per_file):
-                yield df.slice(i, rows_per_file)
+        lock_key = f"export_lock_{request_key}"
+        lock = diskcache.Lock(self.jobs_cache, lock_key, expire=EXPORT_JOB_LOCK_TTL)
+        set_progress((10, "An identical export is running, waiting for its result..." if lock.locked() else "Querying database..."))
+        with lock:
+            df_data = self.export_cache.get(request_key)
+            if df_data is None:
+                stop_event = threading.Event()
+                threading.Thread(target=self.renew_lock, args=(lock_key, stop_event), daemon=True).start()
+                try:
+                    df_data = self.monitoring_data.build_dataframe_for_csv(session_id, geo_json, model_id, class_ids, date_range, frame_select, platform_type, type_pred_select)
+                    self.export_cache.put(request_key, df_data)
+                finally:
+                    stop_event.set()
 
-        # Step 1: Calculate approximate number of rows per MAX_CSV_FILE_TO_DOWNLOAD MB file
-        df_size_bytes = df_data.write_csv().encode('utf-8')
-        df_size_mb = len(df_size_bytes) / (1024 * 1024)
-        nb_file = int(math.ceil(df_size_mb / MAX_CSV_FILE_TO_DOWNLOAD))
-        rows_per_file = len(df_data) // nb_file
-        
+        return df_data
+
+
+    def renew_lock(self, lock_key: str, stop_event: threading.Event) -> None:
+        """ Push back the lock expiry while the export is built, the lock only expires if the job process dies. """
+        while not stop_event.wait(EXPORT_JOB_LOCK_TTL / 3):
+            self.jobs_cache.touch(lock_key, expire=EXPORT_JOB_LOCK_TTL)
+
+
+    def build_list_split_csv(self, df_data: pl.DataFrame, export_format: str = EnumExportFormat.CSV.value) -> list[str]:
+        """ 
+            Write the dataframe once by batch of rows and return the files to download.
+            Csv files roll over when they reach MAX_CSV_FILE_TO_DOWNLOAD Mb, zip bundle them in one file, parquet is one file.
+        """
         output_folder = Path("./output_csv")
         output_folder.mkdir(exist_ok=True)
         basename = f'{datetime.now().strftime("%Y%m%d_%H%M%S")}_{str(uuid.uuid4())}_zenodo_monitoring_data'
-        list_csv = []
-        for i, chunk in enumerate(split_dataframe(df_data, rows_per_file)):
-            csv_name = Path(output_folder, f"{basename}_{i + 1}.csv")
-            list_csv.append(str(csv_name))
-            chunk.write_csv(csv_name)
+
+        if export_format == EnumExportFormat.PARQUET.value:
+            parquet_name = Path(output_folder, f"{basename}.parquet")
+            df_data.write_parquet(parquet_name)
+            return [str(parquet_name)]
         
+        if export_format == EnumExportFormat.ZIP.value:
+            zip_name = Path(output_folder, f"{basename}.zip")
+            with zipfile.ZipFile(zip_name, "w", compression=zipfile.ZIP_DEFLATED) as zip_file:
+                self.write_split_csv(df_data, basename, lambda csv_name: zip_file.open(csv_name, "w", force_zip64=True))
+            return [str(zip_name)]
+
+        list_csv = self.write_split_csv(df_data, basename, lambda csv_name: open(Path(output_folder, csv_name), "wb"))
+        return [str(Path(output_folder, csv_name)) for csv_name in list_csv]
+    
+
+    def write_split_csv(self, df_data: pl.DataFrame, basename: str, open_file) -> list[str]:
+        """ Write csv by batch of rows in files open with open_file(name), start a new file when MAX_CSV_FILE_TO_DOWNLOAD Mb is reached. """
+        max_file_size = MAX_CSV_FILE_TO_DOWNLOAD * 1024 * 1024
+        list_csv, csv_file, csv_file_size = [], None, 0
+
+        for i in range(0, max(len(df_data), 1), EXPORT_BATCH_SIZE):
+            chunk = df_data.slice(i, EXPORT_BATCH_SIZE).write_csv(include_header=False).encode("utf-8")
+
+            if csv_file == None or (csv_file_size + len(chunk) > max_file_size and csv_file_size > 0):
+                if csv_file != None: csv_file.close()
+                list_csv.append(f"{basename}_{len(list_csv) + 1}.csv")
+                csv_file = open_file(list_csv[-1])
+                header = df_data.clear().write_csv().encode("utf-8")
+                csv_file.write(header)
+                csv_file_size = len(header)
+
+            csv_file.write(chunk)
+            csv_file_size += len(chunk)
+        
+        csv_file.close()
         return list_csv
     
+
     def generate_modal_body_text(self, df_data: pl.DataFrame) -> dbc.Row:
         
         nb_session = len(df_data["version_doi"].unique()) if "version_doi" in df_data else "Not compute" 
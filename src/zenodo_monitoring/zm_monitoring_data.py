@@ -9,16 +9,22 @@ from shapely import Polygon, Point
 from pyproj import Geod
 
 from src.models.deposit_model import DepositLinestringDAO
-from src.models.ml_model_model import MultilabelModelDAO, MultilabelClassDAO, MultilabelClassDTO
+from src.models.ml_model_model import MultilabelModelDAO, MultilabelClassDAO
 from src.models.frame_model import FrameDAO
 from src.models.ml_predictions_model import MultilabelPredictionDAO
 from src.models.statistic_model import Benchmark
+from src.utils.constants import FOOTPRINT_ZOOM_BANDS
 from .zm_settings_data import SettingsData
 
 class EnumPred(enum.Enum):
     SCORE = "Score"
     PRED = "Prediction"
 
+class EnumExportFormat(enum.Enum):
+    CSV = "CSV"
+    ZIP = "Zip"
+    PARQUET = "Parquet"
+
 PLATFORM_BETTER_WITH_LINESTRING = ["SCUBA", "PADDLE", "UVC"]
 
 class MonitoringData:
@@ -70,34 +76,23 @@ class MonitoringData:
             value = [0, (self.max_date-self.min_date+1) * 12 - 1])
     
 
-    def get_footprint_geojson(self, platform_to_include = [], date_interval = []) -> dict:
-        """ Get the footprint for each session. """
-        # Extract date before continue
-        d_start, d_end = None, None
-        if len(date_interval):
-            parsed_date = self.parse_date_interval(date_interval)
-            d_start = datetime.strptime(parsed_date[0], "%Y-%m-%d")
-            d_end = datetime.strptime(parsed_date[1], "%Y-%m-%d")
-
+    def setup_footprints(self) -> None:
+        """ 
+            Build footprint features of each session once, filters are applied on df_footprints which have one row by feature.
+            Features are also build with geometries simplified for each zoom band of FOOTPRINT_ZOOM_BANDS.
+        """
+        geod = Geod(ellps="WGS84")
 
-        features = []
+        self.footprint_features, footprint_rows, geometries = [], [], []
         for dl in self.deposit_linestrings_manager.deposits_linestring:
             
             if dl.deposit.footprint == None: continue
-            
-            # Filter by platform.
-            if len(platform_to_include) > 0 and dl.deposit.platform not in platform_to_include: continue
-            
-            # Filter by date
-            if d_start != None and d_end != None:
-                d_compare = datetime.strptime(dl.deposit.session_date, "%Y-%m-%d")
-                if d_compare < d_start or d_compare > d_end: continue
 
             # Footprint.
-            geojson_polygon = shapely.geometry.mapping(dl.footprint_linestring if dl.deposit.platform in PLATFORM_BETTER_WITH_LINESTRING else dl.deposit.footprint)
+            geometry = dl.footprint_linestring if dl.deposit.platform in PLATFORM_BETTER_WITH_LINESTRING else dl.deposit.footprint
+            geojson_polygon = shapely.geometry.mapping(geometry)
         
             # Area in squared meters.
-            geod = Geod(ellps="WGS84")
             poly_area, poly_perimeter = geod.geometry_area_perimeter(dl.deposit.footprint)
 
             # Add min max depth
@@ -120,12 +115,55 @@ class MonitoringData:
             else:
                 tooltip_data["area"] = f"{round(poly_area , 2)} m²"
 
+            self.footprint_features.append(tooltip_data)
+            footprint_rows.append((dl.deposit.platform, dl.deposit.session_date, *geometry.bounds))
+            geometries.append(geometry)
 
-            features.append(tooltip_data)
+        # Simplify with a tolerance of one pixel (in degree) at the zoom of the band.
+        self.footprint_features_by_zoom = {}
+        for zoom in FOOTPRINT_ZOOM_BANDS:
+            simplified_geometries = shapely.simplify(geometries, 360 / (256 * 2 ** zoom), preserve_topology=True)
+            self.footprint_features_by_zoom[zoom] = [
+                {**feature, "geometry": shapely.geometry.mapping(geometry)} for feature, geometry in zip(self.footprint_features, simplified_geometries)
+            ]
+
+        schema = {"platform": pl.String, "session_date": pl.String, "minx": pl.Float64, "miny": pl.Float64, "maxx": pl.Float64, "maxy": pl.Float64}
+        self.df_footprints = pl.DataFrame(footprint_rows, schema=schema, orient="row")
+        self.df_footprints = self.df_footprints.with_columns(pl.col("session_date").str.to_date("%Y-%m-%d", strict=False)).with_row_index()
+
+
+    def get_footprint_geojson(self, platform_to_include = [], date_interval = [], zoom: int | None = None, bounds: list | None = None) -> dict:
+        """ 
+            Get the footprint for each session. 
+            With a zoom, geometries are simplified for this zoom. With map bounds [[south, west], [north, east]], only visible footprints are kept.
+        """
+        mask = pl.lit(True)
+
+        # Filter by platform.
+        if len(platform_to_include) > 0:
+            mask = mask & pl.col("platform").is_in(platform_to_include)
+
+        # Filter by date
+        if len(date_interval):
+            parsed_date = self.parse_date_interval(date_interval)
+            d_start = datetime.strptime(parsed_date[0], "%Y-%m-%d").date()
+            d_end = datetime.strptime(parsed_date[1], "%Y-%m-%d").date()
+            mask = mask & pl.col("session_date").is_between(d_start, d_end)
+
+        # Filter by visible area.
+        if bounds:
+            (south, west), (north, east) = bounds
+            mask = mask & (pl.col("maxx") >= west) & (pl.col("minx") <= east) & (pl.col("maxy") >= south) & (pl.col("miny") <= north)
+
+        # First band at or above the zoom, so simplification stay under one pixel.
+        features = self.footprint_features
+        bands = [band for band in FOOTPRINT_ZOOM_BANDS if zoom != None and band >= zoom]
+        if len(bands):
+            features = self.footprint_features_by_zoom[bands[0]]
 
         geojson_feature_collection = {
             "type": "FeatureCollection",
-            "features": features
+            "features": [features[i] for i in self.df_footprints.filter(mask)["index"]]
         }
 
         return geojson_feature_collection
@@ -158,6 +196,9 @@ class MonitoringData:
 
         # Platform type.
         self.platform_type = list(set([dl.deposit.platform for dl in self.deposit_linestrings_manager.deposits_linestring]))
+
+        # Footprints.
+        self.setup_footprints()
     
     def get_class_by_model(self, model_id: int, session_id: str):
         # Classic class from db.
@@ -201,10 +242,8 @@ class MonitoringData:
         class_ids = [id for id in class_to_retrieve if isinstance(id, int)]
         group_class = [name for name in class_to_retrieve if isinstance(name, str)]
 
-        # For each group_class, we need to get ml_class object
-        group_class_by_name: dict[str, list[MultilabelClassDTO]] = {}
-        for group_name in group_class:
-            group_class_by_name[group_name] = [self.ml_classes_manager.get_class_by_id(id) for id in self.settings_data.group_name_and_ids[session_id][(group_name, model_id)]]
+        # For each group_class, we need to get class ids.
+        group_class_ids = {group_name: self.settings_data.group_name_and_ids[session_id][(group_name, model_id)] for group_name in group_class}
 
         # Get all metadata if not selected.
         if not frame_metadata_header: 
@@ -215,57 +254,46 @@ class MonitoringData:
         date_range = self.parse_date_interval(date_range)
         ml_model = self.ml_model_manager.get_model_by_id(model_id)
         classes = self.ml_classes_manager.get_all_class_for_ml_model(ml_model)
-        class_name = [cls.name for cls in classes if -1 in class_ids or cls.id in class_ids]
-
-        # Get frames base on filter.
-        frames = self.frame_manager.get_frame_by_date_type_position(list_poly, date_range, platform_type)
-        
-        # Init dataframe header. Force header type due to polars library.
-        df_header = ["FileName"] + frame_metadata_header
-        if len(class_name) > 0 or len(group_class) > 0:
-            df_header += ["pred_doi"] + group_class + class_name
-        
-        data = []
-        for frame in frames:
-            data_to_add = [frame.filename]
-
-            # Add frame metadata
-            for fs in frame_metadata_header:
-                data_to_add.append(self.frame_manager.match_frame_header_and_attribut(fs, frame))
-
-            predictions = []
-            if -1 not in class_ids:
-                predictions = self.prediction_manager.get_predictions_frame_and_class(frame, class_ids)
-            else:
-                predictions = self.prediction_manager.get_predictions_for_specific_model_and_frame_name(frame, ml_model)         
-
-            # Get predictions for each class in good order.
-            predictions_to_add = {cls_name: None for cls_name in class_name}
-            pred_doi = ""
-            for pred in predictions:
-                pred_doi = pred.version.doi
-                if pred.ml_class.name in predictions_to_add:
-                    predictions_to_add[pred.ml_class.name] = pred.score if type_pred_select == EnumPred.SCORE.value else int(pred.score >= pred.ml_class.threshold)
-            
-            # For each group class, we try to get predictions 
-            group_predictions = {gp: None for gp in group_class_by_name}
-            for group_name in group_class_by_name:
-                predictions = self.prediction_manager.get_predictions_frame_and_class(frame, [cls.id for cls in group_class_by_name.get(group_name, [])])
-                if len(predictions) == 0:
-                    group_predictions[group_name] = -1.0
-                else:
-                    group_predictions[group_name] = int(bool(sum([p.score >= p.ml_class.threshold for p in predictions]))) 
-
-            if len(class_name) != 0 or len(group_class) != 0:
-                data_to_add.append(f"{'https://doi.org/10.5281/zenodo.' if pred_doi != '' else ''}{pred_doi}")
-             
-            data.append(
-                data_to_add + 
-                [s if s != None else -1.0 for s in group_predictions.values()] + 
-                [s if s != None else -1.0 for s in predictions_to_add.values()]
-            )
+        class_name_by_id = {cls.id: cls.name for cls in classes if -1 in class_ids or cls.id in class_ids}
+        class_name = list(class_name_by_id.values())
+
+        # Get frames base on filter and all their predictions for selected classes and group classes in two queries.
+        df_frames = self.frame_manager.get_frames_table_by_date_type_position(list_poly, date_range, platform_type)
+        df_frames = df_frames.with_columns(pl.format("https://doi.org/10.5281/zenodo.{}", "version_doi").alias("version_doi"))
+        df_data = df_frames.select(["id", "FileName"] + frame_metadata_header)
+
+        if len(class_name) == 0 and len(group_class) == 0:
+            benchmarck.stop_and_show("Time to prepare, request and build dataframe")
+            return df_data.drop("id")
+
+        frame_ids_query, frame_ids_params = self.frame_manager.build_date_type_position_query("f.id", list_poly, date_range, platform_type)
+        group_ids = {id for ids in group_class_ids.values() for id in ids}
+        df_preds = self.prediction_manager.get_predictions_table_for_frames(frame_ids_query, frame_ids_params, list(set(class_name_by_id) | group_ids))
+        df_preds = df_preds.with_columns(
+            (pl.col("score") if type_pred_select == EnumPred.SCORE.value else (pl.col("score") >= pl.col("threshold")).cast(pl.Float64)).alias("value"),
+            (pl.col("score") >= pl.col("threshold")).alias("is_pred")
+        )
+
+        # Selected classes: one column by class, last prediction win if we have multiple versions.
+        df_class_preds = df_preds.filter(pl.col("ml_class_id").is_in(list(class_name_by_id)))
+        df_pred_doi = df_class_preds.group_by("frame_id").agg(pl.col("prediction_doi").last())
+        df_data = df_data.join(df_pred_doi, left_on="id", right_on="frame_id", how="left").with_columns(
+            pl.when(pl.col("prediction_doi").is_null()).then(pl.lit("")).otherwise(pl.format("https://doi.org/10.5281/zenodo.{}", "prediction_doi")).alias("pred_doi")
+        ).drop("prediction_doi")
+
+        # Group classes: 1 if one of the class of the group is predicted, -1 without predictions.
+        for group_name, ids in group_class_ids.items():
+            df_group = df_preds.filter(pl.col("ml_class_id").is_in(ids)).group_by("frame_id").agg(pl.col("is_pred").any().cast(pl.Float64).alias(group_name))
+            df_data = df_data.join(df_group, left_on="id", right_on="frame_id", how="left")
+
+        if len(df_class_preds) != 0:
+            df_class_preds = df_class_preds.with_columns(pl.col("ml_class_id").replace_strict(class_name_by_id, return_dtype=pl.String).alias("class_name"))
+            df_pivot = df_class_preds.pivot(on="class_name", index="frame_id", values="value", aggregate_function="last")
+            df_data = df_data.join(df_pivot, left_on="id", right_on="frame_id", how="left")
         
-        df_data = pl.DataFrame(data, schema=df_header, schema_overrides=self.frame_manager.typed_frames_header, orient="row")
+        df_data = df_data.with_columns([
+            pl.col(name).fill_null(-1.0).cast(pl.Float64) if name in df_data.columns else pl.lit(-1.0, dtype=pl.Float64).alias(name) for name in group_class + class_name
+        ]).select(["FileName"] + frame_metadata_header + ["pred_doi"] + group_class + class_name)
 
         benchmarck.stop_and_show("Time to prepare, request and build dataframe")
         return df_data
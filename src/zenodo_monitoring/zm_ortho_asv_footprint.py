@@ -13,23 +13,23 @@ class OrthoASVFootprint:
         
         with open(self.data_path) as f:
             self.data = json.load(f)
-    
-    def get_data(self, year: str, empty: bool = False) -> dict:
-        
-        if empty:
-            return {
-                "type": "FeatureCollection",
-                "features": []
-            }
 
-        features = []
+        self.setup_feature_collections()
+
+
+    def setup_feature_collections(self) -> None:
+        """ Group features by year once, feature collections are stored by (year, empty) key. """
+        features_by_year = {}
         for feature in self.data["features"]:
-            year_feature = feature["properties"]["filename"][0:4]
+            features_by_year.setdefault(feature["properties"]["filename"][0:4], []).append(feature)
 
-            if year == year_feature:
-                features.append(feature)
+        self.empty_feature_collection = {"type": "FeatureCollection", "features": []}
+        self.feature_collections = {}
+        for year, features in features_by_year.items():
+            self.feature_collections[(year, False)] = {"type": "FeatureCollection", "features": features}
+            self.feature_collections[(year, True)] = self.empty_feature_collection
 
-        return {
-            "type": "FeatureCollection",
-            "features": features
-        }
\ No newline at end of file
+    
+    def get_data(self, year: str, empty: bool = False) -> dict:
+        """ Get ASV footprints of orthophotos of a year. """
+        return self.feature_collections.get((str(year), empty), self.empty_feature_collection)
@@ -0,0 +1,116 @@
+import time
+import sqlite3
+import hashlib
+import requests
+import diskcache
+from pathlib import Path
+from flask import Flask, Response, request
+
+from ..utils.constants import BYTE_TO_GIGA_BYTE, TILE_CACHE_REVALIDATE_AFTER, TILE_BROWSER_MAX_AGE, TILE_UPSTREAM_TIMEOUT
+
+TILE_LAYERS = ["ortho", "bathy", "predictions"]
+TILE_ROUTE = "/tiles/<layer>/<int:z>/<int:x>/<int:y>"
+
+class TileProxy:
+    """
+        Local proxy for the explorer tile layers. Tiles come from a local mbtiles file named {layer}_{year}.mbtiles if it exists,
+        else from upstream. Upstream tiles are cached on disk with least recently used eviction and revalidated with their ETag.
+    """
+
+    def __init__(self, upstream_url: str, cache_folder: str, max_size_gb: float, mbtiles_folder: str | None = None) -> None:
+        self.upstream_url = upstream_url
+        self.mbtiles_folder = Path(mbtiles_folder) if mbtiles_folder else None
+        self.cache = diskcache.Cache(cache_folder, size_limit=int(max_size_gb * BYTE_TO_GIGA_BYTE), eviction_policy="least-recently-used")
+        self.session = requests.Session()
+
+
+    def register_route(self, server: Flask) -> None:
+        """ Serve tiles on the flask server of the dash app. """
+        server.add_url_rule(TILE_ROUTE, "tile_proxy", self.serve_tile)
+
+
+    def get_tile_url(self, layer: str, year: str | int | None) -> str:
+        """ Leaflet url template of a layer served by the proxy. """
+        return f"/tiles/{layer}/{{z}}/{{x}}/{{y}}" + ("" if year == None else f"?year={year}")
+
+
+    def get_upstream_tile_url(self, layer: str, year: str | None, z: int, x: int, y: int) -> str:
+        """ Upstream wmts url of a tile. """
+        year_param = "" if year == None else f"&year={year}"
+        return f"{self.upstream_url}/wmts?request=GetTile&layer={layer}{year_param}&tilematrix={z}&tilerow={x}&tilecol={y}"
+
+
+    def serve_tile(self, layer: str, z: int, x: int, y: int) -> Response:
+        """ Flask view returning a tile, browsers can revalidate with If-None-Match. """
+        year = request.args.get("year")
+        if layer not in TILE_LAYERS or (year != None and not year.isnumeric()):
+            return Response(status=404)
+
+        tile = self.get_local_tile(layer, year, z, x, y) or self.get_cached_tile(layer, year, z, x, y)
+        if tile == None:
+            return Response(status=404)
+
+        headers = {"Cache-Control": f"public, max-age={TILE_BROWSER_MAX_AGE}", "ETag": f'"{tile["etag"]}"'}
+        if request.if_none_match.contains(tile["etag"]):
+            return Response(status=304, headers=headers)
+        return Response(tile["content"], content_type=tile["content_type"], headers=headers)
+
+
+    def get_local_tile(self, layer: str, year: str | None, z: int, x: int, y: int) -> dict | None:
+        """ Get a tile from a local mbtiles file, mbtiles rows are in tms order so y is flipped. """
+        if self.mbtiles_folder == None: return None
+
+        mbtiles_file = Path(self.mbtiles_folder, f"{layer}_{year}.mbtiles" if year != None else f"{layer}.mbtiles")
+        if not mbtiles_file.exists(): return None
+
+        connection = sqlite3.connect(f"{mbtiles_file.resolve().as_uri()}?mode=ro", uri=True)
+        try:
+            result = connection.execute(
+                "SELECT tile_data FROM tiles WHERE zoom_level = ? AND tile_column = ? AND tile_row = ?",
+                (z, x, 2 ** z - 1 - y)
+            ).fetchone()
+        finally:
+            connection.close()
+
+        if result == None: return None
+        content = bytes(result[0])
+        return {"content": content, "content_type": guess_tile_content_type(content), "etag": hashlib.sha1(content).hexdigest()}
+
+
+    def get_cached_tile(self, layer: str, year: str | None, z: int, x: int, y: int) -> dict | None:
+        """ Get a tile from the disk cache, fetch or revalidate it with upstream when it's too old. Stale tiles are used if upstream is down. """
+        key = f"{layer}/{year}/{z}/{x}/{y}"
+        tile = self.cache.get(key)
+        if tile != None and time.time() - tile["fetched_at"] < TILE_CACHE_REVALIDATE_AFTER:
+            return tile
+
+        headers = {"If-None-Match": tile["upstream_etag"]} if tile != None and tile["upstream_etag"] else {}
+        try:
+            r = self.session.get(self.get_upstream_tile_url(layer, year, z, x, y), headers=headers, timeout=TILE_UPSTREAM_TIMEOUT)
+        except requests.RequestException:
+            print(f"[WARNING] Cannot fetch tile {key} from upstream.")
+            return tile
+
+        if r.status_code == 304 and tile != None:
+            tile["fetched_at"] = time.time()
+        elif r.status_code == 200:
+            tile = {
+                "content": r.content,
+                "content_type": r.headers.get("Content-Type", guess_tile_content_type(r.content)),
+                "upstream_etag": r.headers.get("ETag"),
+                "etag": hashlib.sha1(r.content).hexdigest(),
+                "fetched_at": time.time()
+            }
+        else:
+            return tile
+
+        self.cache.set(key, tile)
+        return tile
+
+
+def guess_tile_content_type(content: bytes) -> str:
+    """ Content type of a tile from its first bytes. """
+    if content.startswith(b"\x89PNG"): return "image/png"
+    if content.startswith(b"\xff\xd8"): return "image/jpeg"
+    if content[8:12] == b"WEBP": return "image/webp"
+    return "application/octet-stream"
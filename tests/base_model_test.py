@@ -0,0 +1,87 @@
+import unittest
+import threading
+from unittest.mock import MagicMock
+
+from src.models.base_model import AbstractBaseDAO, IdentityMap
+from src.sql_connector.sc_connector import SQLiteConnector
+
+
+class DummyDAO(AbstractBaseDAO):
+    table_name = "dummy"
+
+    def prefetch(self, ids: list[int]) -> dict[int, str]:
+        return self._prefetch(ids, "id", "id, name", lambda results: {id: name for id, name in results})
+
+
+class TestBaseModel(unittest.TestCase):
+
+
+    def setUp(self):
+        AbstractBaseDAO.clear_identity_maps()
+
+
+    def test_identity_map_evict_least_recently_used(self):
+        identity_map = IdentityMap(max_size=2)
+        identity_map.put(1, "a")
+        identity_map.put(2, "b")
+        identity_map.get(1)
+        identity_map.put(3, "c")
+
+        self.assertIn(1, identity_map)
+        self.assertNotIn(2, identity_map)
+        self.assertEqual(len(identity_map), 2)
+
+
+    def test_identity_map_shared_between_threads(self):
+        identity_map, errors = IdentityMap(max_size=8), []
+
+        def worker(offset: int):
+            try:
+                for i in range(20000):
+                    identity_map.put((i + offset) % 16, i)
+                    identity_map.get((i + offset + 1) % 16)
+                    if i % 1000 == 0: identity_map.clear()
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=worker, args=(offset, )) for offset in range(4)]
+        [thread.start() for thread in threads]
+        [thread.join() for thread in threads]
+
+        self.assertEqual(errors, [])
+        self.assertLessEqual(len(identity_map), 8)
+
+
+    def test_prefetch_only_query_missing_ids(self):
+        dao = DummyDAO()
+        dao.sql_connector = MagicMock()
+        dao.sql_connector.execute_query.return_value = [(1, "a"), (2, "b")]
+
+        self.assertEqual(dao.prefetch([1, 2, 2, None]), {1: "a", 2: "b"})
+        self.assertEqual(dao.sql_connector.execute_query.call_args[0][1], (1, 2))
+
+        dao.sql_connector.execute_query.reset_mock()
+        self.assertEqual(dao.prefetch([2, 1]), {1: "a", 2: "b"})
+        dao.sql_connector.execute_query.assert_not_called()
+
+
+    def test_identity_map_shared_between_instances(self):
+        dao = DummyDAO()
+        dao.sql_connector = MagicMock()
+        dao.sql_connector.execute_query.return_value = [(1, "a")]
+        dao.prefetch([1])
+
+        self.assertEqual(DummyDAO().identity_map.get(1), "a")
+
+
+    def test_identity_maps_cleared_when_database_close(self):
+        dao = DummyDAO()
+        dao.identity_map.put(1, "a")
+
+        SQLiteConnector().close()
+
+        self.assertNotIn(1, dao.identity_map)
+
+
+if __name__ == "__main__":
+    unittest.main()
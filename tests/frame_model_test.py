@@ -0,0 +1,47 @@
+import unittest
+from shapely import Polygon
+from unittest.mock import MagicMock
+
+from src.models.frame_model import FrameDAO
+from src.models.deposit_model import VersionDTO
+
+
+class TestFrameModel(unittest.TestCase):
+
+
+    def test_get_frames_table(self):
+        dao = FrameDAO()
+        dao.sql_connector = MagicMock()
+        dao.sql_connector.execute_query_by_batch.return_value = iter([
+            [(1, "11", "a.jpg", "S_a.jpg", None, -21.1, 55.1, 1.5, None, None, None, "2023-01-01 10:00:00", 1)],
+            [(2, "11", "b.jpg", "S_b.jpg", None, None, None, None, None, None, None, "2023-01-01 11:00:00", None)],
+        ])
+
+        df_frames = dao.get_frames_table(VersionDTO(doi="11", deposit=None))
+
+        self.assertEqual(df_frames.shape, (2, 13))
+        self.assertEqual(df_frames["FileName"].to_list(), ["S_a.jpg", "S_b.jpg"])
+        self.assertEqual(df_frames["GPSLatitude"].to_list(), [-21.1, None])
+        self.assertEqual(dao.sql_connector.execute_query_by_batch.call_args[0][1], ("11", ))
+
+
+    def test_get_frames_table_empty(self):
+        dao = FrameDAO()
+        dao.sql_connector = MagicMock()
+        dao.sql_connector.execute_query_by_batch.return_value = iter([])
+
+        self.assertEqual(dao.get_frames_table().shape, (0, 13))
+
+
+    def test_build_date_type_position_query_use_rtree(self):
+        polygon = Polygon([(55, -21.5), (55.5, -21.5), (55.5, -21), (55, -21)])
+        query, params = FrameDAO().build_date_type_position_query("f.id", [polygon], ["2023-01-01", "2023-12-31"], ["ASV"])
+
+        self.assertIn("rtree_frame_GPSPosition", query)
+        self.assertNotIn("strftime", query)
+        self.assertEqual(query.count("?"), len(params))
+        self.assertEqual(params, (polygon.wkt, "2023-01-01", "2023-12-31", "ASV", 55.5, 55, -21, -21.5))
+
+
+if __name__ == "__main__":
+    unittest.main()
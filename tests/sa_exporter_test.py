@@ -0,0 +1,53 @@
+import unittest
+import tempfile
+import polars as pl
+from pathlib import Path
+from unittest.mock import patch, PropertyMock, MagicMock
+
+from src.seatizen_atlas.sa_exporter import AtlasExport
+
+
+class TestAtlasExport(unittest.TestCase):
+
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.exporter = AtlasExport(Path(self.tmp_dir.name, "atlas.gpkg"), Path(self.tmp_dir.name))
+
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+
+    @patch("src.seatizen_atlas.sa_exporter.MultilabelLabelDAO.labels", new_callable=PropertyMock)
+    def test_multilabel_annotation_frames_across_batches(self, mock_labels):
+        mock_labels.return_value = [MagicMock(), MagicMock()]
+        mock_labels.return_value[0].name, mock_labels.return_value[1].name = "Sand", "Coral"
+        batches = [
+            [("a.jpg", "11", "s/a.jpg", "2023-01-01", "Coral", 1), ("b.jpg", "10", "s/b.jpg", "2024-01-01", "Sand", 0)],
+            [("b.jpg", "10", "s/b.jpg", "2024-01-01", "Coral", 1)],
+        ]
+
+        with patch.object(self.exporter.ml_annotation_manager, "iter_latest_annotations_by_frame", return_value=iter(batches)):
+            self.exporter.metadata_multilabel_annotation_csv()
+
+        df = pl.read_parquet(Path(self.tmp_dir.name, "metadata_multilabel_annotation.parquet"))
+        self.assertEqual(df.columns, ["FileName", "frame_doi", "relative_file_path", "annotation_date", "Sand", "Coral"])
+        self.assertEqual(df.rows(), [("a.jpg", "11", "s/a.jpg", "2023-01-01", -1, 1), ("b.jpg", "10", "s/b.jpg", "2024-01-01", 0, 1)])
+
+
+    def test_metadata_images_from_frames_table(self):
+        self.exporter.frames_manager.sql_connector = MagicMock()
+        self.exporter.frames_manager.sql_connector.execute_query_by_batch.return_value = iter([
+            [(1, "11", "a.jpg", "S_a.jpg", "S/DCIM/a.jpg", -21.1, 55.1, 1.5, 2.0, 3.0, 4.0, "2023-01-01 10:00:00", 1)],
+        ])
+
+        self.exporter.metadata_images_csv()
+
+        df = pl.read_parquet(Path(self.tmp_dir.name, "metadata_images.parquet"))
+        self.assertEqual(df.columns[:4], ["OriginalFileName", "FileName", "relative_file_path", "frames_doi"])
+        self.assertEqual(df.row(0), ("a.jpg", "S_a.jpg", "S/DCIM/a.jpg", "https://doi.org/10.5281/zenodo.11", -21.1, 55.1, 1.5, 3.0, 2.0, 4.0, "2023-01-01 10:00:00", 1.0))
+
+
+if __name__ == "__main__":
+    unittest.main()
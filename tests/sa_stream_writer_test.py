@@ -0,0 +1,52 @@
+import unittest
+import tempfile
+import polars as pl
+from pathlib import Path
+
+from src.seatizen_atlas.sa_stream_writer import CsvParquetStreamWriter
+
+
+class TestCsvParquetStreamWriter(unittest.TestCase):
+
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.csv_path = Path(self.tmp_dir.name, "out.csv")
+        self.parquet_path = Path(self.tmp_dir.name, "out.parquet")
+
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+
+    def test_write_batches_with_one_header(self):
+        with CsvParquetStreamWriter(self.csv_path, self.parquet_path) as writer:
+            writer.write(pl.DataFrame({"a": [1, 2], "b": ["x", "y"]}))
+            writer.write(pl.DataFrame({"a": [3], "b": ["z"]}))
+
+        self.assertEqual(writer.nb_rows, 3)
+        self.assertEqual(self.csv_path.read_text(), "a,b\n1,x\n2,y\n3,z\n")
+        self.assertEqual(pl.read_parquet(self.parquet_path).to_dict(as_series=False), {"a": [1, 2, 3], "b": ["x", "y", "z"]})
+
+
+    def test_no_data_remove_previous_export(self):
+        self.csv_path.write_text("a\n1\n")
+        self.parquet_path.write_bytes(b"old")
+        with CsvParquetStreamWriter(self.csv_path, self.parquet_path) as writer:
+            writer.write(pl.DataFrame())
+
+        self.assertFalse(self.csv_path.exists())
+        self.assertFalse(self.parquet_path.exists())
+
+
+    def test_no_data_write_header_of_schema(self):
+        self.csv_path.write_text("a,b\n1,x\n")
+        with CsvParquetStreamWriter(self.csv_path, self.parquet_path, {"a": pl.Int64, "b": pl.String}) as writer:
+            writer.write(pl.DataFrame())
+
+        self.assertEqual(self.csv_path.read_text(), "a,b\n")
+        self.assertEqual(pl.read_parquet(self.parquet_path).schema, {"a": pl.Int64, "b": pl.String})
+
+
+if __name__ == "__main__":
+    unittest.main()
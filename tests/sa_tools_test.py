@@ -0,0 +1,38 @@
+import unittest
+import pandas as pd
+
+from src.seatizen_atlas.sa_tools import build_frames_datetime
+
+
+class TestSeatizenAtlasTools(unittest.TestCase):
+
+
+    def test_build_frames_datetime_subsec(self):
+        metadata_csv = pd.DataFrame({
+            "SubSecDateTimeOriginal": ["2023:05:12 10:11:12.345", "2023:05:12 14:11:12+04:00", "1970:01:01 01:02:03.123"],
+            "DateTimeOriginal": ["2023:05:12 10:11:12", "2023:05:12 10:11:12", "2023:05:13 08:09:10"]
+        })
+        self.assertEqual(build_frames_datetime(metadata_csv, "2023-05-12").tolist(), [
+            "2023-05-12 10:11:12", "2023-05-12 10:11:12", "2023-05-13 08:09:10"
+        ])
+
+
+    def test_build_frames_datetime_1970(self):
+        metadata_csv = pd.DataFrame({"SubSecDateTimeOriginal": ["1970:01:01 01:02:03.123", "1970:01:01 13:02:03.123"]})
+        self.assertEqual(build_frames_datetime(metadata_csv, "2023-05-12").tolist(), [
+            "2023-05-12 13:02:03", "2023-05-12 01:02:03"
+        ])
+
+
+    def test_build_frames_datetime_gps(self):
+        metadata_csv = pd.DataFrame({"GPSDateTime": ["2015:03:04 05:06:07.89Z"]})
+        self.assertEqual(build_frames_datetime(metadata_csv, "2015-03-04").tolist(), ["2015-03-04 05:06:07"])
+
+
+    def test_build_frames_datetime_no_column(self):
+        metadata_csv = pd.DataFrame({"GPSLatitude": [1.0, 2.0]})
+        self.assertEqual(build_frames_datetime(metadata_csv, "2015-03-04").tolist(), [None, None])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,5 +1,10 @@
+import os
+import sqlite3
 import unittest
+import tempfile
 from pathlib import Path
+from unittest.mock import patch
+from concurrent.futures import ThreadPoolExecutor
 
 from src.sql_connector.sc_connector import SQLiteConnector
 
@@ -26,6 +31,84 @@ class TestSQLConnector(unittest.TestCase):
 
         sqliteconnector.close()
 
+    @patch("src.sql_connector.sc_connector.os.register_at_fork")
+    def test_fork_hook_reset_current_instance(self, mock_register_at_fork):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            for i in range(2):
+                sqliteconnector = SQLiteConnector()
+                sqliteconnector._connection = sqlite3.connect(Path(tmp_dir, f"{i}.gpkg"))
+                sqliteconnector.close()
+        mock_register_at_fork.assert_not_called()
+
+        sqliteconnector = SQLiteConnector()
+        sqliteconnector._writer_thread = 1
+        pid = os.fork()
+        if pid == 0:
+            os._exit(0 if SQLiteConnector()._writer_thread == None else 1)
+        self.assertEqual(os.waitpid(pid, 0)[1], 0)
+
+    def test_connection_profile(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            db_path = Path(tmp_dir, "profile.gpkg")
+            sqliteconnector = SQLiteConnector()
+            sqliteconnector._connection = sqlite3.connect(db_path)
+            sqliteconnector._apply_profile("bulk_load")
+
+            self.assertEqual(sqliteconnector._connection.execute("PRAGMA journal_mode").fetchone()[0], "wal")
+            self.assertEqual(sqliteconnector._connection.execute("PRAGMA cache_size").fetchone()[0], -524288)
+
+            sqliteconnector.execute_query("CREATE TABLE t (id INTEGER)")
+            sqliteconnector.close()
+
+            self.assertFalse(Path(tmp_dir, "profile.gpkg-wal").exists())
+            self.assertEqual(sqlite3.connect(db_path).execute("PRAGMA journal_mode").fetchone()[0], "delete")
+
+    def test_transaction_with_savepoint(self):
+        sqliteconnector = SQLiteConnector()
+        sqliteconnector._connection = sqlite3.connect(":memory:")
+        sqliteconnector.execute_query("CREATE TABLE t (id INTEGER)")
+
+        with sqliteconnector.transaction():
+            sqliteconnector.execute_query("INSERT INTO t (id) VALUES (?)", (1, ))
+            with self.assertRaises(ValueError):
+                with sqliteconnector.transaction():
+                    sqliteconnector.execute_query("INSERT INTO t (id) VALUES (?)", (2, ))
+                    raise ValueError()
+            sqliteconnector.execute_query("INSERT INTO t (id) VALUES (?)", [(3, ), (4, )])
+
+        with self.assertRaises(ValueError):
+            with sqliteconnector.transaction():
+                sqliteconnector.execute_query("INSERT INTO t (id) VALUES (?)", (5, ))
+                raise ValueError()
+
+        self.assertEqual(sqliteconnector.execute_query("SELECT id FROM t ORDER BY id"), [(1, ), (3, ), (4, )])
+        self.assertFalse(sqliteconnector._connection.in_transaction)
+        sqliteconnector.close()
+
+    def test_read_connection_by_thread(self):
+        def open_read_only(sqlite_filepath, profile, read_only=False):
+            return sqlite3.connect(f"{Path(sqlite_filepath).as_uri()}?mode=ro", uri=True, check_same_thread=False)
+
+        with tempfile.TemporaryDirectory() as tmp_dir, patch.object(SQLiteConnector, "_open_connection", side_effect=open_read_only):
+            db_path = Path(tmp_dir, "pool.gpkg")
+            sqliteconnector = SQLiteConnector()
+            sqliteconnector._connection = sqlite3.connect(db_path, check_same_thread=False)
+            sqliteconnector._sqlite_filepath, sqliteconnector._writer_thread = db_path, None
+            sqliteconnector.execute_query("CREATE TABLE t (id INTEGER)")
+            sqliteconnector.execute_query("INSERT INTO t (id) VALUES (?)", (1, ))
+
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                results = list(executor.map(lambda _: sqliteconnector.execute_query("SELECT id FROM t"), range(4)))
+            
+            self.assertEqual(results, [[(1, )]] * 4)
+            self.assertIn(len(sqliteconnector._read_connections), (1, 2))
+            self.assertNotIn(sqliteconnector._connection, sqliteconnector._read_connections)
+            sqliteconnector.close()
+
+    def test_unknown_connection_profile(self):
+        with self.assertRaises(NameError):
+            SQLiteConnector().connect(":memory:", "unknown")
+
 
 
 if __name__ == "__main__":
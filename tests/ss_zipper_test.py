@@ -0,0 +1,28 @@
+import os
+import shutil
+import unittest
+from pathlib import Path
+
+from src.seatizen_session.ss_zipper import compute_zip_folder_size
+
+FOLDER = Path("/tmp/00_plancha/zip_size")
+
+
+class TestSessionZipper(unittest.TestCase):
+
+
+    def test_compute_zip_folder_size_same_as_make_archive(self):
+        if FOLDER.exists():
+            shutil.rmtree(FOLDER)
+        data_folder = Path(FOLDER, "IA")
+        Path(data_folder, "sub", "empty").mkdir(parents=True)
+        Path(data_folder, "predictions.csv").write_text("FileName,score\n" + "frame.jpg,0.5\n" * 1000)
+        Path(data_folder, "sub", "random.bin").write_bytes(os.urandom(10000))
+
+        zip_path = shutil.make_archive(str(Path(FOLDER, "IA")), "zip", data_folder)
+
+        self.assertEqual(compute_zip_folder_size(data_folder), os.path.getsize(zip_path))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,102 @@
+import hashlib
+import threading
+import unittest
+import tempfile
+import requests
+from pathlib import Path
+from unittest.mock import patch, MagicMock
+
+from src.zenodo_api.za_base_function import file_downloader
+
+CONTENT = b"0123456789" * 10
+
+
+def mock_response(status_code: int, chunks: list, fail_after: bool = False) -> MagicMock:
+    def iter_content(chunk_size):
+        yield from chunks
+        if fail_after:
+            raise requests.ConnectionError("Connection lost")
+
+    r = MagicMock(status_code=status_code, headers={"content-length": str(sum(len(c) for c in chunks))})
+    r.__enter__.return_value = r
+    r.iter_content.side_effect = iter_content
+    return r
+
+
+class TestFileDownloader(unittest.TestCase):
+
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.output_file = Path(self.tmp_dir.name, "DCIM.zip")
+
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+
+    @patch("src.zenodo_api.za_base_function.time.sleep")
+    @patch("src.zenodo_api.za_base_function.HTTPClient.get")
+    def test_resume_with_range_after_error(self, mock_get, mock_sleep):
+        mock_get.side_effect = [mock_response(200, [CONTENT[:30]], fail_after=True), mock_response(206, [CONTENT[30:]])]
+
+        checksum = file_downloader("url", self.output_file)
+
+        self.assertEqual(checksum, hashlib.md5(CONTENT).hexdigest())
+        self.assertEqual(self.output_file.read_bytes(), CONTENT)
+        self.assertEqual(mock_get.call_args_list[1][1]["headers"], {"Range": "bytes=30-"})
+        self.assertFalse(Path(f"{self.output_file}.part.offset").exists())
+
+
+    @patch("src.zenodo_api.za_base_function.HTTPClient.get")
+    def test_resume_part_file_of_previous_run(self, mock_get):
+        Path(f"{self.output_file}.part").write_bytes(CONTENT[:50] + b"garbage")
+        Path(f"{self.output_file}.part.offset").write_text("50")
+        mock_get.return_value = mock_response(206, [CONTENT[50:]])
+
+        checksum = file_downloader("url", self.output_file)
+
+        self.assertEqual(checksum, hashlib.md5(CONTENT).hexdigest())
+        self.assertEqual(self.output_file.read_bytes(), CONTENT)
+
+
+    @patch("src.zenodo_api.za_base_function.HTTPClient.get")
+    def test_restart_when_range_not_supported(self, mock_get):
+        Path(f"{self.output_file}.part").write_bytes(CONTENT[:50])
+        Path(f"{self.output_file}.part.offset").write_text("50")
+        mock_get.return_value = mock_response(200, [CONTENT])
+
+        checksum = file_downloader("url", self.output_file)
+
+        self.assertEqual(checksum, hashlib.md5(CONTENT).hexdigest())
+        self.assertEqual(self.output_file.read_bytes(), CONTENT)
+
+
+    @patch("src.zenodo_api.za_base_function.HTTPClient.get")
+    def test_not_found_is_not_retried(self, mock_get):
+        mock_get.return_value = mock_response(404, [])
+
+        with self.assertRaises(NameError):
+            file_downloader("url", self.output_file)
+        self.assertEqual(mock_get.call_count, 1)
+
+
+    @patch("src.zenodo_api.za_base_function.HTTPClient.get")
+    def test_stop_event_keep_part_file(self, mock_get):
+        stop_event = threading.Event()
+        def iter_content(chunk_size):
+            yield CONTENT[:30]
+            stop_event.set()
+            yield CONTENT[30:]
+        r = mock_response(200, [])
+        r.iter_content.side_effect = iter_content
+        mock_get.return_value = r
+
+        with self.assertRaises(NameError):
+            file_downloader("url", self.output_file, stop_event=stop_event)
+        self.assertEqual(mock_get.call_count, 1)
+        self.assertEqual(Path(f"{self.output_file}.part.offset").read_text(), "30")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,89 @@
+import unittest
+import threading
+import requests
+from unittest.mock import patch, MagicMock
+
+from src.zenodo_api.za_http_client import HTTPClient, TokenBucket
+
+
+def mock_response(status_code: int, headers: dict = {}) -> MagicMock:
+    return MagicMock(status_code=status_code, headers=headers)
+
+
+class TestHTTPClient(unittest.TestCase):
+
+
+    def setUp(self):
+        self.client = HTTPClient()
+        self.client._metrics = {}
+
+
+    def test_singleton(self):
+        self.assertIs(HTTPClient(), self.client)
+
+
+    def test_singleton_created_once_between_threads(self):
+        HTTPClient._instance = None
+        barrier, clients = threading.Barrier(8), []
+
+        def worker():
+            barrier.wait()
+            clients.append(HTTPClient())
+
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        [thread.start() for thread in threads]
+        [thread.join() for thread in threads]
+
+        self.assertEqual(len({id(client) for client in clients}), 1)
+
+
+    @patch("src.zenodo_api.za_http_client.time.sleep")
+    def test_retry_after_is_respected(self, mock_sleep):
+        with patch.object(self.client._session, "request", side_effect=[mock_response(429, {"Retry-After": "7"}), mock_response(200)]) as mock_request:
+            r = self.client.get("https://example.org/api/records/123")
+
+        self.assertEqual(r.status_code, 200)
+        self.assertEqual(mock_request.call_count, 2)
+        mock_sleep.assert_called_once_with(7.0)
+        self.assertEqual(mock_request.call_args[1]["timeout"], (10, 60))
+
+        metric = self.client.get_metrics()["GET example.org/api/records/*"]
+        self.assertEqual((metric["nb_requests"], metric["nb_errors"], metric["nb_retries"]), (2, 1, 1))
+
+
+    @patch("src.zenodo_api.za_http_client.time.sleep")
+    def test_post_not_retried_on_server_error(self, mock_sleep):
+        with patch.object(self.client._session, "request", return_value=mock_response(500)) as mock_request:
+            r = self.client.post("https://example.org/api/deposit/depositions/1/actions/publish")
+
+        self.assertEqual(r.status_code, 500)
+        self.assertEqual(mock_request.call_count, 1)
+
+
+    @patch("src.zenodo_api.za_http_client.time.sleep")
+    def test_connection_error_retried_until_max(self, mock_sleep):
+        with patch.object(self.client._session, "request", side_effect=requests.ConnectionError("down")) as mock_request:
+            with self.assertRaises(requests.ConnectionError):
+                self.client.get("https://example.org/api/records", max_retry=2)
+
+        self.assertEqual(mock_request.call_count, 3)
+        self.assertEqual([call[0][0] for call in mock_sleep.call_args_list], [0.5, 1.0])
+
+
+    def test_endpoint(self):
+        self.assertEqual(HTTPClient.get_endpoint("GET", "https://zenodo.org/api/records/123/files/DCIM.zip/content?access_token=x"), "GET zenodo.org/api/records/*/files/*/content")
+
+
+    @patch("src.zenodo_api.za_http_client.time.sleep")
+    def test_token_bucket(self, mock_sleep):
+        bucket = TokenBucket(2, capacity=2)
+        bucket.consume()
+        bucket.consume()
+        mock_sleep.assert_not_called()
+
+        bucket.consume()
+        self.assertAlmostEqual(mock_sleep.call_args[0][0], 0.5, places=2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,100 @@
+import os
+import zipfile
+import unittest
+import tempfile
+import threading
+from pathlib import Path
+from http.server import HTTPServer, BaseHTTPRequestHandler
+
+from src.zenodo_api.za_remote_zip import HttpRangeFile, extract_remote_zip
+
+
+class RangeHandler(BaseHTTPRequestHandler):
+    """ Serve server.content with range support. """
+
+    def do_GET(self):
+        content = self.server.content
+        self.server.nb_requests += 1
+        if self.server.support_range and "Range" in self.headers:
+            start, end = self.headers["Range"].replace("bytes=", "").split("-")
+            start, end = int(start), min(int(end) if end else len(content) - 1, len(content) - 1)
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {start}-{end}/{len(content)}")
+            body = content[start:end + 1]
+        else:
+            self.send_response(200)
+            body = content
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestRemoteZip(unittest.TestCase):
+
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        zip_path = Path(self.tmp_dir.name, "FRAMES.zip")
+        with zipfile.ZipFile(zip_path, "w", zipfile.ZIP_DEFLATED) as zip_ref:
+            for i in range(20):
+                zip_ref.writestr(f"DCIM/frame_{i}.jpg", bytes([i]) * 10000)
+
+        self.server = HTTPServer(("127.0.0.1", 0), RangeHandler)
+        self.server.content, self.server.nb_requests, self.server.support_range = zip_path.read_bytes(), 0, True
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = f"http://127.0.0.1:{self.server.server_port}/FRAMES.zip"
+
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.tmp_dir.cleanup()
+
+
+    def test_extract_members(self):
+        output_folder = Path(self.tmp_dir.name, "out")
+        extracted = extract_remote_zip(self.url, output_folder, ["DCIM/frame_3.jpg", "DCIM/frame_12.jpg", "DCIM/unknown.jpg"])
+
+        self.assertEqual(sorted(extracted), ["DCIM/frame_12.jpg", "DCIM/frame_3.jpg"])
+        self.assertEqual(Path(output_folder, "DCIM", "frame_3.jpg").read_bytes(), bytes([3]) * 10000)
+        self.assertFalse(Path(output_folder, "DCIM", "frame_4.jpg").exists())
+
+
+    def test_extract_all_with_small_buffer(self):
+        output_folder = Path(self.tmp_dir.name, "out")
+        remote_file = HttpRangeFile(self.url, buffer_size=1024)
+        with zipfile.ZipFile(remote_file) as zip_ref:
+            zip_ref.extractall(output_folder)
+
+        self.assertEqual(len(list(Path(output_folder, "DCIM").iterdir())), 20)
+        self.assertGreater(remote_file.nb_requests, 2)
+
+
+    def test_stored_members_cross_buffer_boundaries(self):
+        zip_path, contents = Path(self.tmp_dir.name, "STORED.zip"), {f"DCIM/frame_{i}.jpg": os.urandom(1000 + 37 * i) for i in range(20)}
+        with zipfile.ZipFile(zip_path, "w", zipfile.ZIP_STORED) as zip_ref:
+            for name, content in contents.items():
+                zip_ref.writestr(name, content)
+        self.server.content = zip_path.read_bytes()
+
+        output_folder = Path(self.tmp_dir.name, "out")
+        remote_file = HttpRangeFile(self.url, buffer_size=1500)
+        with zipfile.ZipFile(remote_file) as zip_ref:
+            zip_ref.extractall(output_folder)
+
+        for name, content in contents.items():
+            self.assertEqual(Path(output_folder, name).read_bytes(), content)
+
+
+    def test_range_not_supported(self):
+        self.server.support_range = False
+
+        with self.assertRaises(NameError):
+            HttpRangeFile(self.url)
+
+
+if __name__ == "__main__":
+    unittest.main()
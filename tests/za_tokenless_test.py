@@ -1,8 +1,14 @@
+import zipfile
+import hashlib
+import requests
 import unittest
+import tempfile
+from pathlib import Path
 from unittest.mock import patch, MagicMock
 
 from src.utils.constants import SEATIZEN_ATLAS_DOI
-from src.zenodo_api.za_tokenless import get_version_from_doi, get_version_from_session_name, get_all_versions_from_session_name
+from src.zenodo_api.za_base_function import BandwidthLimiter
+from src.zenodo_api.za_tokenless import get_version_from_doi, get_version_from_session_name, get_all_versions_from_session_name, download_manager_without_token
 
 
 class TestZenodoAPITokenLess(unittest.TestCase):
@@ -23,58 +29,130 @@ class TestZenodoAPITokenLess(unittest.TestCase):
         self.assertEqual(version_json["metadata"]["alternate_identifiers"][0]["identifier"], "urn:20221021_SYC-ALDABRA-ARM01_ASV-02_00")
     
 
-    @patch("src.zenodo_api.za_tokenless.requests")
-    def test_get_all_versions_multiple_deposit(self, mock_requests):
+    @patch("src.zenodo_api.za_tokenless.HTTPClient")
+    def test_get_all_versions_multiple_deposit(self, mock_client):
         mock_response = MagicMock()
         mock_response.status_code = 200
         mock_response.json.return_value = {"hits": {"hits": [{"conceptrecid": 1}, {"conceptrecid": 1}, {"conceptrecid": 2}]}}
 
-        mock_requests.get.return_value = mock_response
+        mock_client.return_value.get.return_value = mock_response
 
         self.assertEqual(get_all_versions_from_session_name(""), [])
     
 
-    @patch("src.zenodo_api.za_tokenless.requests")
-    def test_get_all_versions_no_deposit(self, mock_requests):
+    @patch("src.zenodo_api.za_tokenless.HTTPClient")
+    def test_get_all_versions_no_deposit(self, mock_client):
 
         mock_response = MagicMock()
         mock_response.status_code = 200
         mock_response.json.return_value = {"hits": {"hits": []}}
 
-        mock_requests.get.return_value = mock_response
+        mock_client.return_value.get.return_value = mock_response
 
         self.assertEqual(get_all_versions_from_session_name(""), [])
     
 
-    @patch("src.zenodo_api.za_tokenless.requests")
-    def test_get_all_versions(self, mock_requests):
+    @patch("src.zenodo_api.za_tokenless.HTTPClient")
+    def test_get_all_versions(self, mock_client):
 
         mock_response = MagicMock()
         mock_response.status_code = 200
         mock_response.json.return_value = {"hits": {"hits": [{"conceptrecid": 1}, {"conceptrecid": 1}, {"conceptrecid": 1}]}}
 
-        mock_requests.get.return_value = mock_response
+        mock_client.return_value.get.return_value = mock_response
 
         self.assertEqual(get_all_versions_from_session_name(""), [{"conceptrecid": 1}, {"conceptrecid": 1}, {"conceptrecid": 1}])
     
 
-    @patch("src.zenodo_api.za_tokenless.requests")
-    def test_get_all_versions_error_serveur(self, mock_requests):
+    @patch("src.zenodo_api.za_tokenless.HTTPClient")
+    def test_get_all_versions_error_serveur(self, mock_client):
 
         mock_response = MagicMock()
         mock_response.status_code = 500
-        mock_requests.get.return_value = mock_response
+        mock_client.return_value.get.return_value = mock_response
 
         self.assertEqual(get_all_versions_from_session_name(""), [])
     
-    @patch("src.zenodo_api.za_tokenless.requests")
-    def test_get_all_versions_error_serveur(self, mock_requests):
+    @patch("src.zenodo_api.za_tokenless.HTTPClient")
+    def test_get_all_versions_error_serveur(self, mock_client):
 
         mock_response = MagicMock()
         mock_response.status_code = 404
-        mock_requests.get.return_value = mock_response
+        mock_client.return_value.get.return_value = mock_response
 
         self.assertEqual(get_all_versions_from_session_name(""), [])
 
+
+    @patch("src.zenodo_api.za_tokenless.file_downloader")
+    def test_download_manager_concurrent(self, mock_file_downloader):
+        contents = {"METADATA.zip": None, "DCIM_1.zip": None, "README.md": b"readme"}
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            for name in ["METADATA.zip", "DCIM_1.zip"]:
+                zip_path = Path(tmp_dir, name)
+                with zipfile.ZipFile(zip_path, "w") as zip_ref:
+                    zip_ref.writestr(f"{name}.txt", name)
+                contents[name] = zip_path.read_bytes()
+
+            def fake_download(url, output_file, params={}, bandwidth_limiter=None, stop_event=None):
+                output_file.write_bytes(contents[output_file.name])
+                return hashlib.md5(contents[output_file.name]).hexdigest()
+            mock_file_downloader.side_effect = fake_download
+
+            files = [{"key": key, "checksum": f"md5:{hashlib.md5(content).hexdigest()}"} for key, content in contents.items()]
+            output_folder = Path(tmp_dir, "out")
+            download_manager_without_token(files, output_folder, "session", "123", nb_workers=3, max_bandwidth=100)
+
+            self.assertEqual(mock_file_downloader.call_count, 3)
+            self.assertTrue(Path(output_folder, "session", "METADATA", "METADATA.zip.txt").exists())
+            self.assertTrue(Path(output_folder, "session", "DCIM", "DCIM_1.zip.txt").exists())
+            self.assertEqual(Path(output_folder, "session", "README.md").read_bytes(), b"readme")
+            self.assertFalse(Path(output_folder, "session", "ZIP").exists())
+
+
+    @patch("src.zenodo_api.za_tokenless.extract_remote_zip")
+    @patch("src.zenodo_api.za_tokenless.file_downloader")
+    def test_download_manager_stream_zip(self, mock_file_downloader, mock_extract_remote_zip):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            files = [{"key": "PROCESSED_DATA_IA.zip", "checksum": "md5:0"}]
+            download_manager_without_token(files, Path(tmp_dir), "session", "123", stream_zip=True)
+
+            mock_file_downloader.assert_not_called()
+            self.assertEqual(mock_extract_remote_zip.call_args[0][1], Path(tmp_dir, "session", "PROCESSED_DATA", "IA"))
+
+
+    @patch("src.zenodo_api.za_tokenless.extract_remote_zip")
+    @patch("src.zenodo_api.za_tokenless.file_downloader")
+    def test_download_manager_stream_zip_fallback_on_connection_error(self, mock_file_downloader, mock_extract_remote_zip):
+        mock_extract_remote_zip.side_effect = requests.ConnectionError("Range probe failed")
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            zip_path = Path(tmp_dir, "source.zip")
+            with zipfile.ZipFile(zip_path, "w") as zip_ref:
+                zip_ref.writestr("IA.csv", "IA")
+            content = zip_path.read_bytes()
+
+            def fake_download(url, output_file, params={}, bandwidth_limiter=None, stop_event=None):
+                output_file.write_bytes(content)
+                return hashlib.md5(content).hexdigest()
+            mock_file_downloader.side_effect = fake_download
+
+            files = [{"key": "PROCESSED_DATA_IA.zip", "checksum": f"md5:{hashlib.md5(content).hexdigest()}"}]
+            download_manager_without_token(files, Path(tmp_dir), "session", "123", stream_zip=True)
+
+            self.assertTrue(Path(tmp_dir, "session", "PROCESSED_DATA", "IA", "IA.csv").exists())
+
+
+    @patch("src.zenodo_api.za_tokenless.file_downloader")
+    def test_download_manager_shared_bandwidth_limiter(self, mock_file_downloader):
+        mock_file_downloader.return_value = "0"
+        bandwidth_limiter = BandwidthLimiter(1000000)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            files = [{"key": "README.md", "checksum": "md5:0"}]
+            Path(tmp_dir, "session", "ZIP").mkdir(parents=True)
+            Path(tmp_dir, "session", "ZIP", "README.md").write_bytes(b"readme")
+            download_manager_without_token(files, Path(tmp_dir), "session", "123", max_bandwidth=100, bandwidth_limiter=bandwidth_limiter)
+
+        self.assertIs(mock_file_downloader.call_args[1]["bandwidth_limiter"], bandwidth_limiter)
+
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
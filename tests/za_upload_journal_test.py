@@ -0,0 +1,97 @@
+import hashlib
+import unittest
+import tempfile
+from pathlib import Path
+from unittest.mock import patch
+
+from src.zenodo_api.za_token import ZenodoAPI
+from src.zenodo_api.za_upload_journal import UploadJournal
+
+
+class TestUploadJournal(unittest.TestCase):
+
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.folder = Path(self.tmp_dir.name, "session")
+        self.folder.mkdir()
+        self.journal_folder = Path(self.tmp_dir.name, "journal")
+
+        for name in ["DCIM.zip", "GPS.zip", "METADATA.zip"]:
+            Path(self.folder, name).write_bytes(name.encode("utf-8"))
+
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+
+    def test_journal_is_reloaded(self):
+        journal = UploadJournal(self.folder, self.journal_folder)
+        journal.set_draft(42, "bucket", "new_version", "PROCESSED_DATA")
+        journal.set_uploaded("DCIM.zip", "abc")
+
+        journal = UploadJournal(self.folder, self.journal_folder)
+        self.assertEqual(journal.deposit_id, 42)
+        self.assertEqual(journal.bucket_url, "bucket")
+        self.assertTrue(journal.is_same_upload("new_version", "PROCESSED_DATA"))
+        self.assertEqual(journal.data["uploaded"], {"DCIM.zip": "abc"})
+
+        journal.delete()
+        self.assertIsNone(UploadJournal(self.folder, self.journal_folder).deposit_id)
+
+
+    @patch("src.zenodo_api.za_token.HTTPClient")
+    def test_draft_of_other_upload_is_not_resumed(self, mock_client):
+        journal = UploadJournal(self.folder, self.journal_folder)
+        journal.set_draft(42, "bucket", "new_version", "PROCESSED_DATA")
+        api = ZenodoAPI("", {"ACCESS_TOKEN": "token", "ZENODO_LINK": "link"})
+
+        self.assertIsNone(api._ZenodoAPI__resume_draft(journal, "new_version", "CUSTOM"))
+        self.assertIsNone(api._ZenodoAPI__resume_draft(journal, "new_deposit", "PROCESSED_DATA"))
+        mock_client.assert_not_called()
+
+
+    @patch("src.zenodo_api.za_upload_journal.md5")
+    def test_md5_is_cached(self, mock_md5):
+        mock_md5.return_value = "abc"
+        journal = UploadJournal(self.folder, self.journal_folder)
+        file = Path(self.folder, "DCIM.zip")
+
+        journal.get_md5(file)
+        self.assertEqual(UploadJournal(self.folder, self.journal_folder).get_md5(file), "abc")
+        self.assertEqual(mock_md5.call_count, 1)
+
+
+    @patch("src.zenodo_api.za_token.file_uploader")
+    def test_upload_skip_files_already_in_draft(self, mock_uploader):
+        mock_uploader.side_effect = lambda url, file, params: hashlib.md5(file.read_bytes()).hexdigest()
+        journal = UploadJournal(self.folder, self.journal_folder)
+        api = ZenodoAPI("", {"ACCESS_TOKEN": "token", "ZENODO_LINK": "link"})
+
+        remote_files = [
+            {"filename": "DCIM.zip", "checksum": hashlib.md5(b"DCIM.zip").hexdigest()},
+            {"filename": "GPS.zip", "checksum": "partial upload"}
+        ]
+        with patch.object(api, "list_files", return_value=remote_files):
+            api._ZenodoAPI__zenodo_upload_files(self.folder, "bucket", journal)
+
+        self.assertEqual(sorted(call[0][1].name for call in mock_uploader.call_args_list), ["GPS.zip", "METADATA.zip"])
+        self.assertEqual(sorted(journal.data["uploaded"]), ["DCIM.zip", "GPS.zip", "METADATA.zip"])
+
+
+    @patch("src.zenodo_api.za_token.file_uploader")
+    def test_upload_retry_on_checksum_error(self, mock_uploader):
+        Path(self.folder, "GPS.zip").unlink()
+        Path(self.folder, "METADATA.zip").unlink()
+        mock_uploader.side_effect = ["wrong", hashlib.md5(b"DCIM.zip").hexdigest()]
+        journal = UploadJournal(self.folder, self.journal_folder)
+        api = ZenodoAPI("", {"ACCESS_TOKEN": "token", "ZENODO_LINK": "link"})
+
+        with patch.object(api, "list_files", return_value=[]):
+            api._ZenodoAPI__zenodo_upload_files(self.folder, "bucket", journal)
+
+        self.assertEqual(mock_uploader.call_count, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
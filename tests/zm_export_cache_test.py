@@ -0,0 +1,65 @@
+import os
+import time
+import unittest
+import tempfile
+import polars as pl
+from pathlib import Path
+from shapely import Polygon
+
+from src.zenodo_monitoring.zm_export_cache import ExportCache
+
+
+class TestExportCache(unittest.TestCase):
+
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.gpkg = Path(self.tmp_dir.name, "atlas.gpkg")
+        self.gpkg.write_bytes(b"gpkg")
+        self.cache = ExportCache(Path(self.tmp_dir.name, "cache"), self.gpkg, max_size_gb=1)
+
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+
+    def build_key(self, polygon: Polygon, class_ids: list[int]) -> str:
+        return self.cache.build_key([polygon], 1, class_ids, {"Coral": [3, 2]}, ["2023-01-01", "2023-12-31"], ["GPSLatitude"], ["ASV"], "Score")
+
+
+    def test_key_is_canonical(self):
+        poly_a = Polygon([(0, 0), (1, 0), (1, 1), (0, 0)])
+        poly_b = Polygon([(1, 0), (1, 1), (0, 0), (1, 0)])
+
+        self.assertEqual(self.build_key(poly_a, [2, 1]), self.build_key(poly_b, [1, 2]))
+        self.assertNotEqual(self.build_key(poly_a, [1]), self.build_key(poly_a, [1, 2]))
+
+
+    def test_put_get_and_invalidate_on_new_gpkg(self):
+        df_data = pl.DataFrame({"FileName": ["a.jpg"], "Acropore": [0.5]})
+        self.cache.put("key", df_data)
+        self.assertTrue(self.cache.get("key").equals(df_data))
+
+        self.gpkg.write_bytes(b"new gpkg")
+        self.assertIsNone(self.cache.get("key"))
+
+        self.cache.put("other_key", df_data)
+        self.assertEqual(len(list(Path(self.tmp_dir.name, "cache").iterdir())), 1)
+
+
+    def test_evict_least_recently_used(self):
+        df_data = pl.DataFrame({"FileName": ["a.jpg"] * 100})
+        self.cache.put("old", df_data)
+        self.cache.put("recent", df_data)
+        old_time = time.time() - 100
+        os.utime(Path(self.cache.version_folder, "old.parquet"), (old_time, old_time))
+        
+        self.cache.max_size_bytes = Path(self.cache.version_folder, "recent.parquet").stat().st_size * 1.5
+        self.cache.evict(self.cache.version_folder)
+
+        self.assertIsNone(self.cache.get("old"))
+        self.assertIsNotNone(self.cache.get("recent"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,69 @@
+import io
+import time
+import threading
+import tempfile
+import unittest
+import diskcache
+import polars as pl
+from unittest.mock import patch
+
+from src.zenodo_monitoring import zm_exporter_page
+from src.zenodo_monitoring.zm_exporter_page import ZenodoMonitoringExporter
+
+
+class NamedBytesIO(io.BytesIO):
+    def close(self): pass
+
+
+class TestZenodoMonitoringExporter(unittest.TestCase):
+
+
+    def test_write_split_csv_roll_over(self):
+        exporter = object.__new__(ZenodoMonitoringExporter)
+        df_data = pl.DataFrame({"FileName": [f"frame_{i}.jpg" for i in range(10)], "score": [0.5] * 10})
+        files = {}
+
+        def open_file(name):
+            files[name] = NamedBytesIO()
+            return files[name]
+
+        with patch.object(zm_exporter_page, "MAX_CSV_FILE_TO_DOWNLOAD", 60 / (1024 * 1024)), patch.object(zm_exporter_page, "EXPORT_BATCH_SIZE", 2):
+            list_csv = exporter.write_split_csv(df_data, "export", open_file)
+
+        self.assertEqual(list_csv, [f"export_{i}.csv" for i in range(1, 6)])
+        df_read = pl.concat([pl.read_csv(files[name].getvalue()) for name in list_csv])
+        self.assertTrue(df_read.equals(df_data))
+        self.assertTrue(all(len(files[name].getvalue()) <= 60 for name in list_csv))
+
+
+    def test_write_split_csv_empty(self):
+        exporter = object.__new__(ZenodoMonitoringExporter)
+        file = NamedBytesIO()
+
+        list_csv = exporter.write_split_csv(pl.DataFrame({"FileName": []}, schema={"FileName": pl.String}), "export", lambda _: file)
+
+        self.assertEqual(list_csv, ["export_1.csv"])
+        self.assertEqual(file.getvalue(), b"FileName\n")
+
+
+    def test_lock_renewed_while_export_is_built(self):
+        exporter = object.__new__(ZenodoMonitoringExporter)
+        with tempfile.TemporaryDirectory() as tmp_dir, diskcache.Cache(tmp_dir) as jobs_cache:
+            exporter.jobs_cache = jobs_cache
+            lock = diskcache.Lock(jobs_cache, "export_lock_key", expire=0.3)
+            lock.acquire()
+            with patch.object(zm_exporter_page, "EXPORT_JOB_LOCK_TTL", 0.3):
+                stop_event = threading.Event()
+                renew_thread = threading.Thread(target=exporter.renew_lock, args=("export_lock_key", stop_event))
+                renew_thread.start()
+                time.sleep(0.6)
+                self.assertTrue(lock.locked())
+                stop_event.set()
+                renew_thread.join()
+
+            time.sleep(0.4)
+            self.assertFalse(lock.locked())
+
+
+if __name__ == "__main__":
+    unittest.main()
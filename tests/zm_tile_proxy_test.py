@@ -0,0 +1,86 @@
+import time
+import sqlite3
+import unittest
+import tempfile
+from pathlib import Path
+from flask import Flask
+from unittest.mock import MagicMock
+
+from src.zenodo_monitoring.zm_tile_proxy import TileProxy
+
+PNG_TILE = b"\x89PNG\r\n\x1a\nfake"
+
+
+class TestTileProxy(unittest.TestCase):
+
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.mbtiles_folder = Path(self.tmp_dir.name, "mbtiles")
+        self.mbtiles_folder.mkdir()
+
+        self.proxy = TileProxy("https://upstream", Path(self.tmp_dir.name, "cache"), 1, self.mbtiles_folder)
+        self.proxy.session = MagicMock()
+        self.proxy.session.get.return_value = MagicMock(status_code=200, content=PNG_TILE, headers={"ETag": '"up-1"', "Content-Type": "image/png"})
+
+        server = Flask(__name__)
+        self.proxy.register_route(server)
+        self.client = server.test_client()
+
+
+    def tearDown(self):
+        self.proxy.cache.close()
+        self.tmp_dir.cleanup()
+
+
+    def test_upstream_tile_is_cached(self):
+        first = self.client.get("/tiles/ortho/18/1/2?year=2023")
+        second = self.client.get("/tiles/ortho/18/1/2?year=2023")
+
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(second.data, PNG_TILE)
+        self.assertIn("max-age", second.headers["Cache-Control"])
+        self.assertEqual(self.proxy.session.get.call_count, 1)
+        self.assertIn("layer=ortho&year=2023&tilematrix=18&tilerow=1&tilecol=2", self.proxy.session.get.call_args[0][0])
+
+
+    def test_browser_revalidation(self):
+        etag = self.client.get("/tiles/ortho/18/1/2?year=2023").headers["ETag"]
+        response = self.client.get("/tiles/ortho/18/1/2?year=2023", headers={"If-None-Match": etag})
+
+        self.assertEqual(response.status_code, 304)
+
+
+    def test_old_tile_revalidated_with_upstream_etag(self):
+        self.client.get("/tiles/ortho/18/1/2?year=2023")
+        tile = self.proxy.cache.get("ortho/2023/18/1/2")
+        tile["fetched_at"] = time.time() - 10**7
+        self.proxy.cache.set("ortho/2023/18/1/2", tile)
+
+        self.proxy.session.get.return_value = MagicMock(status_code=304, content=b"", headers={})
+        response = self.client.get("/tiles/ortho/18/1/2?year=2023")
+
+        self.assertEqual(response.data, PNG_TILE)
+        self.assertEqual(self.proxy.session.get.call_args[1]["headers"], {"If-None-Match": '"up-1"'})
+
+
+    def test_local_mbtiles(self):
+        connection = sqlite3.connect(Path(self.mbtiles_folder, "bathy_2024.mbtiles"))
+        connection.execute("CREATE TABLE tiles (zoom_level INTEGER, tile_column INTEGER, tile_row INTEGER, tile_data BLOB)")
+        connection.execute("INSERT INTO tiles VALUES (2, 1, 2, ?)", (PNG_TILE, )) # y = 1 in xyz order.
+        connection.commit()
+        connection.close()
+
+        response = self.client.get("/tiles/bathy/2/1/1?year=2024")
+
+        self.assertEqual(response.data, PNG_TILE)
+        self.assertEqual(response.content_type, "image/png")
+        self.proxy.session.get.assert_not_called()
+
+
+    def test_unknown_layer(self):
+        self.assertEqual(self.client.get("/tiles/other/2/1/1").status_code, 404)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,9 +1,11 @@
 from pathlib import Path
 import json
+import polars as pl
 from tqdm import tqdm
 
 from src.seatizen_atlas.sa_manager import AtlasManager
-from src.models.frame_model import FrameDAO, FrameDTO
+from src.models.frame_model import FrameDAO
+from src.models.deposit_model import VersionDAO
 
 
 def main():
@@ -19,17 +21,19 @@ def main():
     seatizenManager = AtlasManager(config_json, "seatizen_atlas_folder", True, False)
 
 
-    frame_manager = FrameDAO()
-    frames = frame_manager.frames
+    frame_manager, version_manager = FrameDAO(), VersionDAO()
+    df_frames = frame_manager.get_frames_table().filter(pl.col("relative_file_path").is_null())
     
-    for frame in tqdm(frames):
-        if frame.relative_path is not None: continue
+    session_name_by_doi = {}
+    for frame_id, version_doi, original_filename in tqdm(df_frames.select("id", "version_doi", "OriginalFileName").iter_rows()):
+        if version_doi not in session_name_by_doi:
+            session_name_by_doi[version_doi] = version_manager.get_version_by_doi(version_doi).deposit.session_name
 
-        field_value = f"{frame.version.deposit.session_name}/DCIM/{frame.original_filename}"
-        frame_manager.update_field(frame.id, "relative_file_path", field_value)
+        field_value = f"{session_name_by_doi[version_doi]}/DCIM/{original_filename}"
+        frame_manager.update_field(frame_id, "relative_file_path", field_value)
 
 
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -1,5 +1,4 @@
 import json
-import time
 import shutil
 import argparse
 import traceback
@@ -10,8 +9,9 @@ from src.seatizen_atlas.sa_manager import AtlasManager
 
 from src.utils.lib_tools import increment_semantic_versioning_at_patch_level, SemanticVersioningLevel
 
-from src.utils.constants import ZENODO_LINK_WITHOUT_TOKEN_COMMUNITIES, TMP_PATH
+from src.utils.constants import ZENODO_LINK_WITHOUT_TOKEN_COMMUNITIES, TMP_PATH, SQLITE_CONNECTION_PROFILES
 
+from src.zenodo_api.za_http_client import HTTPClient
 from src.zenodo_api.za_tokenless import get_session_in_communities, download_manager_without_token, get_all_versions_from_session_name
 
 from src.models.deposit_model import DepositDAO, VersionDAO
@@ -29,6 +29,9 @@ def parse_args():
     parser.add_argument("-psa", "--path_seatizen_atlas_folder", default="./seatizen_atlas_folder", help="Folder to store data")
     parser.add_argument("-pmj", "--path_metadata_json", default="./metadata/metadata_seatizen_atlas.json", help="Path to metadata file")
 
+    # Database.
+    parser.add_argument("-cpr", "--connection_profile", default="bulk_load", choices=list(SQLITE_CONNECTION_PROFILES), help="Sqlite connection profile. Default bulk_load")
+
     return parser.parse_args()
 
 def main(opt):
@@ -42,7 +45,7 @@ def main(opt):
             config_json = json.load(json_file)
 
     # Change from local if you perform it twice
-    seatizenManager = AtlasManager(config_json, opt.path_seatizen_atlas_folder, from_local=True, force_regenerate=False) 
+    seatizenManager = AtlasManager(config_json, opt.path_seatizen_atlas_folder, from_local=True, force_regenerate=False, connection_profile=opt.connection_profile) 
     deposit_manager = DepositDAO()
     version_manager = VersionDAO()
     etl_run_manager = ETLRunsDAO()
@@ -57,7 +60,6 @@ def main(opt):
 
         list_session_in_communities = get_session_in_communities(url, last_etl_run.last_zenodo_harvest_at)
         for i, (conceptrecid, session_name) in enumerate(list_session_in_communities):
-            time.sleep(0.5) # Sleep 0.5 sec to avoid hitting max rate limit on Zenodo. 
             cpt_sessions += 1
             try:
                 print(f"\n\n({i}/{len(list_session_in_communities)}) Working with session {session_name}")
@@ -94,7 +96,7 @@ def main(opt):
 
                         # We download only the needed data.
                         session_path = Path(TMP_PATH, "auto_update", session_name)
-                        download_manager_without_token(list_files_to_download, session_path.parent, session_name, version["id"])
+                        download_manager_without_token(list_files_to_download, session_path.parent, session_name, version["id"], stream_zip=True)
 
                     if not session_path: 
                         print("[WARNING] We don't found METADATA.zip or PROCESSED_DATA.zip to download, no data to import in DB, we continue.")
@@ -122,6 +124,7 @@ def main(opt):
     print(f"\nEnd of process. On {cpt_sessions} sessions, {len(sessions_fail)} fails. ")
     if (len(sessions_fail)):
         [print("\t* " + session_name) for session_name in sessions_fail]
+    HTTPClient().print_metrics()
     
     # Update last time harvest.
     date_now = datetime.now().strftime("%Y-%m-%d")
@@ -3,6 +3,7 @@ import argparse
 from pathlib import Path
 
 from src.utils.lib_download import download_specific_frames, download_with_token, download_without_token
+from src.utils.constants import DOWNLOAD_NB_WORKERS
 
 def parse_args():
     parser = argparse.ArgumentParser(prog="zenodo-download", description="Workflow to download raw data and processed data with metadata")
@@ -29,6 +30,10 @@ def parse_args():
     parser.add_argument("-is", "--index_start", default="0", help="Choose from which index to start")
     parser.add_argument("-ip", "--index_position", default="-1", help="if != -1, take only session at selected index")
 
+    # Download speed.
+    parser.add_argument("-nw", "--nb_workers", default=str(DOWNLOAD_NB_WORKERS), help="Number of files downloaded at the same time for a session. Only without token")
+    parser.add_argument("-mbw", "--max_bandwidth", default="0", help="Maximum download rate in MB/s shared by all files, 0 for no limit. Only without token")
+
     return parser.parse_args()
 
 
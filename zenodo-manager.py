@@ -8,6 +8,8 @@ from src.utils.lib_tools import get_list_sessions
 from src.seatizen_atlas.sa_manager import AtlasManager
 from src.seatizen_atlas.sa_metadata import seatizen_atlas_metadata
 
+from src.utils.constants import SQLITE_CONNECTION_PROFILES
+
 
 def parse_args():
     parser = argparse.ArgumentParser(prog="zenodo-manager", description="Workflow to manage global deposit")
@@ -42,6 +44,7 @@ def parse_args():
     parser.add_argument("-cp", "--confirm_upload", action="store_true", help="Upload to zenodo.")
     parser.add_argument("-ne", "--no_export", action="store_true", help="No export.")
     parser.add_argument("-ssn", "--sql_script_number", default=None, help="If fill with a number, try to apply the correspondant script.")
+    parser.add_argument("-cpr", "--connection_profile", default="bulk_load", choices=list(SQLITE_CONNECTION_PROFILES), help="Sqlite connection profile. Default bulk_load")
 
 
     return parser.parse_args()
@@ -63,7 +66,7 @@ def main(opt):
             seatizen_atlas_metadata(config_json, opt.path_metadata_json)
         return
 
-    seatizenManager = AtlasManager(config_json, opt.path_seatizen_atlas_folder, opt.use_from_local, opt.force_regenerate)
+    seatizenManager = AtlasManager(config_json, opt.path_seatizen_atlas_folder, opt.use_from_local, opt.force_regenerate, opt.connection_profile)
 
     # Try to apply a sql_script.
     if opt.sql_script_number != None:
@@ -1,6 +1,7 @@
 import argparse
 
 from src.zenodo_monitoring.zm_app_page import ZenodoMonitoringApp
+from src.utils.constants import SQLITE_CONNECTION_PROFILES, TILE_UPSTREAM_URL
 
 
 def parse_args():
@@ -9,6 +10,12 @@ def parse_args():
     # Seatizen atlas folder path
     parser.add_argument("-psa", "--path_seatizen_atlas_folder", default="./seatizen_atlas_folder", help="Folder to store data.")
     parser.add_argument("-ulo", "--use_from_local", action="store_true", help="Work from a local folder. Update if exists else Create. Default behaviour is to download data from zenodo.")
+    parser.add_argument("-cpr", "--connection_profile", default="read_heavy", choices=list(SQLITE_CONNECTION_PROFILES), help="Sqlite connection profile. Default read_heavy")
+
+    # Explorer tiles
+    parser.add_argument("-utp", "--use_tile_proxy", action="store_true", help="Serve explorer tiles through a local proxy with a disk cache.")
+    parser.add_argument("-tuu", "--tile_upstream_url", default=TILE_UPSTREAM_URL, help="Tile server used by the tile proxy.")
+    parser.add_argument("-pmf", "--path_mbtiles_folder", default=None, help="Folder with {layer}_{year}.mbtiles files served by the tile proxy before upstream, for offline use.")
 
     return parser.parse_args()
 
@@ -21,7 +28,11 @@ if __name__ == '__main__':
 else:
     opt = argparse.Namespace(
         path_seatizen_atlas_folder="./seatizen_atlas_folder", 
-        use_from_local=False
+        use_from_local=False,
+        connection_profile="read_heavy",
+        use_tile_proxy=False,
+        tile_upstream_url=TILE_UPSTREAM_URL,
+        path_mbtiles_folder=None
     )
     my_app = ZenodoMonitoringApp(opt)
     app = my_app.app.server
\ No newline at end of file